@@ -20,6 +20,9 @@ CROSS_WIDTH = 15
 ROWS = 3
 COLS = 3
 
+# Marks in a row needed to win; at most min(ROWS, COLS)
+WIN_LENGTH = 3
+
 # Square SIZE
 SQSIZE = WIDTH // COLS
 
@@ -35,4 +38,4 @@ CIRCLE_COLOR = (239, 231, 200)
 RADIUS = SQSIZE // 6
 
 # offset
-OFFSET = 80
+OFFSET = SQSIZE // 3
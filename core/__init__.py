@@ -0,0 +1,32 @@
+"""Headless game rules and AI engines.
+
+Nothing here imports pygame, and numpy is only loaded by the modules that
+need it (``core.retrograde``). Names are resolved on first access so that
+``import core`` stays cheap; see ``core.importtime`` for the budget.
+"""
+import importlib
+
+_EXPORTS = {
+    'Board': 'core.board',
+    'AI': 'core.ai',
+    'TranspositionTable': 'core.ai',
+    'AlphaBetaSearch': 'core.alphabeta',
+    'MCTS': 'core.mcts',
+    'PerfectPlayTable': 'core.retrograde',
+    'Rules': 'core.rules',
+    'build_table': 'core.retrograde',
+    'Move': 'core.tictactoe',
+    'Player': 'core.tictactoe',
+    'TicTacToeGame': 'core.tictactoe',
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'core' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
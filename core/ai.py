@@ -0,0 +1,264 @@
+"""Minimax AI for the treatment decision simulator, with a shared transposition table."""
+import random
+import time
+from collections import OrderedDict
+
+from constants import ROWS, COLS, WIN_LENGTH
+from core.board import INVERSE_SYMMETRIES, SQUARES, SYMMETRIES, Board
+from core.telemetry import NULL_SINK, Decision
+from core.worker import SearchCancelled
+
+
+class TranspositionTable:
+    '''Bounded cache of solved positions, evicting the least recently used entry'''
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Shared by every AI in the process so solved positions survive Game.reset()
+SHARED_TABLE = TranspositionTable()
+
+
+class AI:
+    def __init__(self, level=1, player=2, table=None, solution=None, mcts=None, telemetry=None, policy=None):
+        # 0 random, 1 minimax, 2 Monte Carlo tree search,
+        # 3 to 5 alpha-beta within the time and node budget core.deadline.LEVEL_BUDGETS gives the level,
+        # 6 the move table core.learning learned from self-play
+        self.level = level
+        self.player = player
+        self.table = SHARED_TABLE if table is None else table
+        # Optional core.retrograde.PerfectPlayTable; when set, moves are looked up instead of searched
+        self.solution = solution
+        # core.mcts.MCTS used at level 2, created with the default budget on first use
+        self.mcts = mcts
+        # core.deadline.DeadlineSearch used at levels 3 to 5, created on first use
+        self.deadline = None
+        # Learned table (a core.retrograde.PerfectPlayTable view) used at level 6, loaded on first use
+        self.policy = policy
+        self._should_stop = None  # set by evaluate() for the duration of one search
+        # core.telemetry sink receiving one Decision per evaluate(); disabled by default
+        self.telemetry = NULL_SINK if telemetry is None else telemetry
+        self.nodes = 0  # positions visited by the last minimax search
+        self.depth = 0  # deepest ply it reached below the root
+        self.last_evaluation = None  # evaluation of the move returned by the last evaluate()
+        
+    def random_move(self, board):
+        empty_squares = board.get_empty_squares()
+        index = random.randrange(0, len(empty_squares))
+        return empty_squares[index]  # (row, col)
+    
+    # Minimax algorithm
+    def minimax(self, board, is_maximizing):
+        if self._should_stop is not None and self._should_stop():
+            raise SearchCancelled
+        self.nodes += 1
+        # Check terminal cases
+        case = board.final_state()
+        if case or board.is_full():
+            if board.marked_squares > self.depth:
+                self.depth = board.marked_squares
+        # player 1 wins
+        if case == 1:
+            return 1, None  # evaluate the move
+        # player 2 wins AI
+        elif case == 2:
+            return -1, None  # evaluate the move
+        # draw
+        elif board.is_full():
+            return 0, None  # evaluate the move
+
+        # Symmetric positions share one entry; the move is stored in the canonical frame.
+        # Keys and entries are packed into ints, which take a fraction of the memory of tuples
+        canonical, symmetry = board.canonical_key()
+        key = canonical << 2 | is_maximizing << 1 | self.player - 1
+        entry = self.table.get(key)
+        if entry is not None:
+            score, move = divmod(entry, len(SQUARES))
+            return score - 1, SQUARES[INVERSE_SYMMETRIES[symmetry][move]]
+
+        # Maximizing player
+        if is_maximizing:
+            best_score = -1000
+            best_move = None
+            for row, col in board.get_empty_squares():
+                board.mark_square(row, col, 1)
+                eval = self.minimax(board, False)[0]
+                board.unmark_square(row, col, 1)
+                if eval > best_score:
+                    best_score = eval
+                    best_move = (row, col)
+
+        # Minimizing player
+        else:
+            best_score = 1000
+            best_move = None
+            for row, col in board.get_empty_squares():
+                board.mark_square(row, col, self.player)
+                eval = self.minimax(board, True)[0]
+                board.unmark_square(row, col, self.player)
+                if eval < best_score:
+                    best_score = eval
+                    best_move = (row, col)
+
+        row, col = best_move
+        self.table.put(key, (best_score + 1) * len(SQUARES) + SYMMETRIES[symmetry][row * COLS + col])
+        return best_score, best_move
+        
+    def solution_move(self, board):
+        '''
+          @return (evaluation, move) from the perfect-play table, with the
+          evaluation scored like minimax (1 when player 1 wins)
+        '''
+        value, move = self.solution.lookup_key(board.keys[0], self.player)
+        outcome = (value > 0) - (value < 0)
+        return (outcome if self.player == 1 else -outcome), SQUARES[move]
+
+    def mcts_move(self, board, should_stop=None):
+        '''
+          @return (evaluation, move) from Monte Carlo tree search, with the
+          evaluation scored like minimax (1 when player 1 wins)
+        '''
+        if self.mcts is None:
+            from core.mcts import MCTS
+            self.mcts = MCTS(ROWS, COLS, WIN_LENGTH)
+        move = self.mcts.best_move_bits(board.bits, self.player, should_stop)
+        # A root the search never expanded (no playouts before should_stop) has no stats: call it even
+        value = next((value for cell, _, value in self.mcts.root_stats() if cell == move), 0.5)
+        evaluation = 2 * value - 1
+        return (evaluation if self.player == 1 else -evaluation), SQUARES[move]
+
+    def deadline_move(self, board, should_stop=None):
+        '''
+          @return (evaluation, move) from the best iteration of an alpha-beta
+          search that finished within the level's budget, with the evaluation
+          scored like minimax (1 when player 1 wins)
+        '''
+        from core.deadline import LEVEL_BUDGETS, DeadlineSearch
+        budget = LEVEL_BUDGETS[self.level]
+        if self.deadline is None:
+            self.deadline = DeadlineSearch(ROWS, COLS, WIN_LENGTH, budget)
+        self.deadline.budget = budget
+        move = self.deadline.best_move(board.position.cells, self.player, should_stop)
+        evaluation = self.deadline.evaluation()
+        return (evaluation if self.player == 1 else -evaluation), SQUARES[move]
+
+    def policy_move(self, board):
+        '''
+          @return (evaluation, move) from the table learned by self-play, with
+          the evaluation scored like minimax (1 when player 1 wins); positions
+          training never reached are searched with minimax instead
+        '''
+        if self.policy is None:
+            from core import learning
+            self.policy = learning.load(ROWS, COLS, WIN_LENGTH)
+        value, move = self.policy.lookup_key(board.keys[0], self.player)
+        if move is None:
+            return self.minimax(board, False)
+        outcome = (value > 0) - (value < 0)
+        return (outcome if self.player == 1 else -outcome), SQUARES[move]
+
+    def evaluate_batch(self, positions, players=None):
+        '''
+          @return core.evaluation.BatchEvaluation of many positions (a NumPy
+          array, see evaluate_batch there): table lookups when a solution is
+          set, otherwise one minimax per distinct position sharing self.table
+        '''
+        from core.evaluation import evaluate_batch
+
+        # minimax() lets player 1 maximize and self.player minimize, so search as player 2
+        searcher = self if self.player == 2 else AI(player=2, table=self.table)
+
+        def search(cells, player):
+            board = Board()
+            for index, value in enumerate(cells):
+                if value:
+                    board.mark_square(*SQUARES[index], value)
+            score, (row, col) = searcher.minimax(board, player == 1)
+            return row * COLS + col, score if player == 1 else -score
+        return evaluate_batch(positions, ROWS, COLS, WIN_LENGTH, players, self.solution, search)
+
+    def evaluate(self, main_board, should_stop=None):
+        '''
+          @return the chosen (row, col); when should_stop() becomes true the
+          search is abandoned with SearchCancelled
+        '''
+        start = time.perf_counter()
+        hits, misses = self.table.hits, self.table.misses
+        lookups = None  # (hits, misses) of an engine that does not search with self.table
+        cutoffs, deadline_missed = 0, False
+        self.nodes = 0
+        self.depth = main_board.marked_squares
+        if self.level == 0:
+            engine = 'random'
+            evaluate, move = None, self.random_move(main_board)
+        elif self.level == 2:
+            engine = 'mcts'
+            evaluate, move = self.mcts_move(main_board, should_stop)
+            self.nodes = self.mcts.last_playouts
+        elif self.level == 6:
+            engine = 'policy'
+            evaluate, move = self.policy_move(main_board)
+        elif self.level >= 3:
+            engine = 'deadline'
+            evaluate, move = self.deadline_move(main_board, should_stop)
+            search = self.deadline
+            self.nodes = search.nodes
+            self.depth += search.depth
+            cutoffs, deadline_missed = search.cutoffs, search.deadline_missed
+            lookups = (search.hits, search.misses)
+        elif self.solution is not None:
+            engine = 'table'
+            evaluate, move = self.solution_move(main_board)
+        else:
+            engine = 'minimax'
+            self._should_stop = should_stop
+            try:
+                evaluate, move = self.minimax(main_board, False)
+            finally:
+                self._should_stop = None
+        self.last_evaluation = evaluate
+        if self.telemetry.enabled:
+            if lookups is None:
+                lookups = (self.table.hits - hits, self.table.misses - misses)
+            self.telemetry.record(Decision(
+                engine, self.player, move, evaluate, self.nodes,
+                self.depth - main_board.marked_squares, cutoffs,
+                *lookups, time.perf_counter() - start, deadline_missed,
+            ))
+        return move  # (row, col)
@@ -0,0 +1,206 @@
+"""Alpha-beta search for k-in-a-row games on rows x cols boards."""
+from core.rules import rules_for
+from core.worker import SearchCancelled
+
+WIN_SCORE = 1_000_000
+# Scores above this are forced wins; the distance to the win is subtracted from WIN_SCORE
+WIN_THRESHOLD = WIN_SCORE - 1000
+# Heuristic weight of a line holding n pieces of one side and none of the other
+LINE_WEIGHTS_BASE = 8
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+def default_depth(cells):
+    """Return the search depth that keeps a move interactive on a board of ``cells`` cells."""
+    if cells <= 9:
+        return cells  # small enough to solve exactly
+    if cells <= 25:
+        return 6
+    if cells <= 64:
+        return 4
+    return 2  # the line heuristic already costs a pass over hundreds of lines per leaf
+
+
+class AlphaBetaSearch:
+    """Negamax search with alpha-beta pruning, a transposition table and move ordering.
+
+    Positions are a pair of bitmasks (side to move, opponent) with bit
+    ``row * cols + col`` set for each marked cell. Wins are scored as
+    ``WIN_SCORE - plies`` so faster wins are preferred and losses are delayed.
+    The search deepens iteratively up to ``max_depth`` (``default_depth`` when
+    not given); positions at the depth limit are scored by counting open lines
+    for each side. ``table`` is an optional core.sharedtable.SharedTable to
+    search with instead of a private dict; it does its own replacement, so
+    ``max_table_size`` does not apply to it.
+    """
+
+    def __init__(self, rows, cols=None, k=None, max_depth=None, max_table_size=1_000_000, table=None):
+        rules = rules_for(rows, cols, k)
+        self.rows, self.cols, self.k = rules.rows, rules.cols, rules.k
+        self.cells = rules.cells
+        self.max_depth = default_depth(self.cells) if max_depth is None else max_depth
+        self.max_table_size = max_table_size
+        self.full = (1 << self.cells) - 1
+        self.lines = rules.lines
+        self.line_masks = rules.line_masks
+        self.cell_lines = rules.cell_masks
+        self.line_weights = [0] + [LINE_WEIGHTS_BASE ** n for n in range(1, self.k)]
+        center_row, center_col = (self.rows - 1) / 2, (self.cols - 1) / 2
+        self.center_order = sorted(
+            range(self.cells),
+            key=lambda cell: abs(cell // self.cols - center_row) + abs(cell % self.cols - center_col),
+        )
+        self.table = {} if table is None else table
+        if table is not None:
+            self._store = table.put
+        self.history = [0] * self.cells
+        self.killers = []
+        self.nodes = 0
+        self.cutoffs = 0
+        self.hits = 0  # transposition table lookups that found an entry
+        self.misses = 0
+        self.depth = 0  # depth of the last completed iteration
+        self.score = 0
+        self.move = None  # best move of the last completed iteration
+        self.poll_mask = 4095  # should_stop is polled whenever nodes & poll_mask == 0
+        self._should_stop = None
+
+    def best_move(self, cells, player, should_stop=None):
+        """Return the best flat cell index for ``player`` given a flat list of 0/1/2 cells.
+
+        ``should_stop`` is polled every few thousand nodes; when it returns True
+        the search raises SearchCancelled, leaving the last completed
+        iteration's move, score and depth in ``move``, ``score`` and ``depth``.
+        """
+        me = opp = 0
+        for index, value in enumerate(cells):
+            if value == player:
+                me |= 1 << index
+            elif value:
+                opp |= 1 << index
+        if me | opp == self.full:
+            return None
+        self.killers = [[None, None] for _ in range(self.cells + 1)]
+        self.nodes = 0
+        self.cutoffs = 0
+        self.hits = self.misses = 0
+        self.depth = 0
+        self.move = None
+        self._should_stop = should_stop
+        move = None
+        # Each iteration seeds the table and killers with better move ordering for the next
+        for depth in range(1, min(self.max_depth, self.cells - (me | opp).bit_count()) + 1):
+            self.score, move = self._negamax(me, opp, depth, 0, -WIN_SCORE - 1, WIN_SCORE + 1)
+            self.depth = depth
+            self.move = move
+            if abs(self.score) > WIN_THRESHOLD:
+                break  # forced result; deeper iterations cannot change it
+        return move
+
+    def _store(self, key, entry):
+        table = self.table
+        if len(table) >= self.max_table_size and key not in table:
+            # Depth-preferred: shallow results are cheap to recompute, so drop them first
+            if entry[0] <= 2:
+                return
+            table.clear()
+        table[key] = entry
+
+    def _wins(self, mask, cell):
+        for line in self.cell_lines[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def _heuristic(self, me, opp):
+        score = 0
+        weights = self.line_weights
+        for line in self.line_masks:
+            mine = me & line
+            theirs = opp & line
+            if mine and not theirs:
+                score += weights[mine.bit_count()]
+            elif theirs and not mine:
+                score -= weights[theirs.bit_count()]
+        return score
+
+    def _ordered_moves(self, occupied, ply, tt_move):
+        moves = [cell for cell in self.center_order if not occupied >> cell & 1]
+        # A reversed sort is still stable, so equal history scores keep the center-first order
+        moves.sort(key=self.history.__getitem__, reverse=True)
+        killer, second = self.killers[ply]
+        for move in (second, killer, tt_move):
+            if move is not None and not occupied >> move & 1:
+                moves.remove(move)
+                moves.insert(0, move)
+        return moves
+
+    def _negamax(self, me, opp, depth, ply, alpha, beta):
+        """Return (score, move) for the side to move; the last move did not win."""
+        self.nodes += 1
+        if self._should_stop is not None and not self.nodes & self.poll_mask and self._should_stop():
+            raise SearchCancelled
+        occupied = me | opp
+        if occupied == self.full:
+            return 0, None
+        if depth == 0:
+            return self._heuristic(me, opp), None
+
+        original_alpha = alpha
+        key = (me, opp)
+        entry = self.table.get(key)
+        tt_move = None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            entry_depth, flag, entry_score, tt_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return entry_score, tt_move
+                if flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score, tt_move
+
+        best_score = -WIN_SCORE - 1
+        best_move = None
+        cell_lines = self.cell_lines
+        for move in self._ordered_moves(occupied, ply, tt_move):
+            mine = me | 1 << move
+            for line in cell_lines[move]:
+                if mine & line == line:
+                    score = WIN_SCORE - 1
+                    break
+            else:
+                score = -self._negamax(opp, mine, depth - 1, ply + 1, -beta, -alpha)[0]
+                # One ply further from the root: pull mate scores towards zero
+                if score > WIN_THRESHOLD:
+                    score -= 1
+                elif score < -WIN_THRESHOLD:
+                    score += 1
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.cutoffs += 1
+                killers = self.killers[ply]
+                if killers[0] != move:
+                    killers[1] = killers[0]
+                    killers[0] = move
+                self.history[move] += depth * depth
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self._store(key, (depth, flag, best_score, best_move))
+        return best_score, best_move
@@ -0,0 +1,222 @@
+"""Streaming outcome statistics over core.gamerecords files.
+
+Records are read from the memory map in chunks and folded into an
+OutcomeStats, so memory use is bounded by the chunk size, not the dataset.
+Every statistic is a count, split by (AI level, starting player), so partial
+results from separate workers combine with ``+``. ``analyze`` does exactly
+that across a process pool; ``python -m core.analytics games.bin`` prints the
+report.
+
+Statistics per group:
+
+  openings:   results (draw, first mover wins, second mover wins) by first cell
+  winner_cells, loser_cells: how often the eventual winner / loser occupied each cell
+  lengths:    results by number of moves
+  positions:  how often each position was reached, keyed like Board.keys[0]
+"""
+import argparse
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.gamerecords import NO_AI, NO_MOVE, GameRecords, config_geometry, config_id
+
+DEFAULT_CHUNK = 1 << 20
+
+
+class GroupStats:
+    """Counts for the games of one (AI level, starting player) group."""
+
+    def __init__(self, cells, max_moves):
+        self.games = 0
+        self.openings = np.zeros((cells, 3), dtype=np.int64)
+        self.winner_cells = np.zeros(cells, dtype=np.int64)
+        self.loser_cells = np.zeros(cells, dtype=np.int64)
+        self.lengths = np.zeros((max_moves + 1, 3), dtype=np.int64)
+        self.positions = Counter()
+
+    def __iadd__(self, other):
+        self.games += other.games
+        self.openings += other.openings
+        self.winner_cells += other.winner_cells
+        self.loser_cells += other.loser_cells
+        self.lengths += other.lengths
+        self.positions.update(other.positions)
+        return self
+
+    @property
+    def decisive(self):
+        return int(self.lengths[:, 1:].sum())
+
+    def outcome_rates(self):
+        """Return [draw, first mover wins, second mover wins] as fractions of all games."""
+        totals = self.openings.sum(axis=0)
+        return (totals / self.games).tolist() if self.games else [0.0, 0.0, 0.0]
+
+    def opening_rates(self):
+        """Return {cell: [draw, first wins, second wins] rates} for every opening played."""
+        counts = self.openings.sum(axis=1)
+        return {cell: (self.openings[cell] / counts[cell]).tolist() for cell in np.flatnonzero(counts).tolist()}
+
+    def cell_contribution(self):
+        """Return, per cell, the share of decisive games the winner minus the loser occupied it."""
+        decisive = self.decisive
+        if not decisive:
+            return np.zeros(len(self.winner_cells))
+        return (self.winner_cells - self.loser_cells) / decisive
+
+
+class OutcomeStats:
+    """Mergeable statistics over games of one board geometry."""
+
+    def __init__(self, rows, cols, k, max_moves=None):
+        self.rows, self.cols, self.k = rows, cols, k
+        self.cells = rows * cols
+        self.max_moves = self.cells if max_moves is None else max_moves
+        self.config = config_id(rows, cols, k)
+        self.groups = {}  # (level, starter) -> GroupStats
+        self._powers = 3 ** np.arange(self.cells, dtype=np.int64)
+
+    def __iadd__(self, other):
+        if (other.rows, other.cols, other.k) != (self.rows, self.cols, self.k):
+            raise ValueError("cannot merge statistics of different board geometries")
+        for group, stats in other.groups.items():
+            mine = self._group(group)
+            mine += stats
+        return self
+
+    def __add__(self, other):
+        merged = OutcomeStats(self.rows, self.cols, self.k, self.max_moves)
+        merged += self
+        merged += other
+        return merged
+
+    def _group(self, group):
+        stats = self.groups.get(group)
+        if stats is None:
+            stats = self.groups[group] = GroupStats(self.cells, self.max_moves)
+        return stats
+
+    def update(self, records):
+        """Fold a structured array of records (one geometry) into the counts."""
+        if len(records) and (records['config'] != self.config).any():
+            raise ValueError("records of another board geometry; filter by config first")
+        groups = records['level'].astype(np.int32) << 8 | records['starter']
+        for group in np.unique(groups).tolist():
+            level, starter = group >> 8, group & 255
+            self._update_group(self._group((level, starter)), records[groups == group], starter)
+
+    def _update_group(self, stats, records, starter):
+        moves = records['moves'].astype(np.intp)
+        lengths = records['length'].astype(np.intp)
+        # Results relative to the first mover: 0 draw, 1 first mover won, 2 second mover won
+        results = records['result'].astype(np.intp)
+        relative = np.where(results == 0, 0, np.where(results == starter, 1, 2))
+        stats.games += len(records)
+
+        played = moves != NO_MOVE
+        openings = moves[:, 0][played[:, 0]]
+        np.add.at(stats.openings, (openings, relative[played[:, 0]]), 1)
+        np.add.at(stats.lengths, (lengths, relative), 1)
+
+        # Mover of ply p is the first mover when p is even
+        first_mover = (np.arange(moves.shape[1]) % 2 == 0)[None, :]
+        decisive = (relative > 0)[:, None] & played
+        by_winner = decisive & (first_mover == (relative == 1)[:, None])
+        stats.winner_cells += np.bincount(moves[by_winner], minlength=self.cells)
+        stats.loser_cells += np.bincount(moves[decisive & ~by_winner], minlength=self.cells)
+
+        # Position after every ply as a base-3 key: marks are worth 1 for player 1, 2 for player 2
+        mover = np.where(first_mover, starter, 3 - starter)
+        steps = np.where(played, mover * self._powers[np.where(played, moves, 0)], 0)
+        keys = np.cumsum(steps, axis=1)[played]
+        unique, counts = np.unique(keys, return_counts=True)
+        stats.positions.update(dict(zip(unique.tolist(), counts.tolist())))
+        stats.positions[0] += len(records)  # the empty board starts every game
+
+    def total(self):
+        """Return the GroupStats of all groups combined."""
+        combined = GroupStats(self.cells, self.max_moves)
+        for stats in self.groups.values():
+            combined += stats
+        return combined
+
+
+def _resolve_config(records, config, chunk_size=DEFAULT_CHUNK):
+    if config is not None:
+        return config
+    configs = set()
+    for begin in range(0, len(records), chunk_size):
+        configs.update(np.unique(records.configs[begin:begin + chunk_size]).tolist())
+    if len(configs) > 1:
+        raise ValueError("the file mixes board geometries; choose one with config")
+    if not len(configs):
+        raise ValueError("the file holds no games")
+    return configs.pop()
+
+
+def analyze_range(path, config, start, stop, chunk_size=DEFAULT_CHUNK):
+    """Return the OutcomeStats of records [start, stop) of ``path`` with config id ``config``."""
+    records = GameRecords(path)
+    stats = OutcomeStats(*config_geometry(config), max_moves=records.max_moves)
+    for begin in range(start, stop, chunk_size):
+        chunk = records[begin:min(begin + chunk_size, stop)]
+        stats.update(chunk[chunk['config'] == config])
+    return stats
+
+
+def analyze(path, config=None, chunk_size=DEFAULT_CHUNK, workers=1):
+    """Return OutcomeStats for every game of ``path``, split over ``workers`` processes."""
+    records = GameRecords(path)
+    config = _resolve_config(records, config, chunk_size)
+    count, max_moves = len(records), records.max_moves
+    del records
+    workers = workers or os.cpu_count()
+    if workers == 1:
+        return analyze_range(path, config, 0, count, chunk_size)
+    bounds = np.linspace(0, count, workers + 1, dtype=np.int64).tolist()
+    stats = OutcomeStats(*config_geometry(config), max_moves=max_moves)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(analyze_range, [path] * workers, [config] * workers,
+                                bounds[:-1], bounds[1:], [chunk_size] * workers):
+            stats += partial
+    return stats
+
+
+def format_report(stats, top_positions=5):
+    lines = [f'{stats.rows}x{stats.cols} boards, {stats.k} in a row']
+    for (level, starter), group in sorted(stats.groups.items()):
+        draw, first, second = group.outcome_rates()
+        level_name = 'no AI' if level == NO_AI else f'AI level {level}'
+        lines.append(f'\n{level_name}, player {starter} first: {group.games} games, '
+                     f'first mover wins {first:.1%}, second mover wins {second:.1%}, draws {draw:.1%}')
+        lines.append('  opening  games  first  second  draw')
+        for cell, (d, f, s) in group.opening_rates().items():
+            games = int(group.openings[cell].sum())
+            lines.append(f'  {str(divmod(cell, stats.cols)):>7}  {games:>5}  {f:>5.1%}  {s:>6.1%}  {d:>4.1%}')
+        contribution = group.cell_contribution().reshape(stats.rows, stats.cols)
+        lines.append('  winner minus loser occupancy per cell:')
+        lines.extend('    ' + ' '.join(f'{value:+.2f}' for value in row) for row in contribution)
+        lengths = group.lengths.sum(axis=1)
+        lines.append('  game lengths: ' + ', '.join(
+            f'{length}: {int(count)}' for length, count in enumerate(lengths) if count))
+        common = group.positions.most_common(top_positions)
+        lines.append('  most reached positions (key: count): ' + ', '.join(f'{key}: {n}' for key, n in common))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Report outcome statistics of a game record file.')
+    parser.add_argument('path')
+    parser.add_argument('--geometry', default=None, help='rows,cols,k of the games to analyze')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK)
+    parser.add_argument('--workers', type=int, default=1, help='0 for one per CPU')
+    args = parser.parse_args()
+    config = None if args.geometry is None else config_id(*map(int, args.geometry.split(',')))
+    print(format_report(analyze(args.path, config, args.chunk_size, args.workers)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Vectorized self-play: many games advanced one ply at a time with NumPy.
+
+Games are rows of an ``(N, ROWS * COLS)`` int8 array holding 0/1/2 per cell.
+After each ply the mover's cells are multiplied against the cell-by-line
+incidence matrix; a game is won where any line count reaches the win length.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from constants import ROWS, COLS, WIN_LENGTH
+from core.rules import rules_for
+from core.retrograde import NO_MOVE, PerfectPlayTable
+
+CELLS = ROWS * COLS
+K = WIN_LENGTH
+RULES = rules_for(ROWS, COLS, K)
+# LINE_MATRIX[cell, line] is 1 when the cell belongs to the winning line
+LINE_MATRIX = np.zeros((CELLS, len(RULES.lines)), dtype=np.float32)
+for _line, _cells in enumerate(RULES.lines):
+    LINE_MATRIX[list(_cells), _line] = 1
+POWERS = 3 ** np.arange(CELLS, dtype=np.int64)
+BITS = (1 << np.arange(CELLS)).astype(np.int32)
+# NTH_FREE[free_mask, r] is the r-th free cell of a board whose free cells are free_mask
+NTH_FREE = np.zeros((1 << CELLS, CELLS), dtype=np.intp) if CELLS <= 12 else None
+if NTH_FREE is not None:
+    for _mask in range(1 << CELLS):
+        _free = [cell for cell in range(CELLS) if _mask >> cell & 1]
+        NTH_FREE[_mask, :len(_free)] = _free
+DEFAULT_CHUNK = 1 << 18
+
+
+class BatchResult(NamedTuple):
+    games: int
+    player1_wins: int
+    player2_wins: int
+    draws: int
+
+    def __add__(self, other):
+        return BatchResult(*(a + b for a, b in zip(self, other)))
+
+
+def random_policy(boards, player, rng):
+    """Pick a uniformly random empty cell in every game; all boards must be at the same ply."""
+    empty = boards == 0
+    if NTH_FREE is None:
+        scores = rng.random(boards.shape, dtype=np.float32)
+        scores[~empty] = -1
+        return scores.argmax(axis=1)
+    # Games advance in lockstep, so every board has the same number of free cells
+    free = empty.view(np.int8) @ BITS
+    return NTH_FREE[free, rng.integers(0, np.count_nonzero(empty[0]), size=len(boards))]
+
+
+class TablePolicy:
+    """Play the perfect-play table's move in every game (the minimax choice)."""
+
+    def __init__(self, solution=None):
+        self.solution = PerfectPlayTable.load(k=K) if solution is None else solution
+        self._moves = self.solution.entries['move']
+
+    def __call__(self, boards, player, rng):
+        codes = (boards @ POWERS) * 2 + (player - 1)
+        moves = self._moves[codes]
+        if (moves == NO_MOVE).any():
+            raise ValueError("batch contains finished positions")
+        return moves.astype(np.intp)
+
+
+def policy_for(ai, solution=None):
+    """Return the batch policy matching an ``AI``: random at level 0, perfect play otherwise."""
+    return random_policy if ai.level == 0 else TablePolicy(solution or ai.solution)
+
+
+def winners(boards, player):
+    """Return a bool array marking the games in which ``player`` has a complete line."""
+    counts = (boards == player).astype(np.float32) @ LINE_MATRIX
+    return (counts == K).any(axis=1)
+
+
+def play_chunk(games, policies, starter=1, rng=None):
+    """Play ``games`` games to the end; ``policies[p - 1]`` moves for player p."""
+    rng = np.random.default_rng() if rng is None else rng
+    # Finished games are dropped each ply, so only unfinished games are ever touched
+    boards = np.zeros((games, CELLS), dtype=np.int8)
+    wins = [0, 0, 0]
+    player = starter
+    for _ in range(CELLS):
+        if not len(boards):
+            break
+        moves = policies[player - 1](boards, player, rng)
+        boards[np.arange(len(boards)), moves] = player
+        won = winners(boards, player)
+        wins[player] += int(np.count_nonzero(won))
+        if won.any():
+            boards = boards[~won]
+        player = 3 - player
+    return BatchResult(games, wins[1], wins[2], games - wins[1] - wins[2])
+
+
+def simulate(games, policies=(random_policy, random_policy), starter=1, seed=None, chunk_size=DEFAULT_CHUNK):
+    """Play ``games`` games in chunks of at most ``chunk_size`` and return aggregate counts."""
+    rng = np.random.default_rng(seed)
+    result = BatchResult(0, 0, 0, 0)
+    for start in range(0, games, chunk_size):
+        result += play_chunk(min(chunk_size, games - start), policies, starter, rng)
+    return result
@@ -0,0 +1,321 @@
+"""Headless benchmarks for the search engines and rule checks.
+
+Every case runs on a fixed corpus of positions (empty board, mid-game and
+near-terminal for several board sizes) and reports the median time per call,
+nodes per second, peak traced memory and the memory blocks still allocated
+once the call returns. Run ``python -m core.bench`` from the repository root
+to compare against BASELINE_PATH; it exits non-zero when a case is slower or
+uses more memory than the baseline allows. ``--update`` rewrites the baseline.
+``--scaling`` instead times core.parallel.ParallelSearch on the corpus for
+several worker counts and reports the speedup over the serial search; it
+depends on the machine's cores, so it has no baseline.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import NamedTuple
+
+from constants import ROWS, COLS
+from core.ai import AI, TranspositionTable
+from core.alphabeta import AlphaBetaSearch
+from core.board import Board
+from core.tictactoe import DEFAULT_PLAYERS, Move, TicTacToeGame
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bench_baseline.json')
+DEFAULT_THRESHOLD = 0.5  # fail when a case is more than 50% slower (or bigger) than its baseline
+# Peak memory below this many KiB is noise from the interpreter, not the code under test
+MEMORY_FLOOR_KIB = 64
+
+# Flat cell indices played alternately from an empty board, player 1 first; none is a finished game
+CORPUS = {
+    3: {'empty': (), 'midgame': (4, 0, 2), 'endgame': (4, 0, 2, 6, 3, 5)},
+    4: {'empty': (), 'midgame': (10, 14, 5, 1, 9), 'endgame': (10, 14, 5, 1, 9, 2, 3, 11, 13, 7, 8)},
+    5: {
+        'empty': (),
+        'midgame': (14, 0, 23, 18, 6, 5, 7, 10),
+        'endgame': (14, 0, 23, 18, 6, 5, 7, 10, 22, 20, 4, 2, 21, 3, 17, 11, 19, 9, 24),
+    },
+}
+
+
+class BenchResult(NamedTuple):
+    seconds: float  # median wall time of one call
+    nodes: int  # search nodes per call; calls per call (1) for rule checks
+    peak_kib: float
+    retained_blocks: int
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+
+def _cells(size, moves):
+    cells = [0] * (size * size)
+    for ply, cell in enumerate(moves):
+        cells[cell] = 1 + ply % 2
+    return cells
+
+
+def _to_move(moves):
+    return 1 + len(moves) % 2
+
+
+def _counting(obj, name):
+    """Wrap the method ``name`` of ``obj`` so recursive calls are counted; return the counter."""
+    counter = [0]
+    method = getattr(obj, name)
+
+    def counted(*args):
+        counter[0] += 1
+        return method(*args)
+    setattr(obj, name, counted)
+    return counter
+
+
+def _simulator_minimax(moves):
+    def setup():
+        ai = AI(level=1, player=2, table=TranspositionTable())
+        board = Board()
+        for ply, cell in enumerate(moves):
+            board.mark_square(*divmod(cell, COLS), 1 + ply % 2)
+        calls = _counting(ai, 'minimax')
+        return lambda: (ai.minimax(board, _to_move(moves) == 1), calls[0])[1]
+    return setup
+
+
+def _game(size, moves):
+    game = TicTacToeGame(board_size=size)
+    for cell in moves:
+        game.process_move(Move(*divmod(cell, size), game.current_player.label))
+        game.toggle_player()
+    return game
+
+
+def _tac_best_move(size, moves):
+    def setup():
+        game = _game(size, moves)
+        return lambda: (game.get_best_move(game.current_player), game._engine.nodes)[1]
+    return setup
+
+
+def _tac_minimax(size, moves):
+    def setup():
+        game = _game(size, moves)
+        calls = _counting(game, 'minimax')
+        return lambda: (game.minimax(0, True, game.current_player), calls[0])[1]
+    return setup
+
+
+def _final_state(moves):
+    def setup():
+        board = Board()
+        for ply, cell in enumerate(moves):
+            board.mark_square(*divmod(cell, COLS), 1 + ply % 2)
+        return lambda: (board.final_state(), 1)[1]
+    return setup
+
+
+def _process_move(size, moves):
+    def setup():
+        game = _game(size, moves[:-1])
+        move = Move(*divmod(moves[-1], size), game.current_player.label)
+        return lambda: (game.process_move(move), 1)[1]
+    return setup
+
+
+def cases():
+    """Return {name: (setup, calls per sample)}; ``setup()`` builds fresh state and returns the call."""
+    table = {}
+    if ROWS == COLS and ROWS in CORPUS:
+        for phase, moves in CORPUS[ROWS].items():
+            table[f'simulator.minimax/{ROWS}x{COLS}/{phase}'] = (_simulator_minimax(moves), 1)
+            table[f'board.final_state/{ROWS}x{COLS}/{phase}'] = (_final_state(moves), 1000)
+    for size, positions in CORPUS.items():
+        for phase, moves in positions.items():
+            table[f'tac.get_best_move/{size}x{size}/{phase}'] = (_tac_best_move(size, moves), 1)
+            if moves:
+                table[f'tac.process_move/{size}x{size}/{phase}'] = (_process_move(size, moves), 1000)
+    # The tac minimax has no transposition table or depth limit, so only 3x3 boards are tractable
+    for phase, moves in CORPUS[3].items():
+        table[f'tac.minimax/3x3/{phase}'] = (_tac_minimax(3, moves), 1)
+    return table
+
+
+class ScalingResult(NamedTuple):
+    workers: int
+    seconds: float  # median wall time of one search
+    speedup: float  # serial time over this time
+    same_move: bool  # the move agrees with the serial search
+
+
+def default_worker_counts():
+    """Return 1, 2, 4, ... up to the number of CPUs, and the CPU count itself."""
+    cpus = os.cpu_count() or 1
+    return sorted({1 << n for n in range(cpus.bit_length()) if 1 << n <= cpus} | {cpus})
+
+
+def _median_search(engine, cells, player, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        move = engine.best_move(list(cells), player)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), move
+
+
+def scaling(pattern=None, worker_counts=None, repeats=3, sizes=(4, 5)):
+    """Time serial and parallel best moves on the corpus; return {name: (serial seconds, [ScalingResult])}."""
+    # Imported here: multiprocessing would otherwise count towards the memory benchmarks' peaks
+    from core.parallel import ParallelSearch
+    worker_counts = worker_counts or default_worker_counts()
+    positions = {
+        f'best_move/{size}x{size}/{phase}': (size, moves)
+        for size in sizes for phase, moves in CORPUS[size].items()
+    }
+    positions = {name: position for name, position in positions.items() if pattern is None or pattern in name}
+    results = {}
+    for name, (size, moves) in positions.items():
+        cells, player = _cells(size, moves), _to_move(moves)
+        # A fresh engine per search, as ParallelSearch starts every search with empty tables
+        timings = []
+        for _ in range(repeats):
+            engine = AlphaBetaSearch(size)
+            start = time.perf_counter()
+            serial_move = engine.best_move(list(cells), player)
+            timings.append(time.perf_counter() - start)
+        results[name] = (statistics.median(timings), serial_move, [])
+    for workers in worker_counts:
+        engines = {}
+        try:
+            for name, (size, moves) in positions.items():
+                engine = engines.get(size)
+                if engine is None:
+                    engine = engines[size] = ParallelSearch(size, workers=workers).start()
+                serial_seconds, serial_move, rows = results[name]
+                seconds, move = _median_search(engine, _cells(size, moves), _to_move(moves), repeats)
+                rows.append(ScalingResult(workers, seconds, serial_seconds / seconds, move == serial_move))
+        finally:
+            for engine in engines.values():
+                engine.close()
+    return {name: (serial_seconds, rows) for name, (serial_seconds, _, rows) in results.items()}
+
+
+def format_scaling(results):
+    width = max(len(name) for name in results) + 2
+    worker_counts = [row.workers for row in next(iter(results.values()))[1]]
+    lines = [f"{'case'.ljust(width)}{'serial ms':>10}" + ''.join(
+        f"{f'{workers}w ms':>10}{'speedup':>9}" for workers in worker_counts)]
+    for name, (serial_seconds, rows) in results.items():
+        lines.append(f'{name.ljust(width)}{serial_seconds * 1e3:>10.1f}' + ''.join(
+            f'{row.seconds * 1e3:>10.1f}{row.speedup:>8.2f}{"" if row.same_move else "!":1}' for row in rows))
+    lines.append(f'{os.cpu_count()} CPUs; ! marks a move that differs from the serial search')
+    return '\n'.join(lines)
+
+
+def run_case(setup, calls=1, repeats=5):
+    """Time ``calls`` calls of fresh state ``repeats`` times, then trace memory over one more sample."""
+    timings = []
+    nodes = 0
+    for _ in range(repeats):
+        fns = [setup() for _ in range(calls)]
+        start = time.perf_counter()
+        for fn in fns:
+            nodes = fn()
+        timings.append((time.perf_counter() - start) / calls)
+
+    fn = setup()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+    return BenchResult(statistics.median(timings), nodes, peak / 1024, retained)
+
+
+def run(pattern=None, repeats=5):
+    """Run every case whose name contains ``pattern``; return {name: BenchResult}."""
+    return {
+        name: run_case(setup, calls, repeats)
+        for name, (setup, calls) in cases().items()
+        if pattern is None or pattern in name
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return a message for every case that regressed past ``threshold`` against ``baseline``."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result.seconds > base['seconds'] * (1 + threshold):
+            regressions.append(f"{name}: {result.seconds * 1e3:.3f} ms per call, "
+                               f"baseline {base['seconds'] * 1e3:.3f} ms")
+        if result.peak_kib > max(base['peak_kib'] * (1 + threshold), MEMORY_FLOOR_KIB):
+            regressions.append(f"{name}: peak {result.peak_kib:.0f} KiB, baseline {base['peak_kib']:.0f} KiB")
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    with open(path, 'w') as f:
+        json.dump({name: result._asdict() for name, result in sorted(results.items())}, f, indent=2)
+        f.write('\n')
+
+
+def format_results(results):
+    width = max(len(name) for name in results) + 2
+    lines = [f"{'case'.ljust(width)}{'ms/call':>10}{'nodes':>10}{'nodes/s':>12}{'peak KiB':>10}{'blocks':>8}"]
+    for name, result in results.items():
+        lines.append(f'{name.ljust(width)}{result.seconds * 1e3:>10.3f}{result.nodes:>10}'
+                     f'{result.nodes_per_second:>12.0f}{result.peak_kib:>10.1f}{result.retained_blocks:>8}')
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the AI engines and rule checks.')
+    parser.add_argument('pattern', nargs='?', default=None, help='only run cases whose name contains this')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--scaling', action='store_true', help='report parallel search speedup per worker count')
+    parser.add_argument('--workers', default=None, help='comma-separated worker counts for --scaling')
+    args = parser.parse_args()
+
+    if args.scaling:
+        worker_counts = None if args.workers is None else [int(n) for n in args.workers.split(',')]
+        print(format_scaling(scaling(args.pattern, worker_counts, args.repeats)))
+        return
+
+    results = run(args.pattern, args.repeats)
+    print(format_results(results))
+    if args.update:
+        baseline = load_baseline(args.baseline)
+        baseline.update({name: result._asdict() for name, result in results.items()})
+        save_baseline({name: BenchResult(**entry) for name, entry in baseline.items()}, args.baseline)
+        print(f"baseline written to {args.baseline}")
+        return
+    regressions = compare(results, load_baseline(args.baseline), args.threshold)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Headless board for the treatment decision simulator.
+
+Importing this module pulls in neither pygame nor numpy.
+"""
+from constants import ROWS, COLS, WIN_LENGTH
+from core.rules import rules_for
+
+
+# Bitboard layout: bit (row * COLS + col) is set when that square is marked
+SQUARES = [(row, col) for row in range(ROWS) for col in range(COLS)]
+CELLS = ROWS * COLS
+FULL_MASK = (1 << CELLS) - 1
+RULES = rules_for(ROWS, COLS, WIN_LENGTH)
+# Flat cells of every winning line; final_state reports an index into this
+WIN_LINES = RULES.lines
+
+# Small boards get a lookup from a bitmask to the squares it holds
+_FREE_TABLE = (
+    [tuple(SQUARES[i] for i in range(CELLS) if mask >> i & 1) for mask in range(1 << CELLS)]
+    if CELLS <= 12 else None
+)
+
+
+def _symmetries():
+    # SYMMETRIES[s][i] is the cell that cell i lands on under symmetry s (identity first)
+    transforms = [
+        lambda r, c: (r, c),
+        lambda r, c: (r, COLS - 1 - c),
+        lambda r, c: (ROWS - 1 - r, c),
+        lambda r, c: (ROWS - 1 - r, COLS - 1 - c),
+    ]
+    if ROWS == COLS:
+        transforms += [
+            lambda r, c: (c, r),
+            lambda r, c: (c, ROWS - 1 - r),
+            lambda r, c: (COLS - 1 - c, r),
+            lambda r, c: (COLS - 1 - c, ROWS - 1 - r),
+        ]
+    return [tuple(nr * COLS + nc for nr, nc in (t(r, c) for r, c in SQUARES)) for t in transforms]
+
+
+SYMMETRIES = _symmetries()
+INVERSE_SYMMETRIES = [tuple(sym.index(i) for i in range(CELLS)) for sym in SYMMETRIES]
+# _SYM_WEIGHTS[i][s] is the base-3 place value of cell i in the key for symmetry s
+_SYM_WEIGHTS = [tuple(3 ** sym[i] for sym in SYMMETRIES) for i in range(CELLS)]
+
+
+class Board:
+    def __init__(self):
+        # One bitmask per player: bits[1] for player 1, bits[2] for player 2 (bits[0] unused)
+        self.bits = [0, 0, 0]
+        self.marked_squares = 0  # To keep track of the number of marked squares
+        # Packed base-3 key of the position under each board symmetry, updated on every move
+        self.keys = [0] * len(SYMMETRIES)
+        # Per-line piece counts: the winner is known after every move without scanning the board
+        self.position = RULES.position()
+
+    def copy(self):
+        '''Independent copy of the position, e.g. for a search running on another thread'''
+        board = Board.__new__(Board)
+        board.bits = list(self.bits)
+        board.marked_squares = self.marked_squares
+        board.keys = list(self.keys)
+        board.position = self.position.copy()
+        return board
+
+    @property
+    def squares(self):
+        '''
+          Read-only ROWS x COLS snapshot of the board (0 empty, 1 or 2 for the player).
+          Use mark_square() to change the position.
+        '''
+        import numpy as np  # only needed for this view, so keep it off the import path
+
+        squares = np.zeros((ROWS, COLS))
+        for player in (1, 2):
+            for row, col in self._squares_in(self.bits[player]):
+                squares[row][col] = player
+        squares.flags.writeable = False
+        return squares
+
+    def _squares_in(self, mask):
+        if _FREE_TABLE is not None:
+            return _FREE_TABLE[mask]
+        return [SQUARES[i] for i in range(CELLS) if mask >> i & 1]
+
+    # final_state method
+    def final_state(self, show=False):
+        '''
+          @return 0 if no player has won
+          @return 1 if player 1 has won
+          @return 2 if player 2 has won
+        '''
+        player = self.position.winner
+        if player and show:
+            self.show_win(player, self.position.winning_line)
+        return player
+
+    def show_win(self, player, line):
+        '''Hook for front-ends to draw WIN_LINES[line]; the headless board draws nothing'''
+
+    def mark_square(self, row, col, player):
+        index = row * COLS + col
+        self.bits[player] |= 1 << index
+        self.marked_squares += 1  # Indicates when the board is full
+        self.position.play(index, player)
+        keys = self.keys
+        for symmetry, weight in enumerate(_SYM_WEIGHTS[index]):
+            keys[symmetry] += player * weight
+
+    def unmark_square(self, row, col, player):
+        index = row * COLS + col
+        self.bits[player] &= ~(1 << index)
+        self.marked_squares -= 1
+        self.position.undo(index)
+        keys = self.keys
+        for symmetry, weight in enumerate(_SYM_WEIGHTS[index]):
+            keys[symmetry] -= player * weight
+
+    def canonical_key(self):
+        '''
+          @return (key, symmetry) where key is the smallest packed key over all
+          board symmetries and symmetry is the index into SYMMETRIES producing it
+        '''
+        key = min(self.keys)
+        return key, self.keys.index(key)
+
+    def empty_square(self, row, col):
+        return not ((self.bits[1] | self.bits[2]) >> (row * COLS + col)) & 1
+
+    def get_empty_squares(self):
+        free = ~(self.bits[1] | self.bits[2]) & FULL_MASK
+        return list(self._squares_in(free))  # Return a list of empty squares
+
+    def is_full(self):
+        return self.marked_squares == CELLS  # check if the board is full
+
+    def is_empty(self):
+        return self.marked_squares == 0  # check if the board is empty
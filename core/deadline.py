@@ -0,0 +1,167 @@
+"""Per-move time and node budgets for the search engines.
+
+A ``DeadlineSearch`` deepens an AlphaBetaSearch one ply at a time until the
+budget runs out, scoring the frontier with the engine's line heuristic, and
+answers with the best move of the last iteration that completed. The
+deadline is checked every POLL_MASK + 1 nodes, and the search stops early
+by a reserve that grows with the overrun seen on earlier moves, so a move
+takes about its budget on any board size instead of whatever a fixed depth
+happens to cost. MCTS is anytime already; it gets the
+budget as its time and playout limits.
+
+Every move's latency is kept: ``stats()`` reports the percentiles and how
+many moves missed their deadline. ``LEVEL_BUDGETS`` maps the AI difficulty
+levels to budgets.
+"""
+import time
+from collections import deque
+from typing import NamedTuple, Optional
+
+from core.alphabeta import WIN_THRESHOLD, AlphaBetaSearch
+from core.rules import rules_for
+from core.telemetry import percentile
+from core.worker import SearchCancelled
+
+
+class Budget(NamedTuple):
+    seconds: Optional[float] = None  # wall-clock time per move
+    nodes: Optional[int] = None  # search nodes (MCTS playouts) per move
+
+
+# AI level -> budget; node limits make the weaker levels play the same move on any machine
+LEVEL_BUDGETS = {
+    3: Budget(seconds=0.05, nodes=2_000),
+    4: Budget(seconds=0.2, nodes=50_000),
+    5: Budget(seconds=1.0),
+}
+POLL_MASK = 15  # poll the clock every 16 nodes: a node can cost ~100 us on a 15x15 board
+MARGIN = 0.05  # least fraction of the time budget kept back for unwinding the search and answering
+LATENCY_WINDOW = 10_000  # latencies kept for the percentiles
+
+
+class DeadlineSearch:
+    """Best move within ``budget`` using ``engine`` ('alphabeta' or 'mcts').
+
+    Has AlphaBetaSearch's ``best_move(cells, player, should_stop)`` interface
+    and counters, so a TicTacToeGame can use it as its engine. After each
+    move ``interrupted`` tells whether the budget cut the search short and
+    ``deadline_missed`` whether the move took longer than the budget.
+    """
+
+    def __init__(self, rows, cols=None, k=None, budget=LEVEL_BUDGETS[4], engine='alphabeta', seed=None):
+        if budget.seconds is None and budget.nodes is None:
+            raise ValueError("a budget needs a time or a node limit")
+        rules = rules_for(rows, cols, k)
+        self.rows, self.cols, self.k = rules.rows, rules.cols, rules.k
+        self.budget = budget  # read at every move, so it can be changed between moves
+        self.engine_name = engine
+        if engine == 'alphabeta':
+            # No depth cap: the budget decides how deep each move goes
+            self.engine = AlphaBetaSearch(rules.rows, rules.cols, rules.k, max_depth=rules.cells)
+            self.engine.poll_mask = POLL_MASK
+        elif engine == 'mcts':
+            from core.mcts import MCTS
+            self.engine = MCTS(rules.rows, rules.cols, rules.k, seed=seed)
+        else:
+            raise ValueError(f"unknown engine {engine!r}")
+        self.score = 0
+        self.nodes = self.depth = self.cutoffs = self.hits = self.misses = 0
+        self.seconds = 0.0
+        self.interrupted = False
+        self.deadline_missed = False
+        self.moves = 0
+        self.missed = 0  # moves that took longer than their time budget
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.reserve = 0.0  # seconds stopped before the deadline, learned from past overruns
+
+    def best_move(self, cells, player, should_stop=None):
+        """Return a flat cell index for ``player``; SearchCancelled when ``should_stop()`` becomes true."""
+        start = time.perf_counter()
+        if self.engine_name == 'mcts':
+            move = self._mcts_move(cells, player, should_stop)
+        else:
+            move = self._alphabeta_move(cells, player, start, should_stop)
+        self.seconds = time.perf_counter() - start
+        self.deadline_missed = self.budget.seconds is not None and self.seconds > self.budget.seconds
+        self.moves += 1
+        self.missed += self.deadline_missed
+        self.latencies.append(self.seconds)
+        return move
+
+    def _alphabeta_move(self, cells, player, start, should_stop):
+        engine = self.engine
+        seconds, nodes = self.budget
+        deadline = None
+        if seconds is not None:
+            self.reserve = min(max(self.reserve, seconds * MARGIN), seconds / 2)
+            deadline = start + seconds - self.reserve
+        cancelled = False
+
+        def out_of_budget():
+            nonlocal cancelled
+            if should_stop is not None and should_stop():
+                cancelled = True
+                return True
+            return (deadline is not None and time.perf_counter() >= deadline) or (
+                nodes is not None and engine.nodes >= nodes)
+
+        try:
+            move = engine.best_move(cells, player, out_of_budget)
+            self.interrupted = False
+        except SearchCancelled:
+            if cancelled:
+                raise
+            self.interrupted = True
+            if deadline is not None:
+                # Time from the poll that stopped the search until now: keep that much back next time
+                overrun = time.perf_counter() - deadline
+                self.reserve = max(self.reserve * 0.9, 1.5 * overrun)
+            move = engine.move
+            if move is None:
+                # Not even one ply finished: take the most central empty cell
+                move = next(cell for cell in engine.center_order if not cells[cell])
+        self.score = engine.score if engine.depth else 0
+        self.nodes, self.depth = engine.nodes, engine.depth
+        self.cutoffs, self.hits, self.misses = engine.cutoffs, engine.hits, engine.misses
+        return move
+
+    def _mcts_move(self, cells, player, should_stop):
+        engine = self.engine
+        engine.time_limit, engine.playouts = self.budget
+        if engine.time_limit is not None:
+            engine.time_limit *= 1 - MARGIN
+        bits = [0, 0, 0]
+        for index, value in enumerate(cells):
+            if value:
+                bits[value] |= 1 << index
+        move = engine.best_move_bits(bits, player, should_stop)
+        if should_stop is not None and should_stop():
+            raise SearchCancelled
+        self.interrupted = False
+        self.nodes = engine.last_playouts
+        self.depth = 0
+        if move is None:
+            self.score = 0
+        else:
+            value = next(value for cell, _, value in engine.root_stats() if cell == move)
+            self.score = 2 * value - 1
+        return move
+
+    def evaluation(self):
+        """Return the last move's score for the player who made it, in [-1, 1]."""
+        if self.engine_name == 'mcts':
+            return self.score
+        if abs(self.score) > WIN_THRESHOLD:
+            return 1 if self.score > 0 else -1
+        return self.score / WIN_THRESHOLD
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            'moves': self.moves,
+            'missed': self.missed,
+            'latency_ms': {
+                name: percentile(latencies, fraction) * 1000
+                for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))
+            },
+        }
@@ -0,0 +1,138 @@
+"""Score many positions per call.
+
+``evaluate_batch`` accepts positions as an ``(N, rows, cols)`` or
+``(N, rows * cols)`` array of 0/1/2, or as ``(N,)`` packed base-3 keys (the
+key ``Board.keys[0]`` maintains). It returns a BatchEvaluation of arrays:
+
+  moves:  flat index of the best move, -1 for finished positions
+  values: for the side to move, 1 for a forced win, -1 for a forced loss,
+          0 for a draw; depth-limited searches give heuristic estimates
+          strictly in between
+
+With a perfect-play table every position is a single vectorized lookup.
+Otherwise finished positions are scored in bulk with a line-count matrix
+product, duplicates are collapsed, and each distinct position is searched
+once with a single engine whose transposition table the whole batch shares.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from core.alphabeta import WIN_THRESHOLD, AlphaBetaSearch
+from core.retrograde import NO_MOVE
+from core.rules import rules_for
+
+
+class BatchEvaluation(NamedTuple):
+    moves: np.ndarray
+    values: np.ndarray
+
+
+def as_cells(positions, cells):
+    """Return positions as an (N, cells) int8 array of 0/1/2."""
+    positions = np.asarray(positions)
+    if positions.ndim == 1:
+        # Packed keys: peel off one base-3 digit per cell
+        keys = positions.astype(np.int64)
+        digits = np.empty((len(keys), cells), dtype=np.int8)
+        for cell in range(cells):
+            keys, digits[:, cell] = np.divmod(keys, 3)
+        return digits
+    flat = positions.reshape(len(positions), -1)
+    if flat.shape[1] != cells:
+        raise ValueError(f"positions have {flat.shape[1]} cells, expected {cells}")
+    return flat.astype(np.int8, copy=False)
+
+
+def pack(cells_array):
+    """Return the base-3 key of every row of an (N, cells) array (at most 39 cells)."""
+    cells = cells_array.shape[1]
+    if cells > 39:
+        raise ValueError("boards above 39 cells do not fit a 64-bit key")
+    return cells_array.astype(np.int64) @ (3 ** np.arange(cells, dtype=np.int64))
+
+
+def side_to_move(cells_array):
+    """Return the player to move in every position, player 1 having moved first."""
+    marks_1 = np.count_nonzero(cells_array == 1, axis=1)
+    marks_2 = np.count_nonzero(cells_array == 2, axis=1)
+    return np.where(marks_1 > marks_2, 2, 1).astype(np.int8)
+
+
+def _players(players, cells_array):
+    if players is None:
+        return side_to_move(cells_array)
+    return np.broadcast_to(np.asarray(players, dtype=np.int8), (len(cells_array),))
+
+
+def table_evaluate(solution, positions, players=None):
+    """Look every position up in a core.retrograde.PerfectPlayTable at once."""
+    cells_array = as_cells(positions, solution.cells)
+    players = _players(players, cells_array)
+    entries = solution.entries[pack(cells_array) * 2 + (players - 1)]
+    moves = entries['move'].astype(np.intp)
+    moves[moves == NO_MOVE] = -1
+    return BatchEvaluation(moves, np.sign(entries['value']).astype(np.float64))
+
+
+def finished(cells_array, rules):
+    """Return (won, full): who has a complete line (0 for nobody) and which boards are full."""
+    lines = np.zeros((rules.cells, len(rules.lines)), dtype=np.int16)
+    for index, line in enumerate(rules.lines):
+        lines[list(line), index] = 1
+    won = np.zeros(len(cells_array), dtype=np.int8)
+    for player in (1, 2):
+        counts = (cells_array == player).astype(np.int16) @ lines
+        won[(won == 0) & (counts == rules.k).any(axis=1)] = player
+    return won, np.count_nonzero(cells_array, axis=1) == rules.cells
+
+
+def alphabeta_search(engine):
+    """Adapt an AlphaBetaSearch to ``search(cells, player) -> (move, value)``."""
+    def search(cells, player):
+        move = engine.best_move(cells, player)
+        score = engine.score
+        if abs(score) > WIN_THRESHOLD:
+            return move, float(np.sign(score))
+        return move, score / WIN_THRESHOLD
+    return search
+
+
+def evaluate_batch(positions, rows, cols=None, k=None, players=None, solution=None, search=None):
+    """Return the BatchEvaluation of ``positions`` on a rows x cols board with win length k.
+
+    ``players`` (scalar or per position) defaults to the side to move.
+    ``solution`` is an optional PerfectPlayTable for this geometry; ``search``
+    is an optional ``search(cells, player) -> (move, value)`` used for the
+    positions that are still open (a shared AlphaBetaSearch by default).
+    """
+    rules = rules_for(rows, cols, k)
+    if solution is not None:
+        return table_evaluate(solution, positions, players)
+    cells_array = as_cells(positions, rules.cells)
+    players = _players(players, cells_array)
+    moves = np.full(len(cells_array), -1, dtype=np.intp)
+    values = np.zeros(len(cells_array), dtype=np.float64)
+
+    won, full = finished(cells_array, rules)
+    values[won == players] = 1
+    values[(won != 0) & (won != players)] = -1
+    open_positions = np.flatnonzero((won == 0) & ~full)
+    if not len(open_positions):
+        return BatchEvaluation(moves, values)
+
+    if search is None:
+        search = alphabeta_search(AlphaBetaSearch(rules.rows, rules.cols, rules.k))
+    # Identical (position, player) pairs are searched once and scattered back
+    keyed = np.concatenate([cells_array[open_positions], players[open_positions, None]], axis=1)
+    distinct, inverse = np.unique(keyed, axis=0, return_inverse=True)
+    found_moves = np.empty(len(distinct), dtype=np.intp)
+    found_values = np.empty(len(distinct), dtype=np.float64)
+    for index, row in enumerate(distinct):
+        move, value = search(row[:-1].tolist(), int(row[-1]))
+        found_moves[index] = -1 if move is None else move
+        found_values[index] = value
+    inverse = inverse.reshape(-1)
+    moves[open_positions] = found_moves[inverse]
+    values[open_positions] = found_values[inverse]
+    return BatchEvaluation(moves, values)
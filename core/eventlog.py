@@ -0,0 +1,167 @@
+"""Append-only binary log of treatment decisions, with streaming replay.
+
+A log is a small header (magic, format version, board rows and cols)
+followed by fixed-size little-endian records: game id, ply, player, cell,
+the AI's evaluation (NaN for human moves) and a Unix timestamp. Writers
+buffer records and append them in batches. Readers stream the file in
+blocks, so replaying millions of games needs memory for one game at a time.
+The moves of one game must be written contiguously, which is how
+EventLogWriter is used: one game after the other.
+"""
+import math
+import os
+import struct
+import time
+from typing import NamedTuple
+
+from constants import ROWS, COLS
+from core.board import Board
+
+MAGIC = b'TDEV'
+VERSION = 1
+HEADER = struct.Struct('<4sBBB')
+RECORD = struct.Struct('<QHBBfd')
+ENV_VAR = 'GAME_EVENT_LOG'
+READ_RECORDS = 1 << 14  # records read per block while streaming
+
+
+class Event(NamedTuple):
+    game_id: int
+    ply: int
+    player: int
+    cell: int
+    evaluation: float  # NaN when the move was not chosen by a search
+    timestamp: float
+
+    @property
+    def square(self):
+        return divmod(self.cell, COLS)
+
+
+def _read_header(f, path):
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not an event log")
+    magic, version, rows, cols = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} event log")
+    if (rows, cols) != (ROWS, COLS):
+        raise ValueError(f"{path} was written for a {rows}x{cols} board, not {ROWS}x{COLS}")
+
+
+class EventLogWriter:
+    """Append events to the log at ``path``, ``buffer_size`` records per write."""
+
+    def __init__(self, path, buffer_size=4096):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer = bytearray()
+        self._pending = 0
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'r+b' if exists else 'wb')
+        if exists:
+            _read_header(self._file, path)
+            size = self._file.seek(0, os.SEEK_END)
+            # A crash can leave a partial record behind; drop it so the log stays aligned
+            extra = (size - HEADER.size) % RECORD.size
+            if extra:
+                self._file.truncate(size - extra)
+                size -= extra
+            if size > HEADER.size:
+                self._file.seek(size - RECORD.size)
+                self.last_game_id = RECORD.unpack(self._file.read(RECORD.size))[0]
+            else:
+                self.last_game_id = 0
+            self._file.seek(size)
+        else:
+            self._file.write(HEADER.pack(MAGIC, VERSION, ROWS, COLS))
+            self.last_game_id = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def new_game(self):
+        """Return a fresh game id, larger than every id already in the log."""
+        self.last_game_id += 1
+        return self.last_game_id
+
+    def append(self, game_id, ply, player, cell, evaluation=None, timestamp=None):
+        self._buffer += RECORD.pack(
+            game_id, ply, player, cell,
+            math.nan if evaluation is None else evaluation,
+            time.time() if timestamp is None else timestamp,
+        )
+        self._pending += 1
+        if self._pending >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write(self._buffer)
+            self._buffer.clear()
+            self._pending = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def read_events(path):
+    """Yield every Event in the log at ``path``, in the order written."""
+    with open(path, 'rb') as f:
+        _read_header(f, path)
+        while True:
+            block = f.read(RECORD.size * READ_RECORDS)
+            if not block:
+                return
+            # Ignore a trailing partial record left by an interrupted writer
+            block = block[:len(block) - len(block) % RECORD.size]
+            for fields in RECORD.iter_unpack(block):
+                yield Event(*fields)
+
+
+def iter_games(path):
+    """Yield (game_id, [Event, ...]) for every game in the log."""
+    game_id = None
+    events = []
+    for event in read_events(path):
+        if event.game_id != game_id and events:
+            yield game_id, events
+            events = []
+        game_id = event.game_id
+        events.append(event)
+    if events:
+        yield game_id, events
+
+
+def replay(events, board=None):
+    """Play ``events`` onto ``board`` (a new Board by default) and return it."""
+    board = Board() if board is None else board
+    for event in events:
+        board.mark_square(*event.square, event.player)
+    return board
+
+
+def replay_game(path, game_id):
+    """Return the Board at the end of game ``game_id``; KeyError if the log has no such game."""
+    for current, events in iter_games(path):
+        if current == game_id:
+            return replay(events)
+    raise KeyError(game_id)
+
+
+def replay_all(path):
+    """Yield (game_id, final Board) for every game, one game in memory at a time."""
+    for game_id, events in iter_games(path):
+        yield game_id, replay(events)
+
+
+def from_env():
+    """Return a writer for the log named by the ENV_VAR environment variable, or None when unset."""
+    path = os.environ.get(ENV_VAR)
+    return EventLogWriter(path) if path else None
@@ -0,0 +1,176 @@
+"""Fixed-width records of finished games, read back through a memory map.
+
+A record file is an 8-byte header (magic, format version, moves per record)
+followed by ``record_dtype(max_moves)`` records: the flat cell of every move in order
+(NO_MOVE past the end of the game), the number of moves, the result (0 draw,
+else the winning player), a config id packing the board geometry, the AI
+level of the game (NO_AI when nobody played against an engine) and the
+player who moved first. A 3x3 game takes 15 bytes. ``GameRecords`` maps a file as a
+NumPy structured array without copying it, so analysis code can slice
+hundreds of millions of games straight from the page cache.
+"""
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'TDGR'
+VERSION = 2
+HEADER = struct.Struct('<4sBxH')
+NO_MOVE = 255
+NO_AI = 255
+ENV_VAR = 'GAME_RECORDS'
+
+
+def config_id(rows, cols, k):
+    """Pack a board geometry (each dimension below 32) into a 15-bit config id."""
+    if not (0 < rows < 32 and 0 < cols < 32 and 0 < k < 32):
+        raise ValueError(f"cannot pack a {rows}x{cols} board with win length {k}")
+    return rows << 10 | cols << 5 | k
+
+
+def config_geometry(config):
+    """Return (rows, cols, k) for a config id."""
+    return config >> 10 & 31, config >> 5 & 31, config & 31
+
+
+def record_dtype(max_moves):
+    return np.dtype([
+        ('moves', 'u1', (max_moves,)), ('length', 'u1'), ('result', 'u1'), ('config', '<u2'),
+        ('level', 'u1'), ('starter', 'u1'),
+    ])
+
+
+def _read_header(f, path):
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a game record file")
+    magic, version, max_moves = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} game record file")
+    return max_moves
+
+
+class GameRecordWriter:
+    """Append finished games to ``path``, ``buffer_size`` records per write.
+
+    An existing file is appended to; ``max_moves`` must then match the one it
+    was created with.
+    """
+
+    def __init__(self, path, max_moves=9, buffer_size=1 << 16):
+        if not 0 < max_moves < NO_MOVE:
+            raise ValueError(f"records cannot hold {max_moves} moves")
+        self.path = path
+        self.max_moves = max_moves
+        self.dtype = record_dtype(max_moves)
+        self._buffer = np.zeros(buffer_size, dtype=self.dtype)
+        self._pending = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                existing = _read_header(f, path)
+            if existing != max_moves:
+                raise ValueError(f"{path} holds records of {existing} moves, not {max_moves}")
+            size = os.path.getsize(path)
+            self._file = open(path, 'r+b')
+            # Drop a partial record left by an interrupted writer
+            self._file.truncate(size - (size - HEADER.size) % self.dtype.itemsize)
+            self._file.seek(0, os.SEEK_END)
+        else:
+            self._file = open(path, 'wb')
+            self._file.write(HEADER.pack(MAGIC, VERSION, max_moves))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, moves, result, config, level=NO_AI, starter=1):
+        """Record one game: ``moves`` is the sequence of flat cells, ``starter`` moving first."""
+        if len(moves) > self.max_moves:
+            raise ValueError(f"game of {len(moves)} moves does not fit records of {self.max_moves}")
+        record = self._buffer[self._pending]
+        record['moves'][:] = NO_MOVE
+        record['moves'][:len(moves)] = moves
+        record['length'] = len(moves)
+        record['result'] = result
+        record['config'] = config
+        record['level'] = level
+        record['starter'] = starter
+        self._pending += 1
+        if self._pending == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._buffer[:self._pending].tofile(self._file)
+            self._pending = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+class GameRecords:
+    """Read-only structured array view of a record file.
+
+    ``records`` is a memory map: fields and slices are views read from disk on
+    demand, only fancy indexing (``records[mask]``) copies.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.max_moves = _read_header(f, path)
+        self.dtype = record_dtype(self.max_moves)
+        count = (os.path.getsize(path) - HEADER.size) // self.dtype.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=self.dtype, mode='r', offset=HEADER.size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    @property
+    def moves(self):
+        return self.records['moves']
+
+    @property
+    def results(self):
+        return self.records['result']
+
+    @property
+    def configs(self):
+        return self.records['config']
+
+    @property
+    def levels(self):
+        return self.records['level']
+
+    @property
+    def starters(self):
+        return self.records['starter']
+
+    def game(self, index):
+        """Return (moves, result, (rows, cols, k)) of one game."""
+        record = self.records[index]
+        return record['moves'][:record['length']].tolist(), int(record['result']), config_geometry(
+            int(record['config']))
+
+    def outcome_counts(self, config=None):
+        """Return [draws, player 1 wins, player 2 wins], optionally for one config id."""
+        results = self.results if config is None else self.results[self.configs == config]
+        return np.bincount(results, minlength=3)[:3].tolist()
+
+
+def from_env(max_moves):
+    """Return a writer for the file named by the ENV_VAR environment variable, or None when unset."""
+    path = os.environ.get(ENV_VAR)
+    return GameRecordWriter(path, max_moves) if path else None
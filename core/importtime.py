@@ -0,0 +1,53 @@
+"""Measure how long the headless core takes to import in a fresh interpreter.
+
+Run ``python -m core.importtime`` from the repository root; it exits non-zero
+when the median import time exceeds IMPORT_BUDGET_MS or when pygame or numpy
+were pulled in.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = 30.0
+# What the board and the minimax AI need; heavier engines are imported on demand
+CORE_IMPORT = 'import core; core.Board; core.AI; core.TicTacToeGame'
+
+_PROBE = '''
+import sys, time
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(elapsed * 1000, 'pygame' in sys.modules, 'numpy' in sys.modules)
+'''
+
+
+def measure(statement=CORE_IMPORT, runs=5):
+    """Return (median milliseconds, heavy modules loaded) over ``runs`` fresh interpreters."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    timings = []
+    heavy = set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(statement=statement)],
+            cwd=root, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        timings.append(float(output[0]))
+        if output[1] == 'True':
+            heavy.add('pygame')
+        if output[2] == 'True':
+            heavy.add('numpy')
+    return statistics.median(timings), heavy
+
+
+def main():
+    elapsed, heavy = measure()
+    print(f"core import: {elapsed:.1f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    if heavy:
+        print(f"core import loaded {', '.join(sorted(heavy))}")
+    if elapsed > IMPORT_BUDGET_MS or heavy:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Self-play learner writing a value and move table in core.retrograde's format.
+
+Entries are indexed like the perfect-play table, by ``base3_key * 2 +
+(player_to_move - 1)``. They hold the same ``value`` and ``move`` fields
+with the same scoring. A ``SelfPlayLearner`` plays a batch of games at
+once with NumPy operations over the packed keys of the whole batch. Before
+each move it backs up every position from the current values of its
+children: a child's value is negated and pulled one step towards zero, as in
+the retrograde solver. Then it plays the best move, or a random one with
+probability ``epsilon``. This is value iteration over the positions
+self-play reaches. Its targets ignore the exploring moves, as in
+Q-learning. Because the game is deterministic, a learning rate of 1 is
+exact, and the values stay small integers. The targets are greedy whatever
+is played, so the default is to explore on every move: uniformly random
+games cover the positions fastest.
+
+A finished table is saved as a ``.npy`` that core.retrograde.PerfectPlayTable
+opens, so looking a move up takes constant time. The ``moves`` of
+``agreement`` is the fraction of positions whose table move keeps the exact
+outcome of a perfect-play table.
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from constants import ROWS, COLS
+from core.retrograde import ENTRY_DTYPE, NO_MOVE, TABLE_DIR, PerfectPlayTable
+from core.rules import rules_for
+
+BATCH = 4096  # games played side by side
+EPSILON = 1.0  # probability of a random move instead of the best one
+MAX_GAMES = 2_000_000
+CHUNK = 1 << 20  # positions compared per step of agreement()
+
+
+def table_path(rows=ROWS, cols=COLS, k=None, directory=TABLE_DIR):
+    """Return the file holding the learned table for a rows x cols board with win length k."""
+    k = min(rows, cols) if k is None else k
+    return os.path.join(directory, f'learned_{rows}x{cols}k{k}.npy')
+
+
+class Agreement(NamedTuple):
+    positions: int  # non-terminal positions reachable from the empty board, either player starting
+    coverage: float  # fraction of them the table has a move for
+    moves: float  # fraction whose move keeps the exact outcome
+    values: float  # fraction whose value has the sign of the exact value
+
+
+class SelfPlayLearner:
+    """Learns ``entries``, a table in core.retrograde's format, from ``batch`` games at a time.
+
+    Positions self-play has not reached yet keep ``move`` NO_MOVE and
+    value 0. Finished positions get their exact value once a game ends in
+    them.
+    """
+
+    def __init__(self, rows=ROWS, cols=COLS, k=None, batch=BATCH, epsilon=EPSILON, seed=None):
+        self.rules = rules_for(rows, cols, k)
+        cells = self.rules.cells
+        if cells > 16:
+            raise ValueError(f"a {rows}x{cols} board has too many positions to tabulate")
+        self.epsilon = epsilon
+        self.entries = np.zeros(2 * 3 ** cells, dtype=ENTRY_DTYPE)
+        self.entries['move'] = NO_MOVE
+        self.loss = -(cells + 1)
+        self._powers = 3 ** np.arange(cells, dtype=np.int64)
+        self._lines = np.zeros((cells, len(self.rules.lines)), dtype=np.int8)
+        for index, line in enumerate(self.rules.lines):
+            self._lines[list(line), index] = 1
+        self._rng = np.random.default_rng(seed)
+        self._rows = np.arange(batch)
+        self._cells = np.zeros((batch, cells), dtype=np.int8)
+        self._keys = np.zeros(batch, dtype=np.int64)
+        self._player = self._rng.integers(1, 3, size=batch, dtype=np.int8)
+        self.games = 0  # games finished
+        self.updates = 0  # positions backed up
+        self.changes = 0  # backups that changed an entry
+
+    def step(self):
+        """Back up the position of every game in the batch, then play one move in each."""
+        cells, keys, player, rows = self._cells, self._keys, self._player, self._rows
+        entries = self.entries
+        empty = cells == 0
+        opponent = (2 - player)[:, None]
+        children = np.where(empty, (keys[:, None] + player[:, None] * self._powers) * 2 + opponent, 0)
+        child_values = entries['value'][children].astype(np.int16)
+        # A child is scored for the opponent, and a win one ply further away is worth one less
+        scores = np.sign(child_values) - child_values
+        scores[~empty] = -128
+        best = scores.argmax(axis=1)
+        codes = keys * 2 + (player - 1)
+        values = scores[rows, best]
+        old = entries[codes]
+        self.changes += np.count_nonzero((old['value'] != values) | (old['move'] != best))
+        self.updates += len(codes)
+        entries['value'][codes] = values
+        entries['move'][codes] = best
+
+        explore = self._rng.random(len(keys)) < self.epsilon
+        noise = self._rng.random(cells.shape)
+        noise[~empty] = -1
+        moves = np.where(explore, noise.argmax(axis=1), best)
+        cells[rows, moves] = player
+        keys += player * self._powers[moves]
+        won = ((cells == player[:, None]).astype(np.int8) @ self._lines == self.rules.k).any(axis=1)
+        player[:] = 3 - player
+        full = cells.all(axis=1)
+        codes = keys * 2 + (player - 1)
+        entries['value'][codes[won]] = self.loss
+        entries['value'][codes[full & ~won]] = 0
+
+        done = won | full
+        if done.any():
+            cells[done] = 0
+            keys[done] = 0
+            player[done] = self._rng.integers(1, 3, size=np.count_nonzero(done), dtype=np.int8)
+            self.games += np.count_nonzero(done)
+
+    def train(self, max_games=MAX_GAMES):
+        """Play until a round of moves changes no entry or ``max_games`` games are finished.
+
+        A round is as many moves as the board has cells, so every game of
+        the batch finishes in it at least once. Return the games played.
+        """
+        start = self.games
+        while self.games - start < max_games:
+            changes = self.changes
+            for _ in range(self.rules.cells):
+                self.step()
+            if self.changes == changes:
+                break
+        return self.games - start
+
+    def save(self, path=None):
+        """Write the table where PerfectPlayTable can open it; return the path."""
+        rules = self.rules
+        path = table_path(rules.rows, rules.cols, rules.k) if path is None else path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Write a temporary file and rename it into place, as build_table does
+        fd, partial = tempfile.mkstemp(suffix='.npy', dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, self.entries)
+        os.replace(partial, path)
+        return path
+
+
+def agreement(entries, solution):
+    """Compare a learned table with a PerfectPlayTable of the same geometry; return an Agreement."""
+    exact = solution.entries
+    if entries.shape != exact.shape:
+        raise ValueError("the tables are for different boards")
+    powers = 3 ** np.arange(solution.cells, dtype=np.int64)
+    positions = np.flatnonzero(exact['move'] != NO_MOVE)
+    covered = optimal = signs = 0
+    for start in range(0, len(positions), CHUNK):
+        codes = positions[start:start + CHUNK]
+        learned = entries[codes]
+        expected = np.sign(exact['value'][codes])
+        signs += np.count_nonzero(np.sign(learned['value']) == expected)
+        known = learned['move'] != NO_MOVE
+        codes, expected, moves = codes[known], expected[known], learned['move'][known].astype(np.int64)
+        covered += len(codes)
+        keys, player = codes // 2, codes % 2 + 1
+        children = (keys + player * powers[moves]) * 2 + (2 - player)
+        optimal += np.count_nonzero(-np.sign(exact['value'][children]) == expected)
+    total = len(positions)
+    return Agreement(total, covered / total, optimal / total, signs / total)
+
+
+def load(rows=ROWS, cols=COLS, k=None, directory=TABLE_DIR, train=True):
+    """Open the learned table for this geometry as a PerfectPlayTable, learning it first if it is missing."""
+    path = table_path(rows, cols, k, directory)
+    if not os.path.exists(path):
+        if not train:
+            raise FileNotFoundError(path)
+        learner = SelfPlayLearner(rows, cols, k)
+        learner.train()
+        learner.save(path)
+    return PerfectPlayTable(path, rows, cols, k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Learn a move table for a board from self-play.')
+    parser.add_argument('--rows', type=int, default=ROWS)
+    parser.add_argument('--cols', type=int, default=COLS)
+    parser.add_argument('-k', type=int, default=None, help='win length (default: the shorter side)')
+    parser.add_argument('--games', type=int, default=MAX_GAMES, help='most games to play')
+    parser.add_argument('--batch', type=int, default=BATCH)
+    parser.add_argument('--epsilon', type=float, default=EPSILON)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--check', action='store_true',
+                        help='compare with the perfect-play table, building it if it is missing')
+    args = parser.parse_args()
+    learner = SelfPlayLearner(args.rows, args.cols, args.k, args.batch, args.epsilon, args.seed)
+    start = time.perf_counter()
+    games = learner.train(args.games)
+    seconds = time.perf_counter() - start
+    print(f"{games} games, {learner.updates} backups in {seconds:.1f}s -> {learner.save(args.output)}")
+    if args.check:
+        rules = learner.rules
+        result = agreement(learner.entries, PerfectPlayTable.load(rules.rows, rules.cols, rules.k))
+        print(f"{result.positions} positions: coverage {result.coverage:.2%}, "
+              f"optimal moves {result.moves:.2%}, outcomes {result.values:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Anytime Monte Carlo Tree Search (UCT) for k-in-a-row boards.
+
+The search runs until a wall-clock or playout budget is spent, so the time per
+move is bounded on any board size while more budget buys a stronger move.
+The tree is kept between moves: when the next position is a descendant of the
+previous root, that subtree becomes the new root with its statistics intact.
+"""
+import math
+import time
+from random import Random
+
+from core.rules import rules_for
+
+DEFAULT_PLAYOUTS = 5000
+
+
+class Node:
+    __slots__ = ('move', 'parent', 'children', 'untried', 'visits', 'wins', 'mover', 'winner')
+
+    def __init__(self, move, parent, mover, untried, winner=None):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0  # from the point of view of `mover`, draws count one half
+        self.mover = mover  # player who made `move`
+        self.winner = winner  # None while the game goes on, 0 for a draw, else the winner
+
+
+class MCTS:
+    """UCT search with random playouts over per-player bitmasks.
+
+    Stop after ``time_limit`` seconds or ``playouts`` playouts, whichever comes
+    first; with neither given, DEFAULT_PLAYOUTS playouts are run.
+    """
+
+    def __init__(self, rows, cols=None, k=None, time_limit=None, playouts=None, exploration=1.4, seed=None):
+        rules = rules_for(rows, cols, k)
+        self.rows, self.cols, self.k = rules.rows, rules.cols, rules.k
+        self.cells = rules.cells
+        self.time_limit = time_limit
+        self.playouts = DEFAULT_PLAYOUTS if time_limit is None and playouts is None else playouts
+        self.exploration = exploration
+        self.rng = Random(seed)
+        self.cell_lines = rules.cell_masks
+        self.root = None
+        self.root_bits = None
+        self.last_playouts = 0
+
+    def best_move(self, cells, player):
+        """Return the most visited flat cell index for ``player`` given a flat list of 0/1/2 cells."""
+        bits = [0, 0, 0]
+        for index, value in enumerate(cells):
+            if value:
+                bits[value] |= 1 << index
+        return self.best_move_bits(bits, player)
+
+    def best_move_bits(self, bits, player, should_stop=None):
+        """Like best_move for a position given as [unused, player 1 mask, player 2 mask]."""
+        if (bits[1] | bits[2]).bit_count() == self.cells:
+            return None
+        self._set_root(bits, player)
+        deadline = None if self.time_limit is None else time.perf_counter() + self.time_limit
+        playouts = 0
+        while True:
+            if self.playouts is not None and playouts >= self.playouts:
+                break
+            # Checking the clock every playout costs more than the playouts on small boards
+            if playouts % 16 == 0:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if should_stop is not None and should_stop():
+                    break
+            self._playout()
+            playouts += 1
+        self.last_playouts = playouts
+        if not self.root.children:
+            return self.root.untried[0]
+        return max(self.root.children, key=lambda child: child.visits).move
+
+    def root_stats(self):
+        """Return (move, visits, mean value for the side to move) for every expanded root move."""
+        return sorted(
+            ((child.move, child.visits, child.wins / child.visits if child.visits else 0.0)
+             for child in self.root.children),
+            key=lambda stat: -stat[1],
+        )
+
+    def _wins(self, mask, cell):
+        for line in self.cell_lines[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def _untried(self, occupied):
+        moves = [cell for cell in range(self.cells) if not occupied >> cell & 1]
+        self.rng.shuffle(moves)
+        return moves
+
+    def _set_root(self, bits, player):
+        # Reuse the old tree when the new position is reachable from its root
+        node = self.root
+        if node is not None:
+            old = self.root_bits
+            if old[1] & ~bits[1] or old[2] & ~bits[2]:
+                node = None
+            added = (bits[1] | bits[2]) & ~(old[1] | old[2])
+            while node is not None and added:
+                mover = 3 - node.mover
+                node = next(
+                    (child for child in node.children if bits[mover] >> child.move & 1 and added >> child.move & 1),
+                    None,
+                )
+                if node is not None:
+                    added &= ~(1 << node.move)
+            if node is not None and (node.mover == player or node.winner is not None):
+                node = None
+        if node is None:
+            node = Node(None, None, 3 - player, self._untried(bits[1] | bits[2]))
+        node.parent = None
+        self.root = node
+        self.root_bits = list(bits)
+
+    def _playout(self):
+        node = self.root
+        bits = list(self.root_bits)
+
+        # Selection
+        while not node.untried and node.children and node.winner is None:
+            log_visits = math.log(node.visits)
+            explore = self.exploration
+            node = max(
+                node.children,
+                key=lambda child: child.wins / child.visits + explore * math.sqrt(log_visits / child.visits),
+            )
+            bits[node.mover] |= 1 << node.move
+
+        # Expansion
+        if node.untried and node.winner is None:
+            move = node.untried.pop()
+            mover = 3 - node.mover
+            bits[mover] |= 1 << move
+            occupied = bits[1] | bits[2]
+            if self._wins(bits[mover], move):
+                winner = mover
+            elif occupied.bit_count() == self.cells:
+                winner = 0
+            else:
+                winner = None
+            child = Node(move, node, mover, [] if winner is not None else self._untried(occupied), winner)
+            node.children.append(child)
+            node = child
+
+        # Simulation
+        winner = node.winner
+        if winner is None:
+            winner = self._rollout(bits, 3 - node.mover)
+
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            if winner == node.mover:
+                node.wins += 1
+            elif winner == 0:
+                node.wins += 0.5
+            node = node.parent
+
+    def _rollout(self, bits, player):
+        free = self._untried(bits[1] | bits[2])
+        for move in free:
+            bits[player] |= 1 << move
+            if self._wins(bits[player], move):
+                return player
+            player = 3 - player
+        return 0
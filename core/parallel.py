@@ -0,0 +1,283 @@
+"""Alpha-beta search with the root moves split over worker processes.
+
+``ParallelSearch`` has AlphaBetaSearch's interface. The shallow iterations
+of the iterative deepening run in the calling process: they are cheap and
+they order the root moves. The last, expensive iteration gives every root
+move to a process pool. The first move in that order is searched alone, and
+the rest wait for it before fanning out (young brothers wait), so they start
+with a good bound. Every worker publishes its score in a shared alpha, and
+later root searches read it before they start.
+
+Each root move is searched with a window one point below the shared alpha.
+Moves that tie the best one so far therefore still get exact scores, and
+ties go to the move that comes first in the serial search's order. The
+result is the move a fresh AlphaBetaSearch would return for the position.
+Each search starts with empty tables, so results do not depend on what was
+searched before. A core.sharedtable.SharedTable passed as ``table`` trades
+that for reuse: the calling process and every worker search with it, and it
+keeps its entries from one search to the next. Searches whose shallow
+iterations were tiny finish in the calling process, where the pool would
+only add overhead.
+``python -m core.bench --scaling`` reports the speedup per worker count.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from core.alphabeta import WIN_SCORE, WIN_THRESHOLD, AlphaBetaSearch
+from core.worker import SearchCancelled
+
+ENV_VAR = 'GAME_SEARCH_WORKERS'  # number of search processes for the front-ends; 0 for one per CPU
+# Below this many nodes in the shallow iterations the last one is cheaper to finish here than to ship
+MIN_SPLIT_NODES = 2000
+POLL_SECONDS = 0.02  # how often the calling process checks should_stop while workers search
+
+# Worker process state, set up by _init_worker
+_best = None
+_stop = None
+_engines = {}  # (rows, cols, k) or ((rows, cols, k), shared table name) -> AlphaBetaSearch
+_tables = {}  # name -> SharedTable attached in this worker
+_search_id = None
+
+
+def _init_worker(best, stop):
+    global _best, _stop
+    _best, _stop = best, stop
+
+
+def _stop_requested():
+    return _stop.value
+
+
+def _search_root_move(geometry, max_table_size, table_name, search_id, hints, me, opp, move, order, depth):
+    """Return (score, nodes, cutoffs, hits, misses) of playing ``move`` at the root, in a worker.
+
+    ``order`` is the move's place in the root move order. The score is exact
+    when the move could still be chosen, and an upper bound otherwise.
+    ``hints`` is (entries, history, killers) from the shallow iterations; the
+    entries are those of positions reachable through ``move``. They are too
+    shallow to decide any score, but they order the moves like the serial
+    search would. With a shared table, ``table_name`` names it and ``hints``
+    has no entries.
+    """
+    global _search_id
+    key = geometry if table_name is None else (geometry, table_name)
+    engine = _engines.get(key)
+    if engine is None:
+        shared = None
+        if table_name is not None:
+            shared = _tables.get(table_name)
+            if shared is None:
+                from core.sharedtable import SharedTable
+                shared = _tables[table_name] = SharedTable(name=table_name, create=False)
+        engine = _engines[key] = AlphaBetaSearch(*geometry, max_table_size=max_table_size, table=shared)
+    entries, history, killers = hints
+    if search_id != _search_id:
+        # Entries from another root position can be deeper than this search and change its scores
+        if entries is not None:
+            engine.table = {}
+        engine.history = list(history)
+        engine.killers = [list(pair) for pair in killers]
+        _search_id = search_id
+    if entries is not None:
+        # Positions this worker already searched for another root move keep their deeper entries
+        table = engine.table
+        for key, entry in entries.items():
+            table.setdefault(key, entry)
+    engine.nodes = engine.cutoffs = engine.hits = engine.misses = 0
+    engine._should_stop = _stop_requested
+
+    mine = me | 1 << move
+    if engine._wins(mine, move):
+        score = WIN_SCORE - 1
+    else:
+        best, best_order = _best[:]
+        # A move ordered before the best one so far wins ties, so it needs its exact score even then
+        alpha = best if best_order < order else best - 1
+        score = -engine._negamax(opp, mine, depth - 1, 1, -WIN_SCORE - 1, -alpha)[0]
+        if score > WIN_THRESHOLD:
+            score -= 1
+        elif score < -WIN_THRESHOLD:
+            score += 1
+    with _best.get_lock():
+        best, best_order = _best[:]
+        if score > best or score == best and order < best_order:
+            _best[:] = [score, order]
+    return score, engine.nodes, engine.cutoffs, engine.hits, engine.misses
+
+
+def _entries_by_root_move(table, me, opp):
+    """Split ``table``'s entries for positions below the root (me, opp); return {root move: {key: entry}}.
+
+    A position reached through several root moves is in each of their
+    dicts; the root itself is in none.
+    """
+    placed = (me | opp).bit_count()
+    by_move = {}
+    for key, entry in table.items():
+        a, b = key
+        # The side to move at the root is to move again after an even number of plies
+        mover, other = (a, b) if ((a | b).bit_count() - placed) % 2 == 0 else (b, a)
+        if mover & me != me or other & opp != opp:
+            continue
+        added = mover & ~me
+        while added:
+            bit = added & -added
+            added ^= bit
+            by_move.setdefault(bit.bit_length() - 1, {})[key] = entry
+    return by_move
+
+
+def _context():
+    # Workers start lazily, possibly from a UI or search thread, where fork is unsafe
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+class ParallelSearch:
+    """AlphaBetaSearch whose deepest iteration searches the root moves in ``workers`` processes.
+
+    The pool starts on the first search and lives until ``close()``.
+    """
+
+    def __init__(self, rows, cols=None, k=None, max_depth=None, workers=None, max_table_size=1_000_000, table=None):
+        self._serial = AlphaBetaSearch(rows, cols, k, max_depth, max_table_size, table)
+        self.table = table  # optional core.sharedtable.SharedTable shared with the workers
+        self.rows, self.cols, self.k = self._serial.rows, self._serial.cols, self._serial.k
+        self.cells = self._serial.cells
+        self.max_depth = self._serial.max_depth
+        self.max_table_size = max_table_size
+        self.workers = workers or os.cpu_count() or 1
+        context = _context()
+        self._context = context
+        self._best = context.Array('q', 2)  # (score, order) of the best root move so far
+        self._stop = context.Value('b', 0, lock=False)
+        self._pool = None
+        self._search_id = 0
+        self.nodes = self.cutoffs = self.hits = self.misses = 0
+        self.depth = 0
+        self.score = 0
+        self.split_seconds = 0.0  # time spent in the parallel iteration of the last search
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def start(self):
+        """Start the worker processes now rather than on the first search."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, self._context, _init_worker, (self._best, self._stop))
+            # Wait until every worker has started and imported the engine
+            for future in [self._pool.submit(os.getpid) for _ in range(self.workers)]:
+                future.result()
+        return self
+
+    def best_move(self, cells, player, should_stop=None):
+        """Return the best flat cell index for ``player``, like AlphaBetaSearch.best_move."""
+        serial = self._serial
+        depth = min(self.max_depth, cells.count(0))
+        # The same starting state as a fresh AlphaBetaSearch, so both order the root moves alike
+        if self.table is None:
+            serial.table.clear()
+        serial.history = [0] * self.cells
+        serial.max_depth = depth - 1 if depth > 1 else depth
+        try:
+            move = serial.best_move(cells, player, should_stop)
+        finally:
+            serial.max_depth = self.max_depth
+        self.nodes, self.cutoffs, self.hits, self.misses = serial.nodes, serial.cutoffs, serial.hits, serial.misses
+        self.depth, self.score = serial.depth, serial.score
+        self.split_seconds = 0.0
+        if move is None or depth <= 1 or abs(serial.score) > WIN_THRESHOLD:
+            return move  # full board, one ply or a forced result: the serial search would stop here too
+
+        me = opp = 0
+        for index, value in enumerate(cells):
+            if value == player:
+                me |= 1 << index
+            elif value:
+                opp |= 1 << index
+        if serial.nodes < MIN_SPLIT_NODES:
+            # Exactly the last iteration of AlphaBetaSearch.best_move
+            self.score, move = serial._negamax(me, opp, depth, 0, -WIN_SCORE - 1, WIN_SCORE + 1)
+            self.nodes, self.cutoffs, self.hits, self.misses = serial.nodes, serial.cutoffs, serial.hits, serial.misses
+            self.depth = depth
+            return move
+        entry = serial.table.get((me, opp))
+        moves = serial._ordered_moves(me | opp, 0, None if entry is None else entry[3])
+        start = time.perf_counter()
+        scores = self._split(me, opp, moves, depth, should_stop)
+        self.split_seconds = time.perf_counter() - start
+
+        best_score = -WIN_SCORE - 1
+        for candidate in moves:
+            # Strictly better only: ties go to the earlier move, as in the serial search
+            if scores[candidate] > best_score:
+                best_score, move = scores[candidate], candidate
+        self.score = best_score
+        self.depth = depth
+        return move
+
+    def _split(self, me, opp, moves, depth, should_stop):
+        """Search every root move in the pool; return {move: score}."""
+        self.start()
+        self._search_id += 1
+        self._best[:] = [-WIN_SCORE - 1, len(moves)]
+        geometry = (self.rows, self.cols, self.k)
+        table_name = None if self.table is None else self.table.name
+        history, killers = self._serial.history, self._serial.killers
+        # Each root move ships only the entries below it, rather than the whole table with every move
+        entries = None if self.table is not None else _entries_by_root_move(self._serial.table, me, opp)
+
+        def submit(order):
+            move = moves[order]
+            hints = (None if entries is None else entries.get(move, {}), history, killers)
+            future = self._pool.submit(_search_root_move, geometry, self.max_table_size, table_name,
+                                       self._search_id, hints, me, opp, move, order, depth)
+            pending[future] = move
+
+        scores = {}
+        pending = {}
+        submit(0)
+        waiting = list(range(1, len(moves)))  # the younger brothers, released once the eldest is scored
+        try:
+            while pending:
+                done, _ = wait(pending, POLL_SECONDS, FIRST_COMPLETED)
+                for future in done:
+                    score, nodes, cutoffs, hits, misses = future.result()
+                    scores[pending.pop(future)] = score
+                    self.nodes += nodes
+                    self.cutoffs += cutoffs
+                    self.hits += hits
+                    self.misses += misses
+                if waiting and scores:
+                    for order in waiting:
+                        submit(order)
+                    waiting = []
+                if should_stop is not None and should_stop():
+                    raise SearchCancelled
+        except BaseException:
+            # Stop the workers still searching for us before giving up on the search
+            self._stop.value = 1
+            for future in pending:
+                future.cancel()
+            wait(pending)
+            self._stop.value = 0
+            raise
+        return scores
+
+
+def from_env(rows, cols=None, k=None, table=None):
+    """Return a ParallelSearch with the worker count in the ENV_VAR environment variable, or None when unset."""
+    workers = os.environ.get(ENV_VAR)
+    if not workers:
+        return None
+    return ParallelSearch(rows, cols, k, workers=int(workers) or None, table=table)
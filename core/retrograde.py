@@ -0,0 +1,159 @@
+"""Retrograde solver writing a memory-mapped perfect-play table.
+
+Every position reachable from the empty board (with either player starting)
+is indexed by the perfect hash ``base3_key * 2 + (player_to_move - 1)``, where
+``base3_key`` is the sum of ``cell * 3 ** (row * cols + col)``; this is the
+same key ``core.board.Board.keys[0]`` maintains. Each entry holds
+
+  value: from the side to move, ``cells + 1 - plies`` for a forced win in
+         ``plies``, the negation for a forced loss, 0 for a draw
+  move:  flat index of the best move, or NO_MOVE for terminal and
+         unreachable positions
+
+Positions are enumerated forwards one layer (number of marks) at a time and
+spilled to disk, then solved backwards from the last layer, so only one layer
+is held in memory while the table itself lives in a memory-mapped ``.npy``.
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from core.rules import winning_lines
+from constants import ROWS, COLS
+
+ENTRY_DTYPE = np.dtype([('value', 'i1'), ('move', 'u1')])
+NO_MOVE = 255
+TABLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tables')
+
+
+def table_path(rows=ROWS, cols=COLS, k=None, directory=TABLE_DIR):
+    """Return the file holding the table for a rows x cols board with win length k."""
+    k = min(rows, cols) if k is None else k
+    return os.path.join(directory, f'perfect_{rows}x{cols}k{k}.npy')
+
+
+def _digits(keys, powers):
+    return (keys[:, None] // powers) % 3
+
+
+def build_table(path=None, rows=ROWS, cols=COLS, k=None):
+    """Solve every reachable position and write the table to ``path``; return the path."""
+    k = min(rows, cols) if k is None else k
+    cells = rows * cols
+    if not 1 <= k <= min(rows, cols):
+        raise ValueError(f"win length {k} does not fit a {rows}x{cols} board")
+    if cells > 16:
+        raise ValueError(f"a {rows}x{cols} board has too many positions to tabulate")
+    path = table_path(rows, cols, k) if path is None else path
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    powers = 3 ** np.arange(cells, dtype=np.int64)
+    lines = np.array(winning_lines(rows, cols, k), dtype=np.intp)
+    loss = -(cells + 1)
+
+    # Build into a temporary file and rename it into place, so concurrent
+    # readers only ever see a complete table
+    fd, partial = tempfile.mkstemp(suffix='.npy', dir=directory)
+    os.close(fd)
+    with tempfile.TemporaryDirectory(dir=directory) as spill:
+        table = np.lib.format.open_memmap(partial, mode='w+', dtype=ENTRY_DTYPE, shape=(2 * 3 ** cells,))
+        table['move'] = NO_MOVE
+
+        # Forward: enumerate layer by layer, resolve terminal positions, spill the rest
+        codes = np.array([0, 1], dtype=np.int64)  # empty board, either player to move
+        layer = 0
+        while codes.size:
+            keys, player = codes // 2, codes % 2 + 1
+            digits = _digits(keys, powers)
+            previous = (3 - player)[:, None, None]
+            won = (digits[:, lines] == previous).all(axis=2).any(axis=1)
+            full = layer == cells
+            table['value'][codes[won]] = loss
+            if full:
+                table['value'][codes[~won]] = 0
+                break
+            codes, keys, player, digits = codes[~won], keys[~won], player[~won], digits[~won]
+            np.save(os.path.join(spill, f'{layer}.npy'), codes)
+            empty_rows, empty_cells = np.nonzero(digits == 0)
+            children = (keys[empty_rows] + player[empty_rows] * powers[empty_cells]) * 2 + (2 - player[empty_rows])
+            codes = np.unique(children)
+            layer += 1
+        table.flush()
+
+        # Backward: every child of a layer is already solved
+        for layer in range(layer - 1, -1, -1):
+            codes = np.load(os.path.join(spill, f'{layer}.npy'))
+            keys, player = codes // 2, codes % 2 + 1
+            digits = _digits(keys, powers)
+            best_value = np.full(codes.size, -128, dtype=np.int16)
+            best_move = np.full(codes.size, NO_MOVE, dtype=np.uint8)
+            for cell in range(cells):
+                empty = digits[:, cell] == 0
+                child = (keys[empty] + player[empty] * powers[cell]) * 2 + (2 - player[empty])
+                value = -table['value'][child].astype(np.int16)
+                # One ply further from the end: pull win and loss scores towards zero
+                value -= np.sign(value)
+                better = np.zeros(codes.size, dtype=bool)
+                better[empty] = value > best_value[empty]
+                best_value[better] = value[better[empty]]
+                best_move[better] = cell
+            table['value'][codes] = best_value
+            table['move'][codes] = best_move
+        table.flush()
+        del table
+    os.replace(partial, path)
+    return path
+
+
+class PerfectPlayTable:
+    """Read-only, memory-mapped view of a table written by ``build_table``."""
+
+    def __init__(self, path, rows=ROWS, cols=COLS, k=None):
+        self.rows = rows
+        self.cols = cols
+        self.k = min(rows, cols) if k is None else k
+        self.cells = rows * cols
+        self.path = path
+        self.entries = np.load(path, mmap_mode='r')
+        if self.entries.dtype != ENTRY_DTYPE or self.entries.shape != (2 * 3 ** self.cells,):
+            raise ValueError(f"{path} is not a perfect-play table for a {rows}x{cols} board")
+        self._powers = [3 ** i for i in range(self.cells)]
+
+    @classmethod
+    def load(cls, rows=ROWS, cols=COLS, k=None, directory=TABLE_DIR, build=True):
+        """Open the table for this geometry, building it first if it is missing."""
+        path = table_path(rows, cols, k, directory)
+        if not os.path.exists(path):
+            if not build:
+                raise FileNotFoundError(path)
+            build_table(path, rows, cols, k)
+        return cls(path, rows, cols, k)
+
+    def key(self, cells):
+        """Return the base-3 key of a flat sequence of 0/1/2 cells."""
+        return sum(value * power for value, power in zip(cells, self._powers) if value)
+
+    def lookup_key(self, key, player):
+        """Return (value, move) for ``player`` to move; move is None at terminal positions."""
+        value, move = self.entries[key * 2 + player - 1].item()
+        return value, None if move == NO_MOVE else move
+
+    def lookup(self, cells, player):
+        return self.lookup_key(self.key(cells), player)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the perfect-play table for a board.')
+    parser.add_argument('--rows', type=int, default=ROWS)
+    parser.add_argument('--cols', type=int, default=COLS)
+    parser.add_argument('-k', type=int, default=None, help='win length (default: the shorter side)')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+    print(build_table(args.output, args.rows, args.cols, args.k))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""m,n,k rules: a rows x cols board won by the first k marks in a row.
+
+``Rules`` precomputes every winning line and, for every cell, the lines
+through it. A ``Position`` keeps a piece count per line and player, so
+playing or undoing a move and asking for the winner costs O(lines through
+that cell) whatever the board size. It also keeps the moves on an undo stack
+and the empty cells in a list updated by swaps, so searches can make and
+take back moves without allocating. Board, TicTacToeGame and the search
+engines all take their geometry from here.
+"""
+import functools
+
+
+def winning_lines(rows, cols, k):
+    """Return every run of k cells in a row, as tuples of flat cell indices."""
+    lines = []
+    for row in range(rows):
+        for col in range(cols):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row = row + d_row * (k - 1)
+                end_col = col + d_col * (k - 1)
+                if 0 <= end_row < rows and 0 <= end_col < cols:
+                    lines.append(tuple(
+                        (row + d_row * i) * cols + col + d_col * i for i in range(k)
+                    ))
+    return lines
+
+
+class Rules:
+    """Winning lines of a rows x cols board with win length k (default: the shorter side)."""
+
+    def __init__(self, rows, cols=None, k=None):
+        self.rows = rows
+        self.cols = rows if cols is None else cols
+        self.k = min(self.rows, self.cols) if k is None else k
+        if not 1 <= self.k <= min(self.rows, self.cols):
+            raise ValueError(f"win length {self.k} does not fit a {self.rows}x{self.cols} board")
+        self.cells = self.rows * self.cols
+        self.lines = tuple(winning_lines(self.rows, self.cols, self.k))
+        self.line_masks = tuple(sum(1 << cell for cell in line) for line in self.lines)
+        # cell_lines[cell]: indices of the lines through cell; cell_masks[cell]: their bitmasks
+        through = [[] for _ in range(self.cells)]
+        for index, line in enumerate(self.lines):
+            for cell in line:
+                through[cell].append(index)
+        self.cell_lines = tuple(tuple(lines) for lines in through)
+        self.cell_masks = tuple(
+            tuple(self.line_masks[index] for index in lines) for lines in self.cell_lines
+        )
+
+    def position(self):
+        """Return an empty Position under these rules."""
+        return Position(self)
+
+
+@functools.lru_cache(maxsize=None)
+def rules_for(rows, cols=None, k=None):
+    """Return the shared Rules instance for a geometry."""
+    return Rules(rows, cols, k)
+
+
+class Position:
+    """Marks on a board plus per-line piece counts, updated move by move.
+
+    ``cells[i]`` is 0 or the player (1 or 2) on cell i. ``winner`` is the
+    player who first completed a line, and ``winning_line`` its index into
+    ``rules.lines``; both stay set until that line is broken by ``undo``.
+
+    ``stack[:moves]`` are the marked cells in the order they were played and
+    ``empty[:free]`` the empty cells. ``play`` swaps the cell to the end of
+    the empty part and ``takeback`` swaps it back, so a search may walk
+    ``empty[:free]`` by index while it plays and takes back moves below.
+    """
+    __slots__ = ('rules', 'cells', 'counts', 'moves', 'winner', 'winning_line', 'complete',
+                 'stack', 'empty', 'free', '_slot', '_taken_from')
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.reset()
+
+    def reset(self):
+        lines = len(self.rules.lines)
+        self.cells = [0] * self.rules.cells
+        self.counts = (None, [0] * lines, [0] * lines)
+        self.moves = 0
+        self.winner = 0
+        self.winning_line = None
+        self.complete = 0  # number of complete lines, for either player
+        self.stack = [0] * self.rules.cells
+        self.empty = list(range(self.rules.cells))
+        self.free = self.rules.cells
+        self._slot = list(range(self.rules.cells))  # index of every cell in empty
+        self._taken_from = [0] * self.rules.cells  # index in empty of each move on the stack
+
+    def copy(self):
+        position = Position.__new__(Position)
+        position.rules = self.rules
+        position.cells = list(self.cells)
+        position.counts = (None, list(self.counts[1]), list(self.counts[2]))
+        position.moves = self.moves
+        position.winner = self.winner
+        position.winning_line = self.winning_line
+        position.complete = self.complete
+        position.stack = list(self.stack)
+        position.empty = list(self.empty)
+        position.free = self.free
+        position._slot = list(self._slot)
+        position._taken_from = list(self._taken_from)
+        return position
+
+    def play(self, cell, player):
+        """Mark ``cell`` for ``player``; return the winner so far (0 for none)."""
+        if self.cells[cell]:
+            raise ValueError(f"cell {cell} is already marked")
+        self.cells[cell] = player
+        empty, slot = self.empty, self._slot
+        index = slot[cell]
+        last = self.free - 1
+        moved = empty[last]
+        empty[index] = moved
+        slot[moved] = index
+        empty[last] = cell
+        slot[cell] = last
+        self.free = last
+        self.stack[self.moves] = cell
+        self._taken_from[self.moves] = index
+        self.moves += 1
+        counts = self.counts[player]
+        k = self.rules.k
+        for line in self.rules.cell_lines[cell]:
+            counts[line] += 1
+            if counts[line] == k:
+                self.complete += 1
+                if not self.winner:
+                    self.winner = player
+                    self.winning_line = line
+        return self.winner
+
+    def takeback(self):
+        """Undo the most recent move in O(lines through its cell); return its cell."""
+        if not self.moves:
+            raise ValueError("no move to take back")
+        cell = self.stack[self.moves - 1]
+        self.undo(cell)
+        return cell
+
+    def undo(self, cell):
+        """Clear ``cell``, normally the most recent move."""
+        player = self.cells[cell]
+        if not player:
+            raise ValueError(f"cell {cell} is not marked")
+        self.cells[cell] = 0
+        self.moves -= 1
+        # Swap the cell to the front of the marked part of empty, then widen the empty part over it
+        empty, slot = self.empty, self._slot
+        free = self.free
+        index = slot[cell]
+        moved = empty[free]
+        empty[index] = moved
+        slot[moved] = index
+        empty[free] = cell
+        slot[cell] = free
+        if self.stack[self.moves] == cell:
+            # The last move: put it back where play() took it from, restoring the exact order
+            index = self._taken_from[self.moves]
+            moved = empty[index]
+            empty[free] = moved
+            slot[moved] = free
+            empty[index] = cell
+            slot[cell] = index
+        else:
+            played = self.stack.index(cell, 0, self.moves)
+            self.stack[played:self.moves] = self.stack[played + 1:self.moves + 1]
+            self._taken_from[played:self.moves] = self._taken_from[played + 1:self.moves + 1]
+        self.free += 1
+        counts = self.counts[player]
+        k = self.rules.k
+        for line in self.rules.cell_lines[cell]:
+            if counts[line] == k:
+                self.complete -= 1
+            counts[line] -= 1
+        if self.winner == player and self.winning_line in self.rules.cell_lines[cell]:
+            self.winner = 0
+            self.winning_line = None
+            if not self.complete:
+                return
+            # Only reachable by undoing out of order: another line is still complete
+            for other in (1, 2):
+                for line, count in enumerate(self.counts[other]):
+                    if count == k:
+                        self.winner, self.winning_line = other, line
+                        return
+
+    def is_full(self):
+        return self.moves == self.rules.cells
+
+    def is_tied(self):
+        return not self.winner and self.moves == self.rules.cells
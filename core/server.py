@@ -0,0 +1,306 @@
+"""Local best-move service: one warm engine shared by many clients.
+
+Clients connect over TCP (localhost by default) and exchange JSON lines::
+
+    -> {"id": 1, "cells": [0, 1, 0, ...], "player": 2, "k": 3}
+    <- {"id": 1, "move": [1, 1], "evaluation": 0, "cached": false}
+    -> {"id": 2, "op": "stats"}
+    <- {"id": 2, "requests": ..., "latency_ms": {"p50": ..., "p90": ..., "p99": ...}, ...}
+
+``cells`` is the flat board (0 empty, 1 or 2), rows x cols with rows and
+cols defaulting to a square board; ``evaluation`` is the engine's score for
+``player``. Requests from every connection go through one bounded queue. A
+batcher takes whatever has arrived within ``batch_window`` seconds (up to
+``batch_size``), answers repeated positions from an LRU cache, and searches
+the rest in a single call on the engine thread. When the queue stays full for
+``overload_timeout`` seconds the request is refused with an ``overloaded``
+error, so callers back off instead of piling up latency.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from core.ai import TranspositionTable
+from core.alphabeta import AlphaBetaSearch
+from core.telemetry import percentile
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+ENV_VAR = 'GAME_EVAL_SERVER'  # host:port of a running server for the front-ends to use
+LATENCY_WINDOW = 10_000  # latencies kept for the percentiles
+
+
+class EvaluationServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, batch_size=64, batch_window=0.002,
+                 queue_size=1024, overload_timeout=0.5, cache_size=100_000, max_in_flight=256):
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.overload_timeout = overload_timeout
+        self.max_in_flight = max_in_flight  # per connection; beyond it the connection is not read
+        self.cache = TranspositionTable(cache_size)
+        self.engines = {}  # (rows, cols, k) -> AlphaBetaSearch, only touched on the engine thread
+        self.requests = 0
+        self.rejected = 0
+        self.batches = 0
+        self.searched = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self._queue_size = queue_size
+        self._queue = None
+        self._server = None
+        self._batcher = None
+        self._executor = None
+
+    async def start(self):
+        """Start listening; with port 0 the chosen port is stored in ``self.port``."""
+        self._queue = asyncio.Queue(self._queue_size)
+        # One engine thread: searches run one batch at a time, off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='evaluation')
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._batcher = asyncio.create_task(self._run_batches())
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._batcher.cancel()
+        try:
+            await self._batcher
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown()
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'searched': self.searched,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'cache': self.cache.stats(),
+            'latency_ms': {
+                name: percentile(latencies, fraction) * 1000
+                for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('max', 1.0))
+            },
+        }
+
+    async def _handle_client(self, reader, writer):
+        pending = set()
+        lock = asyncio.Lock()
+        slots = asyncio.Semaphore(self.max_in_flight)
+        try:
+            while True:
+                # A client with too many open requests waits here, and TCP pushes back on it
+                await slots.acquire()
+                line = await reader.readline()
+                if not line:
+                    break
+                # Requests are answered concurrently; replies carry the request id
+                task = asyncio.create_task(self._answer(line, writer, lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+                task.add_done_callback(lambda _: slots.release())
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            writer.close()
+
+    async def _answer(self, line, writer, lock):
+        start = time.perf_counter()
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+            request_id = request.get('id')
+            if request.get('op') == 'stats':
+                reply = self.stats()
+            else:
+                reply = await self._evaluate(request)
+                self.requests += 1
+                self.latencies.append(time.perf_counter() - start)
+        except (ValueError, KeyError, TypeError) as error:
+            reply = {'error': str(error) or type(error).__name__}
+        reply['id'] = request_id
+        async with lock:
+            writer.write(json.dumps(reply).encode() + b'\n')
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass  # the client went away; nobody is left to answer
+
+    async def _evaluate(self, request):
+        cells = tuple(int(cell) for cell in request['cells'])
+        player = int(request['player'])
+        rows = int(request.get('rows') or math.isqrt(len(cells)))
+        cols = int(request.get('cols') or rows)
+        if rows * cols != len(cells) or player not in (1, 2) or not set(cells) <= {0, 1, 2}:
+            raise ValueError("cells must be a rows x cols list of 0, 1 and 2, player 1 or 2")
+        k = int(request.get('k') or min(rows, cols))
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError(f"k must be between 1 and {max(rows, cols)}")
+        geometry = (rows, cols, k)
+
+        key = (geometry, cells, player)
+        cached = self.cache.get(key)
+        if cached is not None:
+            move, evaluation = cached
+            return {'move': move, 'evaluation': evaluation, 'cached': True}
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(self._queue.put((key, future)), self.overload_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return {'error': 'overloaded'}
+        move, evaluation = await future
+        return {'move': move, 'evaluation': evaluation, 'cached': False}
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+
+            # Identical positions in one batch are searched once
+            waiting = {}
+            for key, future in batch:
+                waiting.setdefault(key, []).append(future)
+            try:
+                results = await loop.run_in_executor(self._executor, self._search_all, list(waiting))
+            except Exception as error:  # pragma: no cover - an engine bug must not kill the server
+                for futures in waiting.values():
+                    for future in futures:
+                        if not future.done():
+                            future.set_exception(error)
+                continue
+            for key, result in zip(waiting, results):
+                if isinstance(result, Exception):
+                    for future in waiting[key]:
+                        if not future.done():
+                            future.set_exception(result)
+                    continue
+                self.cache.put(key, result)
+                for future in waiting[key]:
+                    if not future.done():
+                        future.set_result(result)
+
+    def _search_all(self, keys):
+        """Search every (geometry, cells, player) on the engine thread.
+
+        Return a (move, evaluation) for each key, or the exception its search
+        raised, so one bad position does not fail the rest of its batch.
+        """
+        results = []
+        for geometry, cells, player in keys:
+            try:
+                engine = self.engines.get(geometry)
+                if engine is None:
+                    engine = self.engines[geometry] = AlphaBetaSearch(*geometry)
+                move = engine.best_move(list(cells), player)
+            except Exception as error:
+                results.append(error)
+                continue
+            self.searched += 1
+            results.append((None if move is None else divmod(move, geometry[1]), engine.score))
+        return results
+
+
+class EvaluationClient:
+    """Blocking client speaking the server's protocol.
+
+    Has the ``best_move(cells, player, should_stop)`` interface of
+    AlphaBetaSearch (plus its counters), so a TicTacToeGame can use it as its
+    engine.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, rows=None, cols=None, k=None, timeout=30):
+        self.rows, self.cols, self.k = rows, cols, k
+        self._socket = socket.create_connection((host, port), timeout)
+        self._file = self._socket.makefile('rwb')
+        self._next_id = 0
+        self.score = 0
+        self.cached = False
+        self.nodes = self.depth = self.cutoffs = self.hits = self.misses = 0
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def request(self, **fields):
+        self._next_id += 1
+        fields['id'] = self._next_id
+        self._file.write(json.dumps(fields).encode() + b'\n')
+        self._file.flush()
+        reply = json.loads(self._file.readline())
+        if 'error' in reply:
+            raise RuntimeError(f"evaluation server: {reply['error']}")
+        return reply
+
+    def evaluate(self, cells, player):
+        """Return ((row, col) or None, evaluation) for ``player`` to move."""
+        reply = self.request(cells=list(cells), player=player, rows=self.rows, cols=self.cols, k=self.k)
+        self.score = reply['evaluation']
+        self.cached = reply['cached']
+        self.hits, self.misses = (1, 0) if self.cached else (0, 1)
+        return (None if reply['move'] is None else tuple(reply['move'])), self.score
+
+    def best_move(self, cells, player, should_stop=None):
+        move = self.evaluate(cells, player)[0]
+        if move is None:
+            return None
+        cols = self.cols or math.isqrt(len(cells))
+        return move[0] * cols + move[1]
+
+    def stats(self):
+        return self.request(op='stats')
+
+
+def client_from_env(rows=None, cols=None, k=None):
+    """Return a client for the server named by the ENV_VAR environment variable, or None when unset."""
+    address = os.environ.get(ENV_VAR)
+    if not address:
+        return None
+    host, _, port = address.rpartition(':')
+    return EvaluationClient(host or DEFAULT_HOST, int(port), rows, cols, k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve best moves to local clients.')
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--batch-window-ms', type=float, default=2.0)
+    parser.add_argument('--queue-size', type=int, default=1024)
+    args = parser.parse_args()
+    server = EvaluationServer(args.host, args.port, args.batch_size, args.batch_window_ms / 1000, args.queue_size)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Host many simulator games in one process, without pygame.
+
+A ``SessionHost`` keeps every game as a small ``Session``. The board is two
+bitmasks, one per player, and the moves so far (the patient profile) are a
+bytearray. The remaining fields are small ints. All sessions share one
+TranspositionTable and one AI per level. At most ``max_resident`` sessions
+are kept in memory. The least recently used ones are written to a
+``SessionStore``, a file of fixed-size records indexed by session id, and
+read back the next time they are touched.
+"""
+import os
+import struct
+import sys
+import tempfile
+from collections import OrderedDict
+
+from constants import ROWS, COLS, WIN_LENGTH
+from core.ai import AI, TranspositionTable
+from core.board import SQUARES, Board
+from core.gamerecords import NO_AI, config_id
+from core.rules import rules_for
+
+RULES = rules_for(ROWS, COLS, WIN_LENGTH)
+AI_MODE, PVP_MODE = 0, 1
+AI_PLAYER = 2  # the human always moves first, as in the simulator
+
+
+class Session:
+    """State of one game: the two players' marks, the move log and its settings."""
+    __slots__ = ('id', 'marks_1', 'marks_2', 'moves', 'player', 'mode', 'level', 'winner')
+
+    def __init__(self, session_id, mode=AI_MODE, level=1):
+        self.id = session_id
+        self.marks_1 = 0
+        self.marks_2 = 0
+        self.moves = bytearray()  # flat cells in the order they were played
+        self.player = 1  # side to move
+        self.mode = mode
+        self.level = level
+        self.winner = 0
+
+    def is_empty(self, cell):
+        return not (self.marks_1 | self.marks_2) >> cell & 1
+
+    def is_over(self):
+        return bool(self.winner) or len(self.moves) == RULES.cells
+
+    def play(self, cell):
+        """Mark ``cell`` for the side to move, then pass the turn."""
+        if self.is_over() or not self.is_empty(cell):
+            raise ValueError(f"cell {cell} cannot be played")
+        if self.player == 1:
+            self.marks_1 |= 1 << cell
+            marks = self.marks_1
+        else:
+            self.marks_2 |= 1 << cell
+            marks = self.marks_2
+        self.moves.append(cell)
+        for line in RULES.cell_masks[cell]:
+            if marks & line == line:
+                self.winner = self.player
+                break
+        self.player = 3 - self.player
+
+    def board(self):
+        """Return the position as a core.board.Board, for the AI."""
+        board = Board()
+        for ply, cell in enumerate(self.moves):
+            board.mark_square(*SQUARES[cell], 1 + ply % 2)
+        return board
+
+    def nbytes(self):
+        """Return the memory this session holds, the move log included."""
+        return sys.getsizeof(self) + sys.getsizeof(self.moves) + sum(
+            sys.getsizeof(value) for value in (self.marks_1, self.marks_2))
+
+
+class SessionStore:
+    """Fixed-size session records in a file, at offset ``id * record size``.
+
+    Record: live flag, number of moves, side to move, mode, level, winner,
+    then one byte per cell for the moves. Without a path the records go to an
+    anonymous temporary file.
+    """
+    def __init__(self, path=None, cells=RULES.cells):
+        self.cells = cells
+        self.record = struct.Struct(f'<6B{cells}s')
+        self._file = tempfile.TemporaryFile() if path is None else open(
+            path, 'r+b' if os.path.exists(path) else 'w+b')
+
+    def close(self):
+        self._file.close()
+
+    def write(self, session):
+        self._file.seek(session.id * self.record.size)
+        self._file.write(self.record.pack(1, len(session.moves), session.player, session.mode, session.level,
+                                          session.winner, bytes(session.moves)))
+
+    def read(self, session_id):
+        """Return the stored Session, or None when there is none."""
+        self._file.seek(session_id * self.record.size)
+        data = self._file.read(self.record.size)
+        if len(data) < self.record.size:
+            return None
+        live, length, player, mode, level, winner, moves = self.record.unpack(data)
+        if not live:
+            return None
+        session = Session(session_id, mode, level)
+        session.moves = bytearray(moves[:length])
+        for ply, cell in enumerate(session.moves):
+            if ply % 2:
+                session.marks_2 |= 1 << cell
+            else:
+                session.marks_1 |= 1 << cell
+        session.player, session.winner = player, winner
+        return session
+
+    def delete(self, session_id):
+        self._file.seek(session_id * self.record.size)
+        if self._file.read(1):
+            self._file.seek(session_id * self.record.size)
+            self._file.write(b'\0')
+
+
+class SessionHost:
+    """Create, play and evict games by id; AI replies come from the shared per-level AIs."""
+
+    def __init__(self, path=None, max_resident=10_000, table=None, records=None):
+        self.max_resident = max_resident
+        self.table = TranspositionTable() if table is None else table
+        self.store = SessionStore(path)
+        # core.gamerecords.GameRecordWriter receiving every finished game, optional
+        self.records = records
+        self._resident = OrderedDict()  # session id -> Session, least recently used first
+        self._spilled = set()
+        self._ais = {}  # level -> AI sharing self.table
+        self._next_id = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._resident) + len(self._spilled)
+
+    def close(self):
+        self.store.close()
+
+    def create(self, mode=AI_MODE, level=1):
+        """Start a game; return its session id."""
+        session = Session(self._next_id, mode, level)
+        self._next_id += 1
+        self._remember(session)
+        return session.id
+
+    def get(self, session_id):
+        """Return the Session, reading it back from the store if it was evicted."""
+        session = self._resident.get(session_id)
+        if session is not None:
+            self._resident.move_to_end(session_id)
+            return session
+        if session_id not in self._spilled:
+            raise KeyError(f"no session {session_id}")
+        session = self.store.read(session_id)
+        self._spilled.discard(session_id)
+        self.loads += 1
+        self._remember(session)
+        return session
+
+    def _remember(self, session):
+        self._resident[session.id] = session
+        while len(self._resident) > self.max_resident:
+            _, idle = self._resident.popitem(last=False)
+            self.store.write(idle)
+            self._spilled.add(idle.id)
+            self.evictions += 1
+
+    def move(self, session_id, row, col):
+        """Play (row, col) for the side to move; return the AI's reply (row, col), or None."""
+        session = self.get(session_id)
+        session.play(row * COLS + col)
+        reply = None
+        if session.mode == AI_MODE and session.player == AI_PLAYER and not session.is_over():
+            reply = self._ai(session.level).evaluate(session.board())
+            session.play(reply[0] * COLS + reply[1])
+        if session.is_over() and self.records is not None:
+            level = session.level if session.mode == AI_MODE else NO_AI
+            self.records.append(list(session.moves), session.winner, config_id(ROWS, COLS, WIN_LENGTH), level)
+        return reply
+
+    def _ai(self, level):
+        ai = self._ais.get(level)
+        if ai is None:
+            ai = self._ais[level] = AI(level=level, player=AI_PLAYER, table=self.table)
+        return ai
+
+    def reset(self, session_id):
+        """Clear the board, keeping the session's mode and level."""
+        session = self.get(session_id)
+        self._resident[session_id] = Session(session_id, session.mode, session.level)
+
+    def end(self, session_id):
+        """Forget a session."""
+        if self._resident.pop(session_id, None) is None:
+            self._spilled.remove(session_id)
+        self.store.delete(session_id)
+
+    def stats(self):
+        resident_bytes = sum(session.nbytes() for session in self._resident.values())
+        return {
+            'sessions': len(self),
+            'resident': len(self._resident),
+            'spilled': len(self._spilled),
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'resident_bytes': resident_bytes,
+            'bytes_per_session': resident_bytes / len(self._resident) if self._resident else 0.0,
+            'record_bytes': self.store.record.size,
+            'cache': self.table.stats(),
+        }
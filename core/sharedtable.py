@@ -0,0 +1,258 @@
+"""Fixed-size transposition table in shared memory, for searches in several processes.
+
+A ``SharedTable`` lives in a ``multiprocessing.shared_memory`` block that
+any process on the host can attach to by name. A table pickles as its name,
+so pool workers attach to it. Every process reads and writes it without
+locks.
+
+Buckets hold two entries of three 64-bit words: ``a ^ data``, ``b ^ data``
+and ``data`` for the key ``(a, b)``. The data packs the search depth, the
+bound flag, the score and the best move. When two processes write the same
+entry at once, a reader can see words from both writes. The XOR check then
+fails, and the lookup counts as a miss (Hyatt's lockless hashing). The
+first entry of a bucket is replaced only by a result at least as deep, or
+by the same position. Everything else goes to the second entry, which is
+always replaced.
+
+Entries are core.alphabeta's ``(depth, flag, score, move)``, keyed by its
+``(me, opp)`` bitmasks, so one table serves one board geometry. Keys of
+boards above 64 cells are folded to 64 bits. ``MinimaxTable``
+puts core.ai.AI.minimax's entries in the same table. ``save`` and ``load``
+write the table to a file and read it back, so a new run starts with the
+last run's entries. The file records the table's rows, cols and k, and
+``load`` refuses a file saved for another geometry. The front-ends
+warm-start from the file named by GAME_SHARED_TABLE and save to it when
+they quit.
+"""
+import os
+import struct
+import tempfile
+from multiprocessing import parent_process, resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from core.alphabeta import EXACT
+from core.rules import rules_for
+
+ENV_VAR = 'GAME_SHARED_TABLE'
+MAGIC = b'TDTT'
+VERSION = 2
+HEADER = struct.Struct('<4sBxxxQHHHxx')  # magic, version, buckets, rows, cols, k
+DEFAULT_BUCKETS = 1 << 18  # 2**19 entries, 12 MiB
+WORDS = 3  # per entry
+MASK = (1 << 64) - 1
+VALID = 1 << 63  # set in every stored data word, so an empty entry never matches
+SCORE_BIAS = 1 << 31
+NO_MOVE = 255
+MINIMAX_KEY = 1 << 63  # set in the second key word of AI.minimax entries
+MINIMAX_DEPTH = 255  # minimax entries are exact whatever the depth
+
+
+def _fold(x):
+    while x > MASK:
+        x = (x & MASK) ^ ((x >> 64) * 0x9E3779B97F4A7C15 & MASK)
+    return x
+
+
+class SharedTable:
+    """Transposition table of ``buckets`` two-entry buckets in shared memory.
+
+    Creates a new block by default. Pass the ``name`` of an existing block
+    and ``create=False`` to attach to it. ``geometry`` is the (rows, cols,
+    k) of the boards whose entries the table holds; ``save`` records it.
+    ``hits``, ``misses`` and ``stores`` count this process's lookups only.
+    The creator frees the block when it closes the table or drops the last
+    reference to it.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, name=None, create=True, geometry=None):
+        if create:
+            if buckets < 1 or buckets & (buckets - 1):
+                raise ValueError(f"buckets must be a power of two, not {buckets}")
+            self._memory = SharedMemory(name, create=True, size=buckets * 2 * WORDS * 8)
+        else:
+            self._memory = SharedMemory(name)
+            if parent_process() is None:
+                # A process outside this one's pool has its own resource tracker, which would
+                # unlink the block when this process exits; the creator owns it
+                resource_tracker.unregister(self._memory._name, 'shared_memory')
+        self.owner = create
+        self.name = self._memory.name
+        self.geometry = None if geometry is None else tuple(geometry)
+        self._words = self._memory.buf.cast('Q')
+        # The block can be rounded up to whole pages; only the power of two it was made for is used
+        self.buckets = 1 << (len(self._words) // (2 * WORDS)).bit_length() - 1
+        self._mask = self.buckets - 1
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def __reduce__(self):
+        return self.__class__, (self.buckets, self.name, False, self.geometry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Detach; the process that created the table also frees it."""
+        if self._words is not None:
+            self._detach()
+            if self.owner:
+                self._memory.unlink()
+
+    def _detach(self):
+        # The word view must go before the mapping it was cast from can close
+        self._words.release()
+        self._words = None
+        self._memory.close()
+
+    def __del__(self):
+        # A table nobody closed is still freed by its creator
+        if getattr(self, '_words', None) is not None:
+            self.close()
+
+    def _slot(self, a, b):
+        return ((a * 0x9E3779B97F4A7C15 ^ b * 0xC2B2AE3D27D4EB4F) >> 32 & self._mask) * 2 * WORDS
+
+    def get(self, key):
+        """Return the (depth, flag, score, move) stored for ``key``, or None."""
+        a, b = key
+        if a > MASK or b > MASK:
+            a, b = _fold(a), _fold(b)
+        words = self._words
+        slot = self._slot(a, b)
+        for slot in (slot, slot + WORDS):
+            data = words[slot + 2]
+            if data and words[slot] ^ data == a and words[slot + 1] ^ data == b:
+                self.hits += 1
+                move = data & 255
+                return (data >> 8 & 255, data >> 16 & 3, (data >> 24 & 0xFFFFFFFF) - SCORE_BIAS,
+                        None if move == NO_MOVE else move)
+        self.misses += 1
+        return None
+
+    def put(self, key, entry):
+        """Store ``entry``, (depth, flag, score, move), for ``key``."""
+        a, b = key
+        if a > MASK or b > MASK:
+            a, b = _fold(a), _fold(b)
+        depth, flag, score, move = entry
+        data = VALID | (score + SCORE_BIAS) << 24 | flag << 16 | min(depth, 255) << 8 | (
+            NO_MOVE if move is None else move)
+        words = self._words
+        slot = self._slot(a, b)
+        kept = words[slot + 2]
+        if kept and depth < (kept >> 8 & 255) and not (words[slot] ^ kept == a and words[slot + 1] ^ kept == b):
+            slot += WORDS  # the deeper entry stays; this one goes to the always-replace entry
+        words[slot + 2] = data
+        words[slot] = a ^ data
+        words[slot + 1] = b ^ data
+        self.stores += 1
+
+    def __len__(self):
+        """Return the number of entries in use."""
+        return int(np.count_nonzero(self._array()[:, 2]))
+
+    def _array(self):
+        return np.frombuffer(self._memory.buf, dtype=np.uint64, count=self.buckets * 2 * WORDS).reshape(-1, WORDS)
+
+    def clear(self):
+        self._array()[:] = 0
+        self.hits = self.misses = self.stores = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'size': len(self),
+            'capacity': 2 * self.buckets,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def save(self, path):
+        """Write every entry to ``path``, replacing it atomically; other processes may keep writing."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, partial = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.buckets, *(self.geometry or (0, 0, 0))))
+            f.write(self._memory.buf[:self.buckets * 2 * WORDS * 8])
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path, geometry=None, name=None):
+        """Return a new table holding the entries saved in ``path``.
+
+        Raises ValueError when ``geometry``, (rows, cols, k), is given and
+        the file was saved for another one.
+        """
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path} is not a transposition table file")
+            magic, version, buckets, *saved = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} transposition table file")
+            saved = tuple(saved) if any(saved) else None
+            if geometry is not None and saved != tuple(geometry):
+                raise ValueError(f"{path} holds entries for {saved}, not {tuple(geometry)} (rows, cols, k)")
+            table = cls(buckets, name, geometry=saved)
+            size = buckets * 2 * WORDS * 8
+            if f.readinto(table._memory.buf[:size]) != size:
+                table.close()
+                raise ValueError(f"{path} is truncated")
+        return table
+
+
+class MinimaxTable:
+    """core.ai.TranspositionTable's interface over a SharedTable, for AI.minimax's entries."""
+
+    def __init__(self, shared):
+        self.shared = shared
+
+    @property
+    def hits(self):
+        return self.shared.hits
+
+    @property
+    def misses(self):
+        return self.shared.misses
+
+    def __len__(self):
+        return len(self.shared)
+
+    def get(self, key):
+        # AI.minimax packs (canonical key, is_maximizing, player) into key and (score, move) into entry
+        entry = self.shared.get((key >> 2, MINIMAX_KEY | key & 3))
+        return None if entry is None else entry[2]
+
+    def put(self, key, entry):
+        self.shared.put((key >> 2, MINIMAX_KEY | key & 3), (MINIMAX_DEPTH, EXACT, entry, None))
+
+    def clear(self):
+        self.shared.clear()
+
+    def stats(self):
+        return self.shared.stats()
+
+
+def from_env(rows, cols=None, k=None):
+    """Return (table, path): the table saved in the file ENV_VAR names, or a new one, or (None, None) when unset.
+
+    The table is for rows x cols boards with win length k; a file saved
+    for other boards raises ValueError. Save it back with
+    ``table.save(path)`` before closing it.
+    """
+    path = os.environ.get(ENV_VAR)
+    if not path:
+        return None, None
+    rules = rules_for(rows, cols, k)
+    geometry = (rules.rows, rules.cols, rules.k)
+    if os.path.exists(path):
+        return SharedTable.load(path, geometry), path
+    return SharedTable(geometry=geometry), path
@@ -0,0 +1,138 @@
+"""Per-decision search telemetry and the sinks that collect it.
+
+Engines build a Decision after each move they choose and hand it to their
+sink. The default NULL_SINK is disabled, and engines check ``sink.enabled``
+before building a record, so telemetry costs a couple of attribute lookups
+per move when it is off. ``open_sink`` turns a short spec (for example from
+an environment variable) into a sink; the front-ends read ENV_VAR.
+"""
+import math
+import os
+import sys
+from collections import deque
+from typing import NamedTuple, Optional
+
+ENV_VAR = 'GAME_TELEMETRY'
+
+
+def percentile(sorted_values, fraction):
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))]
+
+
+class Decision(NamedTuple):
+    engine: str
+    player: object  # player number in the simulator, label in tac
+    move: Optional[tuple]  # (row, col), None when there was nothing to play
+    evaluation: Optional[float]  # engine's score for the chosen move, None for random moves
+    nodes: int = 0  # positions visited (playouts for MCTS)
+    depth: int = 0  # deepest ply searched
+    cutoffs: int = 0  # alpha-beta cutoffs
+    cache_hits: int = 0
+    cache_misses: int = 0
+    seconds: float = 0.0
+    deadline_missed: bool = False  # the move took longer than its time budget
+
+    @property
+    def cache_hit_rate(self):
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+
+class NullSink:
+    """Discards everything; the default for every engine."""
+    enabled = False
+
+    def record(self, decision):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+NULL_SINK = NullSink()
+
+
+class RingBufferSink(NullSink):
+    """Keep the last ``capacity`` decisions in memory."""
+    enabled = True
+
+    def __init__(self, capacity=1024):
+        self.decisions = deque(maxlen=capacity)
+
+    def __iter__(self):
+        return iter(self.decisions)
+
+    def __len__(self):
+        return len(self.decisions)
+
+    def record(self, decision):
+        self.decisions.append(decision)
+
+    def slowest(self, count=10):
+        """Return the ``count`` slowest decisions still in the buffer, slowest first."""
+        return sorted(self.decisions, key=lambda decision: -decision.seconds)[:count]
+
+
+class JsonLinesSink(NullSink):
+    """Write one JSON object per decision, ``buffer_size`` lines at a time.
+
+    ``target`` is a path (appended to) or an open text stream, which is not
+    closed by ``close()``.
+    """
+    enabled = True
+
+    def __init__(self, target, buffer_size=64):
+        import json  # only paid for when telemetry is actually written
+        self._dumps = json.dumps
+        if isinstance(target, str):
+            self._stream = open(target, 'a')
+            self._owned = True
+        else:
+            self._stream = target
+            self._owned = False
+        self.buffer_size = buffer_size
+        self._lines = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, decision):
+        self._lines.append(self._dumps(decision._asdict()))
+        if len(self._lines) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            self._stream.write('\n'.join(self._lines) + '\n')
+            self._lines.clear()
+        self._stream.flush()
+
+    def close(self):
+        self.flush()
+        if self._owned:
+            self._stream.close()
+
+
+def open_sink(spec):
+    """Return a sink for ``spec``: empty for none, 'ring' for memory, '-' for stdout, else a file path."""
+    if not spec:
+        return NULL_SINK
+    if spec == 'ring':
+        return RingBufferSink()
+    if spec == '-':
+        return JsonLinesSink(sys.stdout, buffer_size=1)
+    return JsonLinesSink(spec)
+
+
+def from_env():
+    """Return the sink named by the ENV_VAR environment variable (disabled when unset)."""
+    return open_sink(os.environ.get(ENV_VAR))
@@ -0,0 +1,179 @@
+"""Headless k-in-a-row game state shared by the tic.py and tac.py front-ends."""
+import time
+from itertools import cycle
+from typing import NamedTuple
+
+from core.alphabeta import AlphaBetaSearch
+from core.rules import rules_for
+from core.telemetry import NULL_SINK, Decision
+
+
+class Player(NamedTuple):
+    label: str
+    color: tuple
+
+
+class Move(NamedTuple):
+    row: int
+    col: int
+    label: str = ""
+    color: tuple = (0, 0, 0)  # Default color is black
+
+
+BOARD_SIZE = 3
+DEFAULT_PLAYERS = (
+    Player(label="X", color=(0, 0, 255)),  # Blue
+    Player(label="O", color=(0, 255, 0)),  # Green
+)
+
+
+class TicTacToeGame:
+    def __init__(self, players=DEFAULT_PLAYERS, board_size=BOARD_SIZE, win_length=None, solution=None,
+                 telemetry=None, engine=None):
+        players = tuple(players)
+        self._players = cycle(players)
+        # Rules and engines number the players 1 and 2 in turn order
+        self._player_ids = {player.label: number for number, player in enumerate(players, 1)}
+        self.board_size = board_size
+        self.win_length = board_size if win_length is None else win_length
+        self.rules = rules_for(board_size, board_size, self.win_length)
+        self._position = self.rules.position()
+        # Anything with AlphaBetaSearch's best_move() and counters, e.g. a core.server.EvaluationClient
+        self._engine = AlphaBetaSearch(board_size, k=self.win_length) if engine is None else engine
+        # Optional core.retrograde.PerfectPlayTable for this board; answers moves without searching
+        if solution is not None and (solution.rows, solution.cols, solution.k) != (
+                board_size, board_size, self.win_length):
+            raise ValueError("perfect-play table does not match the board geometry")
+        self.solution = solution
+        # core.telemetry sink receiving one Decision per get_best_move(); disabled by default
+        self.telemetry = NULL_SINK if telemetry is None else telemetry
+        self.current_player = next(self._players)
+        self.winner_combo = []
+        self._current_moves = []
+        self._has_winner = False
+        self._winning_combos = []
+        self.history = []  # flat cells in the order they were played
+        self._setup_board()
+
+    def _setup_board(self):
+        self._current_moves = [
+            [Move(row, col) for col in range(self.board_size)]
+            for row in range(self.board_size)
+        ]
+        self._winning_combos = self._get_winning_combos()
+
+    def _get_winning_combos(self):
+        return [[divmod(cell, self.board_size) for cell in line] for line in self.rules.lines]
+
+    def toggle_player(self):
+        """Return a toggled player."""
+        self.current_player = next(self._players)
+
+    def is_valid_move(self, move):
+        """Return True if move is valid, and False otherwise."""
+        row, col = move.row, move.col
+        move_was_not_played = self._current_moves[row][col].label == ""
+        no_winner = not self._has_winner
+        return no_winner and move_was_not_played
+
+    def process_move(self, move):
+        """Process the current move and check if it's a win."""
+        row, col = move.row, move.col
+        self._current_moves[row][col] = move
+        cell = row * self.board_size + col
+        self.history.append(cell)
+        # Only the lines through this cell can have been completed by it
+        if self._position.play(cell, self._player_ids[move.label]) and not self._has_winner:
+            self._has_winner = True
+            self.winner_combo = self._winning_combos[self._position.winning_line]
+
+    def has_winner(self):
+        """Return True if the game has a winner, and False otherwise."""
+        return self._has_winner
+
+    def is_tied(self):
+        """Return True if the game is tied, and False otherwise."""
+        return not self._has_winner and self._position.is_full()
+
+    def reset_game(self):
+        """Reset the game state to play again."""
+        for row, row_content in enumerate(self._current_moves):
+            for col, _ in enumerate(row_content):
+                row_content[col] = Move(row, col)
+        self._has_winner = False
+        self.winner_combo = []
+        self.history = []
+        self._position.reset()
+
+    def outcome(self):
+        """Return 0 unless the game is won; else 1 if the first mover won, 2 otherwise."""
+        if not self._has_winner:
+            return 0
+        return 1 if len(self.history) % 2 else 2
+
+    def get_empty_cells(self):
+        """Return a list of empty cells."""
+        position = self._position
+        return [divmod(cell, self.board_size) for cell in sorted(position.empty[:position.free])]
+
+    def minimax(self, depth, is_maximizing, current_player):
+        """Return the game value for ``current_player``: 1 win, -1 loss, 0 draw.
+
+        ``is_maximizing`` is True when ``current_player`` is to move. Moves are
+        made and taken back on the game's Position, so the search allocates
+        nothing per node and the grid in ``_current_moves`` is never touched.
+        """
+        position = self._position
+        if position.winner:
+            return -1 if is_maximizing else 1  # the previous mover won
+        if not position.free:
+            return 0
+        me = self._player_ids[current_player.label]
+        mover = me if is_maximizing else 3 - me
+        win = 1 if is_maximizing else -1
+        best = -win
+        empty = position.empty
+        # takeback() restores empty[:free] exactly, so it can be walked by index
+        index = 0
+        while index < position.free:
+            if position.play(empty[index], mover):
+                score = win
+            elif not position.free:
+                score = 0
+            else:
+                score = self.minimax(depth + 1, not is_maximizing, current_player)
+            position.takeback()
+            if score == win:
+                return win  # nothing beats a win
+            if score > best if is_maximizing else score < best:
+                best = score
+            index += 1
+        return best
+
+    def evaluate_batch(self, positions, players=None):
+        """Score many positions of this board at once; see core.evaluation.evaluate_batch."""
+        from core.evaluation import alphabeta_search, evaluate_batch
+
+        return evaluate_batch(positions, self.board_size, self.board_size, self.win_length, players,
+                              self.solution, alphabeta_search(self._engine))
+
+    def get_best_move(self, current_player, should_stop=None):
+        """Get the best move for the AI; ``should_stop`` can cancel the search."""
+        me = self._player_ids[current_player.label]
+        cells = [0 if player == 0 else 1 if player == me else 2 for player in self._position.cells]
+        start = time.perf_counter()
+        engine = self._engine
+        if self.solution is not None:
+            evaluation, best_move = self.solution.lookup(cells, 1)
+        else:
+            best_move = engine.best_move(cells, 1, should_stop)
+        move = None if best_move is None else divmod(best_move, self.board_size)
+        if self.telemetry.enabled:
+            seconds = time.perf_counter() - start
+            if self.solution is not None:
+                decision = Decision('table', current_player.label, move, evaluation, seconds=seconds)
+            else:
+                decision = Decision('alphabeta', current_player.label, move, engine.score, engine.nodes,
+                                    engine.depth, engine.cutoffs, engine.hits, engine.misses, seconds)
+            self.telemetry.record(decision)
+        return move
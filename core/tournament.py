@@ -0,0 +1,248 @@
+"""Round-robin tournaments between AI configurations across a process pool.
+
+Every ordered pair of engines (first mover, second mover) is split into
+chunks of games. Each chunk is played in a worker with its own RNG seeded
+from (seed, first, second, chunk), so a tournament is reproducible however
+the chunks are scheduled. Finished chunks are recorded in an optional JSON
+checkpoint; rerunning with the same checkpoint skips them.
+
+Engines are looked up by name in ENGINES. Register new ones at import time of
+their module with ``register(name, factory)``; ``factory()`` returns a
+callable ``choose(cells, player, rng) -> flat cell index``.
+"""
+import argparse
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from random import Random
+from typing import NamedTuple
+
+from constants import ROWS, COLS, WIN_LENGTH
+from core.ai import AI, TranspositionTable
+from core.alphabeta import AlphaBetaSearch
+from core.board import SQUARES, Board
+from core.deadline import LEVEL_BUDGETS, Budget, DeadlineSearch
+from core.mcts import MCTS
+from core.rules import rules_for
+
+CELLS = ROWS * COLS
+RULES = rules_for(ROWS, COLS, WIN_LENGTH)
+# CELL_LINES[cell] lists the winning lines through that cell
+CELL_LINES = [[RULES.lines[line] for line in lines] for lines in RULES.cell_lines]
+
+ENGINES = {}
+
+
+def register(name, factory):
+    """Make an engine available to tournaments under ``name``."""
+    ENGINES[name] = factory
+
+
+def _board(cells):
+    board = Board()
+    for cell, value in enumerate(cells):
+        if value:
+            board.mark_square(*SQUARES[cell], value)
+    return board
+
+
+def _simulator_ai(level):
+    def factory():
+        ai = AI(level=level, player=2, table=TranspositionTable())
+
+        def choose(cells, player, rng):
+            if ai.level == 0:
+                return rng.choice([cell for cell, value in enumerate(cells) if not value])
+            # AI.minimax maximizes for player 1 and minimizes for ai.player
+            row, col = ai.minimax(_board(cells), player == 1)[1]
+            return row * COLS + col
+        return choose
+    return factory
+
+
+def _deadline(level):
+    budget = LEVEL_BUDGETS[level]
+    if budget.nodes is not None:
+        # The node limit alone: a time limit would make results depend on the machine's load
+        budget = Budget(nodes=budget.nodes)
+
+    def factory():
+        engine = DeadlineSearch(ROWS, COLS, WIN_LENGTH, budget)
+        return lambda cells, player, rng: engine.best_move(cells, player)
+    return factory
+
+
+def _policy():
+    from core import learning
+    table = learning.load(ROWS, COLS, WIN_LENGTH)
+    fallback = AI(level=1, player=2, table=TranspositionTable())
+
+    def choose(cells, player, rng):
+        board = _board(cells)
+        move = table.lookup_key(board.keys[0], player)[1]
+        if move is not None:
+            return move
+        # Positions self-play never reached are searched, as AI.policy_move does
+        row, col = fallback.minimax(board, player == 1)[1]
+        return row * COLS + col
+    return choose
+
+
+def _alphabeta():
+    engine = AlphaBetaSearch(ROWS, COLS, WIN_LENGTH)
+    return lambda cells, player, rng: engine.best_move(cells, player)
+
+
+def _mcts():
+    engine = MCTS(ROWS, COLS, WIN_LENGTH, playouts=2000)
+
+    def choose(cells, player, rng):
+        engine.rng = rng
+        return engine.best_move(cells, player)
+    return choose
+
+
+register('random', _simulator_ai(0))
+register('minimax', _simulator_ai(1))
+register('alphabeta', _alphabeta)
+register('mcts', _mcts)
+register('deadline3', _deadline(3))
+register('deadline4', _deadline(4))
+register('deadline5', _deadline(5))
+register('policy', _policy)
+
+
+class MatchupResult(NamedTuple):
+    """Outcomes for the first-moving engine of a matchup."""
+    games: int = 0
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+
+    def __add__(self, other):
+        return MatchupResult(*(a + b for a, b in zip(self, other)))
+
+    def interval(self, outcome='wins', z=1.96):
+        """Return the Wilson score interval for the rate of ``outcome``."""
+        if not self.games:
+            return 0.0, 1.0
+        n = self.games
+        p = getattr(self, outcome) / n
+        center = (p + z * z / (2 * n)) / (1 + z * z / n)
+        margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+        return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def play_game(first, second, rng):
+    """Play one game; return 1 if ``first`` wins, 2 if ``second`` wins, 0 for a draw."""
+    cells = [0] * CELLS
+    movers = (None, first, second)
+    player = 1
+    for _ in range(CELLS):
+        cell = movers[player](cells, player, rng)
+        cells[cell] = player
+        for line in CELL_LINES[cell]:
+            if all(cells[i] == player for i in line):
+                return player
+        player = 3 - player
+    return 0
+
+
+def _chunk_key(first, second, chunk):
+    return f'{first}|{second}|{chunk}'
+
+
+def play_chunk(first, second, chunk, games, seed):
+    """Play ``games`` games of ``first`` against ``second``; return a MatchupResult."""
+    rng = Random(f'{seed}:{_chunk_key(first, second, chunk)}')
+    outcomes = [0, 0, 0]
+    # Fresh engines per chunk: a cache warmed by earlier chunks can pick a different
+    # (equally good) move, which would make results depend on scheduling
+    first_engine, second_engine = ENGINES[first](), ENGINES[second]()
+    for _ in range(games):
+        outcomes[play_game(first_engine, second_engine, rng)] += 1
+    return MatchupResult(games, outcomes[1], outcomes[0], outcomes[2])
+
+
+def _load_checkpoint(path, config):
+    if path is None or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        state = json.load(f)
+    if state['config'] != config:
+        raise ValueError(f"checkpoint {path} was written for a different tournament")
+    return state['done']
+
+
+def _save_checkpoint(path, config, done):
+    partial = path + '.tmp'
+    with open(partial, 'w') as f:
+        json.dump({'config': config, 'done': done}, f)
+    os.replace(partial, path)
+
+
+def run_tournament(engines=None, games=1000, chunk_size=100, workers=None, seed=0, checkpoint=None):
+    """Play every ordered pair of ``engines`` and return {(first, second): MatchupResult}."""
+    engines = sorted(ENGINES) if engines is None else list(engines)
+    for name in engines:
+        if name not in ENGINES:
+            raise ValueError(f"unknown engine {name!r}")
+    config = {'engines': engines, 'games': games, 'chunk_size': chunk_size, 'seed': seed}
+    done = _load_checkpoint(checkpoint, config)
+
+    tasks = []
+    for first in engines:
+        for second in engines:
+            for chunk, start in enumerate(range(0, games, chunk_size)):
+                if _chunk_key(first, second, chunk) not in done:
+                    tasks.append((first, second, chunk, min(chunk_size, games - start), seed))
+
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(play_chunk, *task): task for task in tasks}
+            for future in as_completed(futures):
+                first, second, chunk = futures[future][:3]
+                done[_chunk_key(first, second, chunk)] = list(future.result())
+                if checkpoint is not None:
+                    _save_checkpoint(checkpoint, config, done)
+
+    results = {(first, second): MatchupResult() for first in engines for second in engines}
+    for key, counts in done.items():
+        first, second, _ = key.split('|')
+        results[first, second] += MatchupResult(*counts)
+    return results
+
+
+def format_results(results):
+    """Return the win/draw/loss matrix as text, rows moving first."""
+    engines = sorted({first for first, _ in results})
+    width = max(len(name) for name in engines) + 2
+    lines = [' ' * width + ''.join(name.rjust(24) for name in engines)]
+    for first in engines:
+        cells = []
+        for second in engines:
+            result = results[first, second]
+            low, high = result.interval()
+            cells.append(f'{result.wins}/{result.draws}/{result.losses} [{low:.2f}-{high:.2f}]'.rjust(24))
+        lines.append(first.ljust(width) + ''.join(cells))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Play a round-robin tournament between AI engines.')
+    parser.add_argument('engines', nargs='*', default=None)
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--checkpoint', default=None)
+    args = parser.parse_args()
+    results = run_tournament(args.engines or None, args.games, args.chunk_size, args.workers,
+                             args.seed, args.checkpoint)
+    print('wins/draws/losses of the row engine moving first [95% interval on wins]')
+    print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Run AI searches off the UI thread so the event loop keeps responding."""
+import threading
+
+
+class SearchCancelled(Exception):
+    """Raised inside a search when its ``should_stop`` callback returns True."""
+
+
+class AIWorker:
+    """One background search at a time; the event loop polls ``done()`` and collects ``result()``.
+
+    The search callable receives a ``should_stop`` keyword argument and is
+    expected to check it regularly. ``cancel()`` sets it and forgets the
+    search, so its result is never delivered even if it finishes anyway.
+    """
+
+    def __init__(self):
+        # Imported here: concurrent.futures alone would blow the core import budget
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ai-search')
+        self._future = None
+        self._cancel = None
+
+    @property
+    def busy(self):
+        return self._future is not None
+
+    def start(self, search, *args, **kwargs):
+        if self._future is not None:
+            raise RuntimeError("an AI search is already running")
+        self._cancel = threading.Event()
+        self._future = self._executor.submit(search, *args, should_stop=self._cancel.is_set, **kwargs)
+
+    def done(self):
+        return self._future is not None and self._future.done()
+
+    def result(self):
+        """Return the finished search's result (re-raising its error) and become idle."""
+        future, self._future = self._future, None
+        return future.result()
+
+    def cancel(self):
+        if self._future is not None:
+            self._cancel.set()
+            self._future = None
+
+    def shutdown(self):
+        self.cancel()
+        self._executor.shutdown(wait=False)
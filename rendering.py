@@ -0,0 +1,67 @@
+import functools
+
+import pygame
+
+BACKGROUND = (255, 255, 255)
+BORDER = (0, 0, 0)
+
+
+@functools.lru_cache(maxsize=None)
+def cell_geometry(width, height, board_size):
+    """Return (x, y, w, h) of every cell of a board_size x board_size grid, row by row."""
+    cell_width = width // board_size
+    cell_height = height // board_size
+    return tuple(
+        (col * cell_width, row * cell_height, cell_width, cell_height)
+        for row in range(board_size)
+        for col in range(board_size)
+    )
+
+
+class GlyphCache:
+    """Rendered text surfaces, one per (label, color)."""
+
+    def __init__(self, font):
+        self.font = font
+        self._surfaces = {}
+
+    def get(self, label, color):
+        surface = self._surfaces.get((label, color))
+        if surface is None:
+            surface = self._surfaces[label, color] = self.font.render(label, True, color)
+        return surface
+
+
+class GridRenderer:
+    """Draws a grid of labelled cells, redrawing only the cells that change."""
+
+    def __init__(self, screen, board_size, font):
+        self.screen = screen
+        self.board_size = board_size
+        self.cells = [pygame.Rect(cell) for cell in cell_geometry(*screen.get_size(), board_size)]
+        self.glyphs = GlyphCache(font)
+
+    def draw_all(self, moves):
+        """Draw every cell of the ``moves`` grid; return the dirty rectangles."""
+        self.screen.fill(BACKGROUND)
+        for row in moves:
+            for move in row:
+                self.draw_cell(move)
+        return [self.screen.get_rect()]
+
+    def draw_cell(self, move):
+        """Draw the cell of ``move``; return its rectangle."""
+        rect = self.cells[move.row * self.board_size + move.col]
+        self.screen.fill(BACKGROUND, rect)
+        pygame.draw.rect(self.screen, BORDER, rect, 2)
+        if move.label:
+            glyph = self.glyphs.get(move.label, move.color)
+            self.screen.blit(glyph, glyph.get_rect(center=rect.center))
+        return rect
+
+    def cell_at(self, pos):
+        """Return (row, col) of the cell under ``pos``, or None."""
+        for index, cell in enumerate(self.cells):
+            if cell.collidepoint(pos):
+                return divmod(index, self.board_size)
+        return None
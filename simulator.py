@@ -1,13 +1,17 @@
 import pygame
 import sys
-import numpy as np
-import random
-import copy
+
+import core.board
+from core import eventlog, gamerecords, telemetry as telemetry_sinks
+from core.ai import AI, SHARED_TABLE, TranspositionTable  # noqa: F401
+from core.board import WIN_LINES
+from core.worker import AIWorker
 
 # Importing constants from constants.py
 from constants import (WIDTH, HEIGHT,
                        BG_COLOR, ROWS,
                        COLS, SQSIZE,
+                       WIN_LENGTH,
                        LINE_COLOR,
                        LINE_WIDTH,
                        CIRCLE_COLOR,
@@ -18,174 +22,80 @@ from constants import (WIDTH, HEIGHT,
                        OFFSET)
 
 
-# Initialize the game
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('Cancer Treatment Decision Simulator')
-screen.fill(BG_COLOR)
+CAPTION = 'Cancer Treatment Decision Simulator'
+POLL_MS = 16  # how often the event loop checks on a running AI search
+
+screen = None  # created by init_display() when a window is actually needed
+figures = {}  # player -> pre-rendered cross or circle, one square in size
+telemetry = telemetry_sinks.NULL_SINK  # set by main() from the GAME_TELEMETRY environment variable
+event_log = None  # core.eventlog.EventLogWriter when GAME_EVENT_LOG names a file
+game_records = None  # core.gamerecords.GameRecordWriter when GAME_RECORDS names a file
+
+
+def render_figures():
+    # Drawn once and blitted per move instead of re-drawing the lines every time
+    cross = pygame.Surface((SQSIZE, SQSIZE), pygame.SRCALPHA)
+    pygame.draw.line(cross, CROSS_COLOR, (OFFSET, OFFSET), (SQSIZE - OFFSET, SQSIZE - OFFSET), CROSS_WIDTH)
+    pygame.draw.line(cross, CROSS_COLOR, (OFFSET, SQSIZE - OFFSET), (SQSIZE - OFFSET, OFFSET), CROSS_WIDTH)
+    circle = pygame.Surface((SQSIZE, SQSIZE), pygame.SRCALPHA)
+    pygame.draw.circle(circle, CIRCLE_COLOR, (SQSIZE // 2, SQSIZE // 2), RADIUS, CIRCLE_WIDTH)
+    return {1: cross, 2: circle}
 
 
-class Board:
+def init_display():
+    global screen, figures
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(CAPTION)
+    screen.fill(BG_COLOR)
+    figures = render_figures()
+    return screen
+
+
+class Board(core.board.Board):
+    '''Board that draws the winning line on the simulator window when asked to show it'''
+
     def __init__(self):
-        # Create a 3x3 matrix of zeros to represent initial state of the board
-        self.squares = np.zeros((ROWS, COLS))
-        self.empty_squares = self.squares  # [list of empty squares]
-        self.marked_squares = 0  # To keep track of the number of marked squares
-
-    # final_state method
-    def final_state(self, show=False):
-        '''
-          @return 0 if no player has won
-          @return 1 if player 1 has won
-          @return 2 if player 2 has won
-        '''
- 
-        # vertical win
-        for col in range(COLS):
-            if self.squares[0][col] == self.squares[1][col] == self.squares[2][col] != 0:
-                if show:
-                    color = CIRCLE_COLOR if self.squares[0][col] == 2 else CROSS_COLOR
-                    iPos = (col * SQSIZE + SQSIZE // 2, 20)
-                    fPos = (col * SQSIZE + SQSIZE // 2, HEIGHT - 20)
-                    pygame.draw.line(screen, color, iPos, fPos, LINE_WIDTH)
-                return self.squares[0][col]
-            
-        # horizontal win
-        for row in range(ROWS):
-            if self.squares[row][0] == self.squares[row][1] == self.squares[row][2] != 0:
-                if show:
-                    color = CIRCLE_COLOR if self.squares[row][0] == 2 else CROSS_COLOR
-                    iPos = (20, row * SQSIZE + SQSIZE // 2)
-                    fPos = (WIDTH - 20, row * SQSIZE + SQSIZE // 2)
-                    pygame.draw.line(screen, color, iPos, fPos, CROSS_WIDTH)
-                return self.squares[row][0]
-  
-        # desc diagonal win
-        if self.squares[0][0] == self.squares[1][1] == self.squares[2][2] != 0:
-            if self.squares[row][0] == self.squares[row][1] == self.squares[row][2] != 0:
-                if show:
-                    color = CIRCLE_COLOR if self.squares[1][1] == 2 else CROSS_COLOR
-                    iPos = (20, 20)
-                    fPos = (WIDTH - 20, HEIGHT - 20)
-                    pygame.draw.line(screen, color, iPos, fPos, CROSS_WIDTH)
-            return self.squares[1][1]
-  
-        # asc diagonal win
-        if self.squares[2][0] == self.squares[1][1] == self.squares[0][2] != 0:
-            if show:
-                color = CIRCLE_COLOR if self.squares[1][1] == 2 else CROSS_COLOR
-                iPos = (20, HEIGHT - 20)
-                fPos = (WIDTH - 20, 20)
-                pygame.draw.line(screen, color, iPos, fPos, CROSS_WIDTH)
-            return self.squares[1][1]
-
-        return 0
-
-    def mark_square(self, row, col, player):
-        self.squares[row][col] = player
-        self.marked_squares += 1  # Indicates when the board is full
-
-    def empty_square(self, row, col):
-        return self.squares[row][col] == 0
-
-    def get_empty_squares(self):
-        return [(i, j) for i in range(3) for j in range(3) if self.squares[i][j] == 0]  # Return a list of empty squares
-
-    # def get_empty_sq(self):
-    #     empty_sqrs = []
-    #     for row in range(ROWS):
-    #         for col in range(COLS):
-    #             if self.squares[row][col] == 0:
-    #                 empty_sqrs.append((row, col))
-    #     return empty_sqrs
-
-    def is_full(self):
-        return self.marked_squares == 9  # check if the board is full
-
-    def is_empty(self):
-        return self.marked_squares == 0  # check if the board is empty
-
-
-class AI:
-    def __init__(self, level=1, player=2):
-        self.level = level
-        self.player = player
-        
-    def random_move(self, board):
-        empty_squares = board.get_empty_squares()
-        index = random.randrange(0, len(empty_squares))
-        return empty_squares[index]  # (row, col)
-    
-    # Minimax algorithm
-    def minimax(self, board, is_maximizing):
-        # Check terminal cases
-        case = board.final_state()
-        # player 1 wins
-        if case == 1:
-            return 1, None  # evaluate the move
-        # player 2 wins AI
-        elif case == 2:
-            return -1, None  # evaluate the move
-        # draw
-        elif board.is_full():
-            return 0, None  # evaluate the move
-        
-        # Maximizing player
-        if is_maximizing:
-            max_score = -1000
-            best_move = None
-            empty_sqrs = board.get_empty_squares()
-            for row, col in empty_sqrs:
-                temp_board = copy.deepcopy(board)
-                temp_board.mark_square(row, col, 1)
-                eval = self.minimax(temp_board, False)[0]
-                if eval > max_score:
-                    max_score = eval
-                    best_move = (row, col)
-            return max_score, best_move
-        
-        # Minimizing player
-        elif not is_maximizing:
-            min_score = 1000
-            best_move = None
-            empty_sqrs = board.get_empty_squares()
-            for row, col in empty_sqrs:
-                temp_board = copy.deepcopy(board)
-                temp_board.mark_square(row, col, self.player)
-                eval = self.minimax(temp_board, True)[0]
-                if eval < min_score:
-                    min_score = eval
-                    best_move = (row, col)
-            return min_score, best_move
-        
-    def evaluate(self, main_board):
-        if self.level == 0:
-            move = self.random_move(main_board)
-        else:
-            evaluate, move = self.minimax(main_board, False)
-        print(f"Cancer has chosen to mark the square in pos {move} with the evaluation of {evaluate}")
-        return move  # (row, col)
+        super().__init__()
+        self.dirty = []  # screen areas drawn since the last Game.flip()
+
+    def show_win(self, player, line):
+        cells = WIN_LINES[line]
+        (first_row, first_col), (last_row, last_col) = divmod(cells[0], COLS), divmod(cells[-1], COLS)
+        color = CIRCLE_COLOR if player == 2 else CROSS_COLOR
+        width = LINE_WIDTH if first_col == last_col else CROSS_WIDTH
+        # Run from the first square to the last, stopping 20px short of their outer edges
+        step_x = (last_col > first_col) - (last_col < first_col)
+        step_y = (last_row > first_row) - (last_row < first_row)
+        reach = SQSIZE // 2 - 20
+        iPos = (first_col * SQSIZE + SQSIZE // 2 - step_x * reach,
+                first_row * SQSIZE + SQSIZE // 2 - step_y * reach)
+        fPos = (last_col * SQSIZE + SQSIZE // 2 + step_x * reach,
+                last_row * SQSIZE + SQSIZE // 2 + step_y * reach)
+        self.dirty.append(pygame.draw.line(screen, color, iPos, fPos, width))
 
 
 class Game:
     def __init__(self):
         self.board = Board()
-        self.ai = AI()
+        self.ai = AI(telemetry=telemetry)
         self.player = 1  # player 1-cross #2-circles # set 1 for player 1 to start or 2 for AI to start
         self.game_mode = 'ai'  # playerVSai or playerVSplayer
         self.running = True
         self.draw_lines()
         self._has_winner = False
         self.patient_profile = {}  # Initialize an empty patient profile
+        self.game_id = None if event_log is None else event_log.new_game()
         
-    def make_move(self, row, col):
+    def make_move(self, row, col, evaluation=None):
         # Simulate the treatment decision
         self.update_patient_profile(row, col)
+        if event_log is not None:
+            event_log.append(self.game_id, self.board.marked_squares, self.player, row * COLS + col, evaluation)
         self.board.mark_square(row, col, self.player)
         self.draw_fig(row, col)
         self.next_turn()
         self.process_move()  # Check if the game is over after each move
-        print(f"Doctor {self.player} has marked the square in pos {row, col}")
         
     def update_patient_profile(self, row, col):
         # Simulate updating the patient profile based on treatment decision
@@ -194,17 +104,27 @@ class Game:
     def process_move(self):
         if self.has_winner():
             self.running = False
+            self.record_game()
             print(f"Cancer Treatment has been decided for patient {self.player}!")
             # Display patient profile and outcome message
             self.display_patient_profile()
             self.display_outcome_message()
         elif self.is_tied():
             self.running = False
+            self.record_game()
             print(f"Patient {self.player} has been diagnosed with cancer!")
             # Display patient profile and outcome message
             self.display_patient_profile()
             self.display_outcome_message()
             
+    def record_game(self):
+        # The profile keeps the squares in the order they were treated; player 1 always starts
+        if game_records is not None:
+            moves = [row * COLS + col for row, col in self.patient_profile]
+            config = gamerecords.config_id(ROWS, COLS, WIN_LENGTH)
+            level = self.ai.level if self.game_mode == 'ai' else gamerecords.NO_AI
+            game_records.append(moves, self.board.final_state(), config, level, starter=1)
+
     def display_patient_profile(self):
         print("Patient Profile:")
         for move, decision in self.patient_profile.items():
@@ -234,22 +154,16 @@ class Game:
 
         pygame.display.update()
 
+    def flip(self):
+        # Push only the areas drawn since the last flip to the window
+        if self.board.dirty:
+            pygame.display.update(self.board.dirty)
+            self.board.dirty = []
+
     def draw_fig(self, row, col):
-        if self.player == 1:
-            # draw cross
-            # descending line
-            start_desc = (col * SQSIZE + OFFSET, row * SQSIZE + OFFSET)
-            end_desc = (col * SQSIZE + SQSIZE - OFFSET, row * SQSIZE + SQSIZE - OFFSET)
-            pygame.draw.line(screen, CROSS_COLOR, start_desc, end_desc, CROSS_WIDTH)
-
-            # ascending line
-            start_asc = (col * SQSIZE + OFFSET, row * SQSIZE + SQSIZE - OFFSET)
-            end_asc = (col * SQSIZE + SQSIZE - OFFSET, row * SQSIZE + OFFSET)
-            pygame.draw.line(screen, CROSS_COLOR, start_asc, end_asc, CROSS_WIDTH)
-
-        elif self.player == 2:
-            center = (col * WIDTH / COLS + WIDTH / COLS // 2, row * HEIGHT / ROWS + HEIGHT / ROWS // 2)
-            pygame.draw.circle(screen, CIRCLE_COLOR, center, RADIUS, CIRCLE_WIDTH)
+        # player 1 draws a cross, player 2 a circle
+        if self.player in figures:
+            self.board.dirty.append(screen.blit(figures[self.player], (col * SQSIZE, row * SQSIZE)))
 
     def next_turn(self):
         self.player = self.player % 2 + 1
@@ -267,6 +181,7 @@ class Game:
 
 # Main loop
 def main():
+    global telemetry, event_log, game_records
     
     # Welcome message and rules explanation
     print("\033[1m\033[95mWelcome to the Treatment Decision Simulator!\033[0m")
@@ -280,60 +195,96 @@ def main():
     print("\033[92mif no winner, press '\033[97mr\033[92m' to reset the game.\033[0m")
     print("\033[92mGame mode can also be changed to Doctor vs Doctor by clicking '\033[97mg\033[92m'.\033[0m")
     print("\033[92mPress '\033[97m0\033[92m' to change AI's level to random.\033[0m")
+    print("\033[92mPress '\033[97m1\033[92m' for minimax or '\033[97m2\033[92m' for Monte Carlo tree search.\033[0m")
+    print("\033[92mPress '\033[97m3\033[92m', '\033[97m4\033[92m' or '\033[97m5\033[92m' for a time-boxed AI, from quick to thorough.\033[0m")
+    print("\033[92mPress '\033[97m6\033[92m' for an AI playing from a table learned by self-play.\033[0m")
     
+    init_display()
+    telemetry = telemetry_sinks.from_env()
+    event_log = eventlog.from_env()
+    game_records = gamerecords.from_env(ROWS * COLS)
     game = Game()
     board = game.board
     ai = game.ai
+    worker = AIWorker()  # the AI thinks on this thread while the window keeps responding
     
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-                
-                # Change game mode.
-            if event.type == pygame.KEYDOWN:
-                
-                # sets game to player vs player mode
-                if event.key == pygame.K_g:
-                    game.change_game_mode()
-                    
-                # Resets the screen to start new game
-                if event.key == pygame.K_r:
-                    game.reset()
-                    board = game.board
-                    ai = game.ai
-                    
-                # change AI's level
-                if event.type == pygame.K_0:
-                    ai.level = 0
-                    
-                # 1-random AI
-                if event.key == pygame.K_1:
-                    ai.level = 1
-                    
-            # Human marking cells
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                # Get the position of the mouse
-                pos = event.pos
-                row = pos[1] // SQSIZE
-                col = pos[0] // SQSIZE
-
-                if board.empty_square(row, col) and game.running:
-                    game.make_move(row, col)
-                    
-                    if game.isOver():
-                        game.running = False
-         
-        # AI marking cells
-        if game.game_mode == 'ai' and game.player == ai.player and game.running:
-            pygame.display.update()
-            row, col = ai.evaluate(board)
-            game.make_move(row, col)
+        # AI marking cells: start a search on a copy of the board, then poll for its move
+        if game.game_mode == 'ai' and game.player == ai.player and game.running and not worker.busy:
+            worker.start(ai.evaluate, board.copy())
+            pygame.display.set_caption(CAPTION + ' - cancer is thinking...')
+        elif worker.done():
+            row, col = worker.result()
+            pygame.display.set_caption(CAPTION)
+            game.make_move(row, col, ai.last_evaluation)
             if game.isOver():
                 game.running = False
-                           
-        pygame.display.update()
+            game.flip()
+            continue
+
+        # Sleep until the next input event, waking up regularly while the AI thinks
+        event = pygame.event.wait(POLL_MS if worker.busy else 0)
+        if event.type == pygame.QUIT:
+            worker.shutdown()
+            telemetry.close()
+            if event_log is not None:
+                event_log.close()
+            if game_records is not None:
+                game_records.close()
+            pygame.quit()
+            sys.exit()
+
+        # Change game mode.
+        if event.type == pygame.KEYDOWN:
+
+            # sets game to player vs player mode
+            if event.key == pygame.K_g:
+                worker.cancel()
+                pygame.display.set_caption(CAPTION)
+                game.change_game_mode()
+
+            # Resets the screen to start new game
+            if event.key == pygame.K_r:
+                worker.cancel()
+                pygame.display.set_caption(CAPTION)
+                game.reset()
+                board = game.board
+                ai = game.ai
+
+            # change AI's level
+            if event.key == pygame.K_0:
+                ai.level = 0
+
+            # 1-minimax AI
+            if event.key == pygame.K_1:
+                ai.level = 1
+
+            # 2-Monte Carlo tree search AI
+            if event.key == pygame.K_2:
+                ai.level = 2
+
+            # 3 to 5-alpha-beta within a time and node budget per move
+            if event.key in (pygame.K_3, pygame.K_4, pygame.K_5):
+                ai.level = event.key - pygame.K_0
+
+            # 6-moves looked up in the table learned by self-play
+            if event.key == pygame.K_6:
+                ai.level = 6
+
+        # Human marking cells
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            # Get the position of the mouse
+            pos = event.pos
+            row = pos[1] // SQSIZE
+            col = pos[0] // SQSIZE
+
+            if board.empty_square(row, col) and game.running and not worker.busy:
+                game.make_move(row, col)
+
+                if game.isOver():
+                    game.running = False
 
+        game.flip()
 
-main()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Exhaustive reference solver for small boards, used to cross-check the engines."""
+from functools import lru_cache
+
+from core.rules import winning_lines
+
+
+def make_solver(rows, cols, k):
+    lines = winning_lines(rows, cols, k)
+
+    def won(cells, player):
+        return any(all(cells[i] == player for i in line) for line in lines)
+
+    @lru_cache(maxsize=None)
+    def solve(cells, player):
+        """Return +1/0/-1 for ``player`` to move on the flat tuple ``cells``."""
+        best = -2
+        for index, value in enumerate(cells):
+            if value:
+                continue
+            child = cells[:index] + (player,) + cells[index + 1:]
+            if won(child, player):
+                return 1
+            best = max(best, 0 if all(child) else -solve(child, 3 - player))
+        return best
+
+    def value_after(cells, index, player):
+        """Return the value for ``player`` of playing ``index`` on ``cells``."""
+        child = cells[:index] + (player,) + cells[index + 1:]
+        if won(child, player):
+            return 1
+        return 0 if all(child) else -solve(child, 3 - player)
+
+    return won, solve, value_after
+
+
+def random_positions(rng, rows, cols, k, count, max_moves=6):
+    """Yield (cells, player to move) for random non-terminal positions."""
+    won, _, _ = make_solver(rows, cols, k)
+    produced = 0
+    while produced < count:
+        cells = [0] * (rows * cols)
+        player = 1
+        for _ in range(rng.randint(0, max_moves)):
+            index = rng.choice([i for i, value in enumerate(cells) if not value])
+            cells[index] = player
+            player = 3 - player
+            if won(cells, 3 - player) or all(cells):
+                break
+        else:
+            produced += 1
+            yield tuple(cells), player
@@ -0,0 +1,50 @@
+import random
+
+from core.ai import AI, TranspositionTable
+from core.board import Board
+from solver import make_solver, random_positions
+
+
+def to_board(cells):
+    board = Board()
+    for index, value in enumerate(cells):
+        if value:
+            board.mark_square(index // 3, index % 3, value)
+    return board
+
+
+def test_minimax_matches_exhaustive_solver():
+    # AI.minimax scores positions for player 1: +1 when player 1 wins
+    _, solve, value_after = make_solver(3, 3, 3)
+    ai = AI(table=TranspositionTable())
+    for cells, player in random_positions(random.Random(11), 3, 3, 3, 200):
+        board = to_board(cells)
+        score, (row, col) = ai.minimax(board, player == 1)
+        expected = solve(cells, player)
+        assert score == (expected if player == 1 else -expected)
+        assert value_after(cells, row * 3 + col, player) == expected
+        assert to_board(cells).bits == board.bits
+
+
+def test_cached_moves_map_back_from_the_canonical_frame():
+    # Warm the table on one orientation, then ask for every rotation and reflection
+    _, solve, value_after = make_solver(3, 3, 3)
+    ai = AI(table=TranspositionTable())
+    cells = (1, 0, 0,
+             0, 2, 0,
+             0, 0, 1)
+    variants = {cells, cells[::-1], tuple(cells[c * 3 + r] for r in range(3) for c in range(3))}
+    variants |= {tuple(v[r * 3 + 2 - c] for r in range(3) for c in range(3)) for v in list(variants)}
+    for variant in variants:
+        _, (row, col) = ai.minimax(to_board(variant), False)
+        assert value_after(variant, row * 3 + col, 2) == solve(variant, 2)
+    assert ai.table.hits > 0
+
+
+def test_table_is_bounded_and_counts_lookups():
+    table = TranspositionTable(maxsize=50)
+    ai = AI(table=table)
+    ai.minimax(Board(), False)
+    stats = table.stats()
+    assert stats['size'] == len(table) <= 50
+    assert stats['misses'] > 0
@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+from core.alphabeta import WIN_SCORE, AlphaBetaSearch
+from solver import make_solver, random_positions
+
+
+def sign(score):
+    return (score > 0) - (score < 0)
+
+
+def test_best_move_matches_exhaustive_solver_on_3x3():
+    _, solve, value_after = make_solver(3, 3, 3)
+    engine = AlphaBetaSearch(3)
+    for cells, player in random_positions(random.Random(7), 3, 3, 3, 200):
+        move = engine.best_move(list(cells), player)
+        expected = solve(cells, player)
+        assert sign(engine.score) == expected
+        assert value_after(cells, move, player) == expected
+
+
+def test_prefers_the_fastest_win():
+    # X can win now at cell 2, or later elsewhere
+    cells = [1, 1, 0,
+             2, 2, 0,
+             0, 0, 0]
+    engine = AlphaBetaSearch(3)
+    assert engine.best_move(cells, 1) == 2
+    assert engine.score == WIN_SCORE - 1
+
+
+def test_table_stays_within_bound():
+    engine = AlphaBetaSearch(4, k=4, max_table_size=500)
+    engine.best_move([0] * 16, 1)
+    assert len(engine.table) <= 500
+
+
+def test_rejects_win_length_longer_than_board():
+    with pytest.raises(ValueError):
+        AlphaBetaSearch(3, k=4)
@@ -0,0 +1,90 @@
+from collections import Counter
+from random import Random
+
+import pytest
+
+from core.rules import winning_lines
+from core.analytics import OutcomeStats, analyze, analyze_range
+from core.gamerecords import GameRecordWriter, config_id
+
+CONFIG = config_id(3, 3, 3)
+LINES = winning_lines(3, 3, 3)
+
+
+def random_games(count, seed=0):
+    rng = Random(seed)
+    games = []
+    for index in range(count):
+        starter = 1 + index % 2
+        cells = rng.sample(range(9), 9)
+        board = [0] * 9
+        result = 0
+        for ply, cell in enumerate(cells):
+            player = starter if ply % 2 == 0 else 3 - starter
+            board[cell] = player
+            if any(all(board[i] == player for i in line) for line in LINES):
+                result = player
+                break
+        games.append((cells[:ply + 1], result, index % 3, starter))
+    return games
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    path = str(tmp_path / 'games.bin')
+    games = random_games(600)
+    with GameRecordWriter(path) as writer:
+        for moves, result, level, starter in games:
+            writer.append(moves, result, CONFIG, level, starter)
+    return path, games
+
+
+def test_counts_match_a_direct_tally(dataset):
+    path, games = dataset
+    stats = analyze(path, chunk_size=64)
+    group = stats.groups[1, 2]
+    selected = [game for game in games if game[2:] == (1, 2)]
+    assert group.games == len(selected)
+    first_moves = Counter(moves[0] for moves, *_ in selected)
+    assert {cell: int(group.openings[cell].sum()) for cell in first_moves} == dict(first_moves)
+    assert sorted(group.lengths.sum(axis=1).nonzero()[0]) == sorted({len(moves) for moves, *_ in selected})
+
+    positions = Counter()
+    for moves, result, _, starter in selected:
+        key = 0
+        positions[key] += 1
+        for ply, cell in enumerate(moves):
+            key += (starter if ply % 2 == 0 else 3 - starter) * 3 ** cell
+            positions[key] += 1
+    assert group.positions == positions
+
+    decisive = [game for game in selected if game[1]]
+    winner_cells = Counter(cell for moves, result, _, starter in decisive
+                           for ply, cell in enumerate(moves) if (ply % 2 == 0) == (result == starter))
+    assert group.decisive == len(decisive)
+    assert group.winner_cells.tolist() == [winner_cells[cell] for cell in range(9)]
+
+
+def test_partial_results_merge_to_the_whole(dataset):
+    path, games = dataset
+    whole = analyze_range(path, CONFIG, 0, len(games))
+    merged = analyze_range(path, CONFIG, 0, 250) + analyze_range(path, CONFIG, 250, len(games))
+    pooled = analyze(path, workers=2)
+    assert set(merged.groups) == set(whole.groups)
+    for key, group in whole.groups.items():
+        assert (merged.groups[key].openings == group.openings).all()
+        assert merged.groups[key].positions == group.positions
+        assert (pooled.groups[key].lengths == group.lengths).all()
+    assert merged.total().games == len(games)
+
+
+def test_rejects_mixed_geometries(tmp_path):
+    path = str(tmp_path / 'games.bin')
+    with GameRecordWriter(path) as writer:
+        writer.append([0, 1, 2], 0, CONFIG)
+        writer.append([0, 1, 2], 0, config_id(3, 3, 2))
+    with pytest.raises(ValueError):
+        analyze(path)
+    assert analyze(path, config=CONFIG).total().games == 1
+    with pytest.raises(ValueError):
+        OutcomeStats(3, 3, 3) + OutcomeStats(3, 3, 2)
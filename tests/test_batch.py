@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from core.ai import AI
+from core.batch import BatchResult, TablePolicy, policy_for, random_policy, simulate, winners
+from core.retrograde import PerfectPlayTable, build_table
+
+
+@pytest.fixture(scope="module")
+def solution(tmp_path_factory):
+    path = build_table(str(tmp_path_factory.mktemp("tables") / "perfect.npy"), 3, 3, 3)
+    return PerfectPlayTable(path, 3, 3, 3)
+
+
+def test_winners_uses_every_line():
+    boards = np.array([
+        [1, 1, 1, 0, 0, 0, 0, 0, 0],
+        [1, 0, 0, 1, 0, 0, 1, 0, 0],
+        [0, 0, 1, 0, 1, 0, 1, 0, 0],
+        [1, 1, 0, 0, 0, 1, 0, 0, 0],
+    ], dtype=np.int8)
+    assert winners(boards, 1).tolist() == [True, True, True, False]
+
+
+def test_random_self_play_matches_known_outcome_rates():
+    # Uniform random play: X wins ~58.5%, O ~28.8%, draws ~12.7% of games
+    result = simulate(200_000, seed=3)
+    assert result.games == result.player1_wins + result.player2_wins + result.draws
+    assert result.player1_wins / result.games == pytest.approx(0.585, abs=0.01)
+    assert result.player2_wins / result.games == pytest.approx(0.288, abs=0.01)
+
+
+def test_perfect_play_never_loses(solution):
+    perfect = TablePolicy(solution)
+    assert simulate(10_000, (perfect, perfect), seed=1) == BatchResult(10_000, 0, 0, 10_000)
+    as_second = simulate(10_000, (random_policy, perfect), seed=2)
+    assert as_second.player1_wins == 0
+
+
+def test_policy_for_follows_ai_level(solution):
+    assert policy_for(AI(level=0)) is random_policy
+    assert isinstance(policy_for(AI(level=1), solution), TablePolicy)
+
+
+def test_chunking_does_not_change_totals():
+    assert simulate(1000, seed=4, chunk_size=128).games == 1000
@@ -0,0 +1,37 @@
+from core import bench
+from core.rules import winning_lines
+
+
+def test_corpus_positions_are_unfinished():
+    for size, positions in bench.CORPUS.items():
+        for moves in positions.values():
+            assert len(set(moves)) == len(moves)
+            cells = bench._cells(size, moves)
+            for line in winning_lines(size, size, size):
+                assert not any(all(cells[i] == player for i in line) for player in (1, 2))
+
+
+def test_every_baselined_case_still_exists():
+    assert set(bench.load_baseline()) == set(bench.cases())
+
+
+def test_run_reports_nodes_and_memory():
+    results = bench.run('3x3/endgame', repeats=1)
+    assert 'simulator.minimax/3x3/endgame' in results
+    for result in results.values():
+        assert result.seconds > 0 and result.nodes >= 1 and result.peak_kib > 0
+
+
+def test_compare_flags_only_regressions_past_the_threshold():
+    baseline = {'case': {'seconds': 1.0, 'nodes': 10, 'peak_kib': 1000.0, 'retained_blocks': 0}}
+    assert not bench.compare({'case': bench.BenchResult(1.4, 10, 1000.0, 0)}, baseline)
+    assert len(bench.compare({'case': bench.BenchResult(1.6, 10, 1600.0, 0)}, baseline)) == 2
+    assert not bench.compare({'new case': bench.BenchResult(9.0, 10, 9000.0, 0)}, baseline)
+
+
+def test_scaling_reports_a_speedup_per_worker_count():
+    results = bench.scaling('4x4/midgame', worker_counts=[1, 2], repeats=1)
+    serial_seconds, rows = results['best_move/4x4/midgame']
+    assert serial_seconds > 0
+    assert [row.workers for row in rows] == [1, 2]
+    assert all(row.same_move and row.speedup > 0 for row in rows)
@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from core.board import Board
+
+
+def test_final_state_detects_every_line():
+    lines = [
+        [(0, 0), (1, 0), (2, 0)],
+        [(0, 2), (1, 2), (2, 2)],
+        [(1, 0), (1, 1), (1, 2)],
+        [(0, 0), (1, 1), (2, 2)],
+        [(2, 0), (1, 1), (0, 2)],
+    ]
+    for player in (1, 2):
+        for line in lines:
+            board = Board()
+            for row, col in line:
+                assert board.final_state() == 0
+                board.mark_square(row, col, player)
+            assert board.final_state() == player
+
+
+def test_empty_squares_track_marks():
+    board = Board()
+    board.mark_square(1, 1, 1)
+    board.mark_square(0, 2, 2)
+    assert (1, 1) not in board.get_empty_squares()
+    assert len(board.get_empty_squares()) == 7
+    assert not board.empty_square(0, 2)
+    assert board.squares[0][2] == 2
+
+
+def test_squares_view_is_read_only():
+    board = Board()
+    with pytest.raises(ValueError):
+        board.squares[0][0] = 1
+
+
+def test_unmark_restores_position():
+    rng = random.Random(3)
+    board = Board()
+    start = list(board.bits)
+    moves = []
+    for player in (1, 2, 1, 2):
+        row, col = rng.choice(board.get_empty_squares())
+        board.mark_square(row, col, player)
+        moves.append((row, col, player))
+    for row, col, player in reversed(moves):
+        board.unmark_square(row, col, player)
+    assert board.bits == start
+    assert board.is_empty()
+
+
+def test_unmark_restores_symmetry_keys():
+    board = Board()
+    keys = board.keys
+    board.mark_square(0, 1, 1)
+    board.mark_square(2, 2, 2)
+    assert board.keys is keys
+    board.unmark_square(2, 2, 2)
+    board.unmark_square(0, 1, 1)
+    assert board.keys == [0] * len(keys)
+
+
+def test_symmetric_positions_share_a_canonical_key():
+    corners = [(0, 0), (0, 2), (2, 0), (2, 2)]
+    keys = set()
+    for row, col in corners:
+        board = Board()
+        board.mark_square(row, col, 1)
+        keys.add(board.canonical_key()[0])
+    assert len(keys) == 1
@@ -0,0 +1,67 @@
+import pytest
+
+from core.ai import AI, TranspositionTable
+from core.alphabeta import AlphaBetaSearch
+from core.board import Board
+from core.deadline import Budget, DeadlineSearch
+from core.telemetry import RingBufferSink
+from core.worker import SearchCancelled
+
+
+def test_node_budget_returns_the_last_completed_iteration():
+    search = DeadlineSearch(5, budget=Budget(nodes=3000))
+    move = search.best_move([0] * 25, 1)
+    assert search.interrupted and search.depth >= 1
+    assert move == AlphaBetaSearch(5, max_depth=search.depth).best_move([0] * 25, 1)
+    # Node budgets do not depend on the machine
+    assert DeadlineSearch(5, budget=Budget(nodes=3000)).best_move([0] * 25, 1) == move
+
+
+def test_time_budget_holds_on_a_large_board():
+    search = DeadlineSearch(15, k=5, budget=Budget(seconds=0.05))
+    cells = [0] * 225
+    for player in (1, 2, 1, 2):
+        move = search.best_move(cells, player)
+        assert cells[move] == 0
+        cells[move] = player
+    stats = search.stats()
+    assert stats['moves'] == 4
+    assert stats['latency_ms']['max'] < 150  # the budget plus scheduling noise, not a fixed-depth search
+
+
+def test_small_boards_are_solved_within_the_budget():
+    search = DeadlineSearch(3, budget=Budget(seconds=5))
+    assert search.best_move([1, 1, 0, 2, 2, 0, 0, 0, 0], 1) == 2
+    assert not search.interrupted and not search.deadline_missed and search.evaluation() == 1
+
+
+def test_should_stop_still_cancels():
+    search = DeadlineSearch(5, budget=Budget(seconds=5))
+    with pytest.raises(SearchCancelled):
+        search.best_move([0] * 25, 1, should_stop=lambda: True)
+
+
+def test_mcts_gets_the_budget_as_playouts():
+    search = DeadlineSearch(3, budget=Budget(nodes=200), engine='mcts', seed=1)
+    move = search.best_move([0] * 9, 1)
+    assert 0 <= move < 9 and search.nodes == 200 and -1 <= search.evaluation() <= 1
+
+
+def test_budget_needs_a_limit():
+    with pytest.raises(ValueError):
+        DeadlineSearch(3, budget=Budget())
+
+
+def test_ai_levels_from_three_use_the_deadline_search():
+    sink = RingBufferSink()
+    ai = AI(level=3, table=TranspositionTable(), telemetry=sink)
+    board = Board()
+    board.mark_square(1, 1, 1)
+    row, col = ai.evaluate(board)
+    assert board.empty_square(row, col)
+    assert ai.deadline.moves == 1 and -1 <= ai.last_evaluation <= 1
+    # Telemetry reports the deadline search's own counters
+    search, (decision,) = ai.deadline, sink
+    assert decision.engine == 'deadline' and decision.cutoffs == search.cutoffs > 0
+    assert (decision.cache_hits, decision.cache_misses) == (search.hits, search.misses)
+    assert decision.deadline_missed == search.deadline_missed
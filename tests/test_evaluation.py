@@ -0,0 +1,78 @@
+from random import Random
+
+import numpy as np
+import pytest
+
+from core.ai import AI, TranspositionTable
+from core.evaluation import as_cells, evaluate_batch, pack, side_to_move
+from core.retrograde import PerfectPlayTable, build_table
+from core.tictactoe import TicTacToeGame
+from solver import make_solver, random_positions
+
+
+@pytest.fixture(scope="module")
+def solution(tmp_path_factory):
+    path = build_table(str(tmp_path_factory.mktemp("tables") / "perfect.npy"), 3, 3, 3)
+    return PerfectPlayTable(path, 3, 3, 3)
+
+
+@pytest.fixture(scope="module")
+def positions():
+    return np.array([cells for cells, _ in random_positions(Random(3), 3, 3, 3, 200)], dtype=np.int8)
+
+
+def check_against_solver(evaluation, positions, rows=3, cols=3, k=3):
+    _, solve, value_after = make_solver(rows, cols, k)
+    for cells, move, value, player in zip(positions.tolist(), evaluation.moves, evaluation.values,
+                                          side_to_move(positions).tolist()):
+        best = solve(tuple(cells), player)
+        assert value == best
+        assert value_after(tuple(cells), int(move), player) == best
+
+
+def test_packed_and_board_shaped_inputs_agree(positions):
+    keys = pack(positions)
+    assert (as_cells(keys, 9) == positions).all()
+    assert (as_cells(positions.reshape(-1, 3, 3), 9) == positions).all()
+
+
+def test_table_lookup_is_exact(solution, positions):
+    check_against_solver(evaluate_batch(pack(positions), 3, solution=solution), positions)
+
+
+def test_ai_batch_search_is_exact_and_shares_its_table(positions):
+    ai = AI(table=TranspositionTable())
+    evaluation = ai.evaluate_batch(positions.reshape(-1, 3, 3))
+    check_against_solver(evaluation, positions)
+    misses = ai.table.misses
+    ai.evaluate_batch(positions)
+    assert ai.table.misses == misses  # the second batch is answered from the shared table
+
+
+def test_duplicates_are_searched_once_and_finished_boards_scored():
+    calls = []
+
+    def search(cells, player):
+        calls.append(tuple(cells))
+        return cells.index(0), 0.0
+    boards = np.array([
+        [1, 1, 1, 2, 2, 0, 0, 0, 0],  # player 1 has won; player 2 to move has lost
+        [1, 2, 1, 1, 2, 2, 2, 1, 1],  # full board, drawn
+        [1, 0, 0, 0, 0, 0, 0, 0, 0],
+        [1, 0, 0, 0, 0, 0, 0, 0, 0],
+    ])
+    evaluation = evaluate_batch(boards, 3, search=search)
+    assert evaluation.moves.tolist() == [-1, -1, 1, 1]
+    assert evaluation.values.tolist() == [-1, 0, 0, 0]
+    assert len(calls) == 1
+
+
+def test_tictactoe_batch_matches_single_moves():
+    game = TicTacToeGame(board_size=4, win_length=3)
+    boards = np.zeros((2, 4, 4), dtype=np.int8)
+    boards[:, 0, 0] = 1
+    boards[:, 3, 3] = 2
+    boards[:, 0, 1] = 1
+    evaluation = game.evaluate_batch(boards)
+    assert evaluation.moves.tolist() == [2, 2]  # block three in a row on the top edge
+    assert (np.abs(evaluation.values) <= 1).all()
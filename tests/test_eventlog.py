@@ -0,0 +1,60 @@
+import math
+from random import Random
+
+import pytest
+
+from core.board import CELLS
+from core.eventlog import HEADER, RECORD, EventLogWriter, iter_games, read_events, replay_all, replay_game
+
+
+def write_random_games(path, games, seed=0):
+    rng = Random(seed)
+    played = {}
+    with EventLogWriter(path, buffer_size=7) as log:
+        for _ in range(games):
+            game_id = log.new_game()
+            cells = rng.sample(range(CELLS), rng.randint(1, CELLS))
+            for ply, cell in enumerate(cells):
+                log.append(game_id, ply, 1 + ply % 2, cell, None if ply % 2 == 0 else 0.5, 1000.0 + ply)
+            played[game_id] = cells
+    return played
+
+
+def test_records_are_compact_and_round_trip(tmp_path):
+    path = tmp_path / 'events.bin'
+    played = write_random_games(str(path), 20)
+    events = list(read_events(str(path)))
+    assert path.stat().st_size == HEADER.size + RECORD.size * len(events)
+    assert [event.cell for event in events] == [cell for cells in played.values() for cell in cells]
+    assert math.isnan(events[0].evaluation) and events[1].evaluation == 0.5
+    assert events[1].timestamp == 1001.0
+
+
+def test_replay_rebuilds_boards_without_search(tmp_path):
+    path = str(tmp_path / 'events.bin')
+    played = write_random_games(path, 50)
+    for game_id, board in replay_all(path):
+        assert board.marked_squares == len(played[game_id])
+        for ply, cell in enumerate(played[game_id]):
+            assert board.bits[1 + ply % 2] >> cell & 1
+    assert replay_game(path, 7).marked_squares == len(played[7])
+    with pytest.raises(KeyError):
+        replay_game(path, 51)
+
+
+def test_reopened_log_appends_with_new_game_ids(tmp_path):
+    path = str(tmp_path / 'events.bin')
+    write_random_games(path, 3)
+    with open(path, 'ab') as f:
+        f.write(b'\x01\x02')  # torn write from an interrupted run
+    with EventLogWriter(path) as log:
+        assert log.new_game() == 4
+        log.append(4, 0, 1, 0)
+    assert [game_id for game_id, _ in iter_games(path)] == [1, 2, 3, 4]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'other.bin'
+    path.write_bytes(b'not a log')
+    with pytest.raises(ValueError):
+        list(read_events(str(path)))
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from core.gamerecords import (HEADER, NO_AI, NO_MOVE, GameRecords, GameRecordWriter, config_geometry, config_id,
+                              record_dtype)
+from core.tictactoe import Move, TicTacToeGame
+
+CONFIG = config_id(3, 3, 3)
+
+
+def test_config_ids_round_trip():
+    assert config_geometry(config_id(15, 15, 5)) == (15, 15, 5)
+    with pytest.raises(ValueError):
+        config_id(32, 3, 3)
+
+
+def test_records_are_fixed_width_and_memory_mapped(tmp_path):
+    path = str(tmp_path / 'games.bin')
+    with GameRecordWriter(path, buffer_size=3) as writer:
+        writer.append([4, 0, 2, 6, 3, 5, 8, 1, 7], 0, CONFIG)
+        writer.append([0, 3, 1, 4, 2], 1, CONFIG)
+        writer.append([0, 4, 1, 2, 3, 6], 2, config_id(4, 4, 3), level=1, starter=2)
+    assert record_dtype(9).itemsize == 15
+    records = GameRecords(path)
+    assert (tmp_path / 'games.bin').stat().st_size == HEADER.size + 3 * 15
+    assert isinstance(records.records, np.memmap)
+    assert records.moves[1].tolist() == [0, 3, 1, 4, 2] + [NO_MOVE] * 4
+    assert records.game(2) == ([0, 4, 1, 2, 3, 6], 2, (4, 4, 3))
+    assert records.outcome_counts() == [1, 1, 1]
+    assert records.outcome_counts(CONFIG) == [1, 1, 0]
+    assert records.levels.tolist() == [NO_AI, NO_AI, 1] and records.starters.tolist() == [1, 1, 2]
+
+
+def test_appending_requires_the_same_width(tmp_path):
+    path = str(tmp_path / 'games.bin')
+    with GameRecordWriter(path) as writer:
+        writer.append([0, 3, 1, 4, 2], 1, CONFIG)
+    with GameRecordWriter(path) as writer:
+        writer.append([0, 3, 1, 4, 2], 1, CONFIG)
+    assert len(GameRecords(path)) == 2
+    with pytest.raises(ValueError):
+        GameRecordWriter(path, max_moves=16)
+
+
+def test_tictactoe_game_history_and_outcome():
+    game = TicTacToeGame()
+    for row, col in [(0, 0), (1, 1), (0, 1), (2, 2), (0, 2)]:
+        game.process_move(Move(row, col, game.current_player.label))
+        game.toggle_player()
+    assert game.history == [0, 4, 1, 8, 2]
+    assert game.outcome() == 1
+    game.reset_game()
+    assert game.history == [] and game.outcome() == 0
@@ -0,0 +1,8 @@
+from core.importtime import IMPORT_BUDGET_MS, measure
+
+
+def test_core_imports_headless_within_budget():
+    elapsed, heavy = measure(runs=3)
+    assert not heavy
+    # Generous margin: CI machines are noisier than the workstation the budget was set on
+    assert elapsed < IMPORT_BUDGET_MS * 3
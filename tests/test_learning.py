@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from core import learning
+from core.ai import AI, TranspositionTable
+from core.board import Board
+from core.learning import SelfPlayLearner, agreement
+from core.retrograde import PerfectPlayTable, build_table
+
+
+@pytest.fixture(scope="module")
+def solution(tmp_path_factory):
+    path = build_table(str(tmp_path_factory.mktemp("tables") / "perfect.npy"), 3, 3, 3)
+    return PerfectPlayTable(path, 3, 3, 3)
+
+
+@pytest.fixture(scope="module")
+def learner():
+    learner = SelfPlayLearner(3, 3, 3, seed=1)
+    learner.train()
+    return learner
+
+
+def test_self_play_learns_the_exact_solution(learner, solution):
+    result = agreement(learner.entries, solution)
+    assert result.positions == 9040
+    assert result.coverage == result.moves == result.values == 1.0
+    # With a learning rate of 1 the values converge to the solver's, plies to the end included
+    reachable = solution.entries['move'] != 255
+    assert np.array_equal(learner.entries['value'][reachable], solution.entries['value'][reachable])
+
+
+def test_agreement_counts_what_training_has_not_reached(solution):
+    learner = SelfPlayLearner(3, 3, 3, batch=16, seed=2)
+    learner.step()
+    result = agreement(learner.entries, solution)
+    assert 0 < result.coverage < 0.01 and result.moves <= result.coverage
+    with pytest.raises(ValueError):
+        agreement(SelfPlayLearner(2, 2, 2).entries, solution)
+
+
+def test_saved_table_answers_the_ai(learner, tmp_path):
+    path = learner.save(str(tmp_path / 'learned.npy'))
+    ai = AI(level=6, table=TranspositionTable(), policy=PerfectPlayTable(path, 3, 3, 3))
+    board = Board()
+    board.mark_square(0, 0, 1)
+    board.mark_square(1, 1, 2)
+    board.mark_square(0, 1, 1)
+    assert ai.evaluate(board) == (0, 2)
+    assert ai.nodes == 0 and ai.last_evaluation == 0
+
+
+def test_positions_missing_from_the_table_are_searched(tmp_path):
+    path = SelfPlayLearner(3, 3, 3).save(str(tmp_path / 'empty.npy'))
+    ai = AI(level=6, table=TranspositionTable(), policy=PerfectPlayTable(path, 3, 3, 3))
+    board = Board()
+    board.mark_square(0, 0, 1)
+    board.mark_square(0, 1, 1)
+    assert ai.evaluate(board) == (0, 2) and ai.nodes > 0
+
+
+def test_load_learns_a_missing_table(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        learning.load(2, 2, 2, directory=str(tmp_path), train=False)
+    table = learning.load(2, 2, 2, directory=str(tmp_path))
+    assert table.lookup([0, 0, 0, 0], 1) == (2, 0)  # cells + 1 - 3: a win on the third ply
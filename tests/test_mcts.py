@@ -0,0 +1,57 @@
+import time
+
+from core.ai import AI
+from core.board import Board
+from core.mcts import MCTS
+
+
+def test_takes_the_winning_move():
+    cells = [1, 1, 0,
+             2, 2, 0,
+             0, 0, 0]
+    assert MCTS(3, playouts=2000, seed=1).best_move(cells, 1) == 2
+
+
+def test_blocks_the_opponent():
+    cells = [1, 0, 0,
+             2, 2, 0,
+             1, 0, 0]
+    assert MCTS(3, playouts=2000, seed=2).best_move(cells, 1) == 5
+
+
+def test_respects_the_time_budget_on_a_large_board():
+    engine = MCTS(9, k=5, time_limit=0.1, seed=3)
+    start = time.perf_counter()
+    move = engine.best_move([0] * 81, 1)
+    assert time.perf_counter() - start < 0.5
+    assert 0 <= move < 81
+    assert sum(visits for _, visits, _ in engine.root_stats()) == engine.root.visits == engine.last_playouts
+
+
+def test_reuses_the_subtree_between_moves():
+    engine = MCTS(3, playouts=1000, seed=4)
+    cells = [0] * 9
+    move = engine.best_move(cells, 1)
+    reply = max(engine.root.children, key=lambda c: c.visits).children[0]
+    visits = reply.visits
+    cells[move] = 1
+    cells[reply.move] = 2
+    engine.best_move(cells, 1)
+    assert engine.root is reply
+    assert engine.root.visits == visits + 1000
+
+
+def test_ai_level_two_plays_a_legal_move():
+    board = Board()
+    board.mark_square(1, 1, 1)
+    row, col = AI(level=2).evaluate(board)
+    assert board.empty_square(row, col)
+
+
+def test_ai_level_two_stopped_before_any_playout_calls_it_even():
+    board = Board()
+    board.mark_square(1, 1, 1)
+    ai = AI(level=2)
+    row, col = ai.evaluate(board, should_stop=lambda: True)
+    assert board.empty_square(row, col) and ai.mcts.last_playouts == 0
+    assert ai.last_evaluation == 0
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from core import bench
+from core.alphabeta import AlphaBetaSearch
+from core.parallel import ParallelSearch, _entries_by_root_move
+from core.worker import SearchCancelled
+from solver import random_positions
+
+
+@pytest.fixture(scope='module')
+def search():
+    with ParallelSearch(4, max_depth=4, workers=2) as engine:
+        yield engine.start()
+
+
+def test_matches_a_fresh_serial_search(search):
+    for cells, player in random_positions(random.Random(11), 4, 4, 4, 30, max_moves=8):
+        serial = AlphaBetaSearch(4, max_depth=4)
+        assert search.best_move(list(cells), player) == serial.best_move(list(cells), player)
+        assert search.score == serial.score
+
+
+def test_matches_serial_search_on_the_bench_corpus(search):
+    for moves in bench.CORPUS[4].values():
+        cells, player = bench._cells(4, moves), bench._to_move(moves)
+        serial = AlphaBetaSearch(4, max_depth=4)
+        assert search.best_move(cells, player) == serial.best_move(cells, player)
+
+
+def test_cancelled_split_leaves_the_engine_usable():
+    cells = [0] * 16
+    with ParallelSearch(4, workers=2) as engine:
+        with pytest.raises(SearchCancelled):
+            # Polled by the calling process once the root moves are out with the workers
+            engine.best_move(cells, 1, should_stop=lambda: engine._pool is not None)
+        assert engine.best_move(cells, 1) == AlphaBetaSearch(4).best_move(cells, 1)
+
+
+def test_small_searches_do_not_start_the_pool():
+    engine = ParallelSearch(3, workers=2)
+    cells = bench._cells(3, bench.CORPUS[3]['endgame'])
+    assert engine.best_move(cells, 1) == AlphaBetaSearch(3).best_move(cells, 1)
+    assert engine._pool is None
+
+
+def test_root_moves_get_only_the_entries_below_them():
+    engine = AlphaBetaSearch(4, max_depth=3)
+    cells = bench._cells(4, bench.CORPUS[4]['midgame'])
+    engine.best_move(cells, 1)
+    me = sum(1 << cell for cell, value in enumerate(cells) if value == 1)
+    opp = sum(1 << cell for cell, value in enumerate(cells) if value == 2)
+    by_move = _entries_by_root_move(engine.table, me, opp)
+    below = {key for entries in by_move.values() for key in entries}
+    assert below == set(engine.table) - {(me, opp)}
+    for move, entries in by_move.items():
+        assert not (me | opp) >> move & 1
+        assert all(engine.table[key] == entry and (key[0] | key[1]) >> move & 1 for key, entry in entries.items())
+    assert sum(map(len, by_move.values())) < len(engine.table) * len(by_move) / 2
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+from core.tictactoe import Move  # noqa: E402
+from rendering import GridRenderer, cell_geometry  # noqa: E402
+
+
+@pytest.fixture
+def renderer():
+    pygame.init()
+    screen = pygame.Surface((800, 600))
+    yield GridRenderer(screen, 3, pygame.font.Font(None, 48))
+    pygame.quit()
+
+
+def test_geometry_is_computed_once_per_board_size():
+    assert cell_geometry(800, 600, 4) is cell_geometry(800, 600, 4)
+    assert len(cell_geometry(800, 600, 4)) == 16
+
+
+def test_draw_cell_only_dirties_that_cell(renderer):
+    rect = renderer.draw_cell(Move(1, 2, "X", (0, 0, 255)))
+    assert rect == pygame.Rect(532, 200, 266, 200)
+    assert renderer.cell_at(rect.center) == (1, 2)
+
+
+def test_glyphs_are_rendered_once(renderer):
+    renderer.draw_cell(Move(0, 0, "O", (0, 255, 0)))
+    glyph = renderer.glyphs.get("O", (0, 255, 0))
+    renderer.draw_cell(Move(2, 2, "O", (0, 255, 0)))
+    assert renderer.glyphs.get("O", (0, 255, 0)) is glyph
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+from core.gamerecords import GameRecordWriter, config_id  # noqa: E402
+from replays import SHEET_GAP, ReplayRenderer, render  # noqa: E402
+
+
+def _write_games(path):
+    with GameRecordWriter(path) as records:
+        records.append([0, 3, 1, 4, 2], 1, config_id(3, 3, 3))
+        records.append([4, 0, 8, 2, 1, 7, 6, 5, 3], 0, config_id(3, 3, 3), starter=2)
+        records.append([], 0, config_id(3, 3, 3))
+
+
+def test_frames_show_one_more_piece_per_ply():
+    renderer = ReplayRenderer(3, 3, 3, cell_size=30)
+    blank = renderer.surface(renderer.size)
+    blank.blit(renderer.board, (0, 0))
+    frames = [pygame.image.tobytes(frame, 'P') for frame in renderer.plies([4, 0], starter=1)]
+    assert len(frames) == 2 and frames[0] != frames[1] != pygame.image.tobytes(blank, 'P')
+    # The centre cell holds a cross, drawn in the cross colour
+    centre = renderer.frame.get_at((45, 45))[:3]
+    assert centre == renderer.line_colors[1]
+
+
+def test_winning_line_is_drawn_on_the_last_ply():
+    renderer = ReplayRenderer(3, 3, 3, cell_size=30)
+    *_, frame = renderer.plies([0, 3, 1, 4, 2])
+    # Between the first two crosses of the top row, where only the line can be
+    assert frame.get_at((30, 15))[:3] == renderer.line_colors[1]
+
+
+def test_sheet_tiles_every_ply():
+    renderer = ReplayRenderer(3, 3, 3, cell_size=20, style='tac')
+    sheet = renderer.sheet([4, 0, 8, 2, 1], columns=3)
+    assert sheet.get_size() == (3 * (60 + SHEET_GAP) + SHEET_GAP, 2 * (60 + SHEET_GAP) + SHEET_GAP)
+    with pytest.raises(ValueError):
+        ReplayRenderer(3, 3, 3, style='ascii')
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_render_writes_sheets_or_frames(tmp_path, workers):
+    path = tmp_path / 'games.bin'
+    _write_games(path)
+    assert render(path, tmp_path / 'sheets', workers=workers) == 14
+    assert sorted(os.listdir(tmp_path / 'sheets')) == [f'game{index:07d}.png' for index in range(3)]
+    assert render(path, tmp_path / 'frames', frames=True, workers=workers, limit=1) == 5
+    assert len(os.listdir(tmp_path / 'frames')) == 5
+    assert pygame.image.load(str(tmp_path / 'frames' / 'game0000000_ply005.png')).get_size() == (96, 96)
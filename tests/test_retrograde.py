@@ -0,0 +1,58 @@
+import random
+
+import numpy as np
+import pytest
+
+from core.ai import AI
+from core.board import Board
+from core.retrograde import NO_MOVE, PerfectPlayTable, build_table
+from core.tictactoe import Move, TicTacToeGame
+from solver import make_solver, random_positions
+
+
+@pytest.fixture(scope="module")
+def solution(tmp_path_factory):
+    path = build_table(str(tmp_path_factory.mktemp("tables") / "perfect.npy"), 3, 3, 3)
+    return PerfectPlayTable(path, 3, 3, 3)
+
+
+def test_table_matches_exhaustive_solver(solution):
+    _, solve, value_after = make_solver(3, 3, 3)
+    for cells, player in random_positions(random.Random(5), 3, 3, 3, 300):
+        value, move = solution.lookup(cells, player)
+        expected = solve(cells, player)
+        assert np.sign(value) == expected
+        assert value_after(cells, move, player) == expected
+
+
+def test_terminal_positions_have_no_move(solution):
+    cells = [1, 1, 1,
+             2, 2, 0,
+             0, 0, 0]
+    value, move = solution.lookup(cells, 2)
+    assert move is None and value < 0
+    assert solution.entries['move'][0] != NO_MOVE
+
+
+def test_table_is_read_only(solution):
+    with pytest.raises(ValueError):
+        solution.entries['value'][0] = 1
+
+
+def test_front_ends_answer_from_the_table(solution):
+    board = Board()
+    board.mark_square(0, 0, 1)
+    board.mark_square(1, 1, 2)
+    board.mark_square(0, 1, 1)
+    assert AI(solution=solution).evaluate(board) == (0, 2)
+
+    game = TicTacToeGame(solution=solution)
+    for row, col in [(0, 0), (1, 1), (0, 1)]:
+        game.process_move(Move(row, col, game.current_player.label))
+        game.toggle_player()
+    assert game.get_best_move(game.current_player) == (0, 2)
+
+
+def test_rejects_table_for_another_board(solution):
+    with pytest.raises(ValueError):
+        TicTacToeGame(board_size=4, solution=solution)
@@ -0,0 +1,107 @@
+from random import Random
+
+import pytest
+
+from core.board import WIN_LINES, Board
+from core.rules import Rules, rules_for
+from core.tictactoe import Move, TicTacToeGame
+
+
+def brute_force_winner(rules, cells):
+    for line in rules.lines:
+        players = {cells[cell] for cell in line}
+        if len(players) == 1 and 0 not in players:
+            return players.pop()
+    return 0
+
+
+@pytest.mark.parametrize('geometry', [(3, 3, 3), (4, 5, 3), (6, 6, 4), (15, 15, 5)])
+def test_incremental_winner_matches_a_full_scan(geometry):
+    rules = Rules(*geometry)
+    rng = Random(0)
+    for _ in range(20):
+        position = rules.position()
+        order = rng.sample(range(rules.cells), rules.cells)
+        played = []
+        for ply, cell in enumerate(order):
+            winner = position.play(cell, 1 + ply % 2)
+            played.append(cell)
+            if winner:
+                break
+        assert winner == brute_force_winner(rules, position.cells)
+        assert position.is_tied() == (not winner)
+        # Unwinding restores every earlier state
+        while played:
+            position.undo(played.pop())
+            assert position.winner == brute_force_winner(rules, position.cells)
+        assert position.moves == 0 and not any(position.counts[1]) and not any(position.counts[2])
+
+
+def test_out_of_order_undo_keeps_a_remaining_line():
+    position = Rules(3, 3, 3).position()
+    for cell in (0, 1, 2, 3, 6):
+        position.play(cell, 1)  # top row and left column
+    assert position.winner == 1
+    position.undo(position.rules.lines[position.winning_line][-1])
+    assert position.winner == 1 and position.complete == 1
+    assert 0 not in [position.cells[cell] for cell in position.rules.lines[position.winning_line]]
+
+
+def test_rules_are_validated_and_shared():
+    with pytest.raises(ValueError):
+        Rules(3, 3, 4)
+    assert rules_for(15, 15, 5) is rules_for(15, 15, 5)
+    assert len(rules_for(15, 15, 5).lines) == 2 * 15 * 11 + 2 * 11 * 11
+    with pytest.raises(ValueError):
+        rules_for(3).position().undo(0)
+
+
+def test_board_reports_the_winning_line():
+    lines = []
+    board = Board()
+    board.show_win = lambda player, line: lines.append((player, line))
+    for cell in (0, 4, 8):
+        board.mark_square(*divmod(cell, 3), 2)
+    assert board.final_state(show=True) == 2
+    assert WIN_LINES[lines[0][1]] == (0, 4, 8)
+    board.unmark_square(2, 2, 2)
+    assert board.final_state() == 0
+
+
+def test_tictactoe_plays_fifteen_by_fifteen_five_in_a_row():
+    game = TicTacToeGame(board_size=15, win_length=5)
+    for col in range(5):
+        for row in (7, 8):
+            if not game.has_winner():
+                game.process_move(Move(row, col, game.current_player.label))
+                game.toggle_player()
+    assert game.has_winner() and game.winner_combo == [(7, col) for col in range(5)]
+    assert game.outcome() == 1 and not game.is_tied()
+
+
+def test_takeback_restores_the_empty_cells_in_order():
+    rules = Rules(4, 4, 3)
+    position = rules.position()
+    rng = Random(1)
+    snapshots = []
+    for ply, cell in enumerate(rng.sample(range(rules.cells), 10)):
+        snapshots.append(list(position.empty[:position.free]))
+        position.play(cell, 1 + ply % 2)
+        assert sorted(position.empty[:position.free]) == [i for i in range(rules.cells) if not position.cells[i]]
+        assert position.stack[:position.moves][-1] == cell
+    while position.moves:
+        position.takeback()
+        assert position.empty[:position.free] == snapshots.pop()
+    with pytest.raises(ValueError):
+        position.takeback()
+
+
+def test_out_of_order_undo_keeps_the_empty_cells_consistent():
+    position = Rules(3, 3, 3).position()
+    for ply, cell in enumerate((4, 0, 8, 2)):
+        position.play(cell, 1 + ply % 2)
+    position.undo(0)
+    assert position.stack[:position.moves] == [4, 8, 2]
+    assert sorted(position.empty[:position.free]) == [0, 1, 3, 5, 6, 7]
+    assert position.takeback() == 2 and position.takeback() == 8
+    assert sorted(position.empty[:position.free]) == [0, 1, 2, 3, 5, 6, 7, 8]
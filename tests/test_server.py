@@ -0,0 +1,184 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from core.server import EvaluationClient, EvaluationServer, percentile
+from core.tictactoe import Move, TicTacToeGame
+
+EMPTY = [0] * 9
+BLOCK = [1, 1, 0, 0, 2, 0, 0, 0, 0]  # player 2 must take the top right corner
+
+
+async def ask(port, requests):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for request in requests:
+        writer.write(json.dumps(request).encode() + b'\n')
+    await writer.drain()
+    replies = [json.loads(await reader.readline()) for _ in requests]
+    writer.close()
+    return {reply['id']: reply for reply in replies}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_requests_are_batched_and_cached():
+    async def scenario():
+        server = EvaluationServer(port=0, batch_window=0.05)
+        await server.start()
+        requests = [{'id': i, 'cells': BLOCK, 'player': 2} for i in range(10)]
+        first = await asyncio.gather(*(ask(server.port, requests[i:i + 2]) for i in range(0, 10, 2)))
+        again = await ask(server.port, [{'id': 99, 'cells': BLOCK, 'player': 2}])
+        stats = (await ask(server.port, [{'id': 0, 'op': 'stats'}]))[0]
+        await server.close()
+        return server, [reply for replies in first for reply in replies.values()], again[99], stats
+
+    server, replies, again, stats = run(scenario())
+    assert all(reply['move'] == [0, 2] for reply in replies)
+    assert server.searched == 1 and server.batches == 1
+    assert again['cached'] and again['move'] == [0, 2]
+    assert stats['requests'] == 11 and stats['latency_ms']['p50'] > 0
+
+
+def test_bad_requests_get_errors_not_disconnects():
+    async def scenario():
+        server = EvaluationServer(port=0)
+        await server.start()
+        replies = await ask(server.port, [
+            {'id': 1, 'cells': [0] * 8, 'player': 1},
+            {'id': 2, 'cells': EMPTY, 'player': 3},
+            {'id': 3, 'cells': EMPTY, 'player': 1},
+        ])
+        await server.close()
+        return replies
+
+    replies = run(scenario())
+    assert 'error' in replies[1] and 'error' in replies[2]
+    assert replies[3]['evaluation'] == 0
+
+
+def test_win_length_is_checked_before_queueing():
+    async def scenario():
+        server = EvaluationServer(port=0)
+        await server.start()
+        replies = await ask(server.port, [
+            {'id': 1, 'cells': EMPTY, 'player': 1, 'k': 4},
+            {'id': 2, 'cells': EMPTY, 'player': 1, 'k': -1},
+        ])
+        await server.close()
+        return server, replies
+
+    server, replies = run(scenario())
+    assert 'error' in replies[1] and 'error' in replies[2]
+    assert server.batches == 0
+
+
+def test_requests_that_are_not_objects_get_errors():
+    async def scenario():
+        server = EvaluationServer(port=0)
+        await server.start()
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        writer.write(b'[1, 2]\n3\n"stats"\n')
+        await writer.drain()
+        replies = [json.loads(await reader.readline()) for _ in range(3)]
+        writer.close()
+        await server.close()
+        return replies
+
+    replies = run(scenario())
+    assert all(reply['error'] == 'a request must be a JSON object' for reply in replies)
+
+
+def test_a_failing_search_does_not_fail_its_batch():
+    class BrokenEngine:
+        def best_move(self, cells, player):
+            raise ValueError("broken engine")
+
+    async def scenario():
+        server = EvaluationServer(port=0, batch_window=0.05)
+        server.engines[(2, 2, 2)] = BrokenEngine()
+        await server.start()
+        replies = await ask(server.port, [
+            {'id': 1, 'cells': [0] * 4, 'player': 1, 'rows': 2, 'cols': 2},
+            {'id': 2, 'cells': BLOCK, 'player': 2},
+        ])
+        await server.close()
+        return server, replies
+
+    server, replies = run(scenario())
+    assert server.batches == 1
+    assert replies[1]['error'] == 'broken engine'
+    assert replies[2]['move'] == [0, 2]
+
+
+def test_overload_is_refused():
+    async def scenario():
+        server = EvaluationServer(port=0, queue_size=1, overload_timeout=0.01, batch_size=1)
+        await server.start()
+        # Four different positions: one searching, one queued, the rest wait past the timeout
+        started = threading.Event()
+        release = threading.Event()
+        search_all = server._search_all
+
+        def slow_search(keys):
+            started.set()
+            release.wait(5)
+            return search_all(keys)
+        server._search_all = slow_search
+        boards = [[0] * 9 for _ in range(4)]
+        for cell, board in enumerate(boards):
+            board[cell] = 1
+        task = asyncio.create_task(ask(server.port, [
+            {'id': i, 'cells': board, 'player': 2} for i, board in enumerate(boards)]))
+        await asyncio.sleep(0.2)
+        release.set()
+        replies = await task
+        await server.close()
+        return server, replies
+
+    server, replies = run(scenario())
+    assert server.rejected >= 1
+    assert sum(reply.get('error') == 'overloaded' for reply in replies.values()) == server.rejected
+    assert any('move' in reply for reply in replies.values())
+
+
+def test_client_drives_a_game():
+    ready = threading.Event()
+    state = {}
+
+    def serve():
+        async def main():
+            server = EvaluationServer(port=0)
+            await server.start()
+            state['server'], state['loop'], state['stop'] = server, asyncio.get_running_loop(), asyncio.Event()
+            ready.set()
+            await state['stop'].wait()
+            await server.close()
+        asyncio.run(main())
+
+    thread = threading.Thread(target=serve)
+    thread.start()
+    ready.wait(5)
+    client = EvaluationClient(port=state['server'].port, rows=3, cols=3)
+    try:
+        game = TicTacToeGame(engine=client)
+        for row, col in [(0, 0), (1, 1), (0, 1)]:
+            game.process_move(Move(row, col, game.current_player.label))
+            game.toggle_player()
+        assert game.get_best_move(game.current_player) == (0, 2)
+        assert client.stats()['requests'] == 1
+        with pytest.raises(RuntimeError):
+            client.request(cells=[0] * 9, player=5)
+    finally:
+        client.close()
+        state['loop'].call_soon_threadsafe(state['stop'].set)
+        thread.join(5)
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50 and percentile(values, 0.99) == 99 and percentile(values, 1.0) == 100
+    assert percentile([], 0.5) == 0.0
@@ -0,0 +1,66 @@
+import pytest
+
+from core.gamerecords import GameRecords, GameRecordWriter
+from core.sessions import AI_MODE, PVP_MODE, SessionHost
+
+
+def test_evicted_sessions_come_back_unchanged(tmp_path):
+    host = SessionHost(tmp_path / 'sessions.bin', max_resident=2)
+    first = host.create(PVP_MODE, level=0)
+    for row, col in ((0, 0), (1, 1), (0, 1)):
+        host.move(first, row, col)
+    others = [host.create() for _ in range(3)]
+    stats = host.stats()
+    assert stats['resident'] == 2 and stats['spilled'] == 2 and len(host) == 4
+
+    session = host.get(first)
+    assert host.loads == 1
+    assert list(session.moves) == [0, 4, 1] and session.player == 2
+    assert (session.mode, session.level, session.winner) == (PVP_MODE, 0, 0)
+    assert session.marks_1 == 0b11 and session.marks_2 == 1 << 4
+    host.move(first, 2, 2)
+    host.move(first, 0, 2)
+    assert host.get(first).winner == 1 and host.get(first).is_over()
+    assert host.get(others[0]).moves == bytearray()
+
+
+def test_ai_mode_answers_every_move_from_the_shared_table():
+    host = SessionHost()
+    games = [host.create(AI_MODE, level=1) for _ in range(2)]
+    replies = [host.move(game, 1, 1) for game in games]
+    assert replies[0] == replies[1] and replies[0] != (1, 1)
+    assert host.table.hits > 0  # the second game's search was answered by the first's
+    assert host.move(host.create(PVP_MODE), 1, 1) is None
+
+
+def test_illegal_moves_and_unknown_sessions_are_rejected():
+    host = SessionHost(max_resident=1)
+    game = host.create(PVP_MODE)
+    host.move(game, 0, 0)
+    with pytest.raises(ValueError):
+        host.move(game, 0, 0)
+    host.create()
+    host.end(game)
+    with pytest.raises(KeyError):
+        host.get(game)
+    assert host.store.read(game) is None
+
+
+def test_memory_per_resident_session_is_bounded():
+    host = SessionHost(max_resident=1000)
+    for _ in range(3000):
+        game = host.create(PVP_MODE)
+        host.move(game, 1, 1)
+    stats = host.stats()
+    assert stats['resident'] == 1000 and stats['spilled'] == 2000
+    assert stats['bytes_per_session'] < 256 and stats['record_bytes'] == 15
+
+
+def test_finished_games_are_recorded(tmp_path):
+    path = tmp_path / 'games.bin'
+    with GameRecordWriter(path) as records:
+        host = SessionHost(records=records)
+        game = host.create(PVP_MODE)
+        for row, col in ((0, 0), (1, 0), (0, 1), (1, 1), (0, 2)):
+            host.move(game, row, col)
+    assert GameRecords(path).game(0)[:2] == ([0, 3, 1, 4, 2], 1)
@@ -0,0 +1,117 @@
+import gc
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from core.ai import AI, TranspositionTable
+from core.alphabeta import EXACT, LOWER, UPPER, AlphaBetaSearch
+from core.board import Board
+from core.parallel import ParallelSearch
+from core.sharedtable import MinimaxTable, SharedTable
+from solver import make_solver, random_positions
+
+
+@pytest.fixture
+def table():
+    with SharedTable(buckets=1 << 12) as table:
+        yield table
+
+
+def _search(table, cells, player):
+    engine = AlphaBetaSearch(4, max_depth=4, table=table)
+    return engine.best_move(cells, player), engine.nodes
+
+
+def test_entries_round_trip(table):
+    wide = (1 << 200) + 5  # a 15x15 board's bitmask
+    table.put((0b101, 0b10), (7, LOWER, -999_998, None))
+    table.put((wide, 3), (2, UPPER, 1234, 224))
+    assert table.get((0b101, 0b10)) == (7, LOWER, -999_998, None)
+    assert table.get((wide, 3)) == (2, UPPER, 1234, 224)
+    assert table.get((0b10, 0b101)) is None
+    assert len(table) == 2 and table.stats()['hits'] == 2
+
+
+def test_deeper_entries_survive_collisions():
+    with SharedTable(buckets=1) as table:
+        table.put((1, 0), (6, EXACT, 10, 1))
+        table.put((2, 0), (3, EXACT, 20, 2))  # shallower: goes to the always-replace entry
+        table.put((3, 0), (1, EXACT, 30, 3))
+        assert table.get((1, 0))[2] == 10 and table.get((2, 0)) is None and table.get((3, 0))[2] == 30
+        table.put((1, 0), (2, EXACT, 11, 1))  # the same position replaces its own entry
+        table.put((4, 0), (2, EXACT, 40, 4))
+        assert table.get((4, 0))[2] == 40 and table.get((1, 0)) is None
+
+
+def test_the_creator_frees_a_dropped_table():
+    table = SharedTable(buckets=1)
+    attached = SharedTable(name=table.name, create=False)
+    del attached  # an attached table only detaches
+    name = table.name
+    SharedTable(name=name, create=False).close()
+    del table
+    gc.collect()
+    with pytest.raises(FileNotFoundError):
+        SharedTable(name=name, create=False)
+
+
+def test_torn_entries_read_as_misses(table):
+    table.put((9, 9), (4, EXACT, 5, 0))
+    slot = table._slot(9, 9)
+    table._words[slot + 2] ^= 1 << 30  # data from another write than the key words
+    assert table.get((9, 9)) is None
+
+
+def test_alphabeta_on_a_shared_table_solves_exactly(table):
+    _, solve, value_after = make_solver(3, 3, 3)
+    engine = AlphaBetaSearch(3, table=table)
+    for cells, player in random_positions(random.Random(3), 3, 3, 3, 100):
+        move = engine.best_move(list(cells), player)
+        assert value_after(cells, move, player) == solve(cells, player)
+    assert table.stats()['size'] > 0
+
+
+def test_workers_reuse_each_others_entries(table):
+    cells = [0] * 16
+    with ProcessPoolExecutor(1) as pool:
+        move, nodes = pool.submit(_search, table, cells, 1).result()
+    again, warm_nodes = _search(table, cells, 1)
+    assert again == move and warm_nodes < nodes / 10
+
+
+def test_saved_table_warm_starts_a_new_one(tmp_path):
+    cells = [0] * 16
+    with SharedTable(buckets=1 << 12, geometry=(4, 4, 4)) as table:
+        _, nodes = _search(table, cells, 1)
+        table.save(tmp_path / 'table.bin')
+        with SharedTable.load(tmp_path / 'table.bin', (4, 4, 4)) as loaded:
+            assert loaded.buckets == table.buckets and len(loaded) == len(table)
+            assert loaded.geometry == (4, 4, 4)
+            assert _search(loaded, cells, 1)[1] < nodes / 10
+    with pytest.raises(ValueError, match='not'):
+        SharedTable.load(tmp_path / 'table.bin', (4, 4, 3))
+    (tmp_path / 'bad.bin').write_bytes(b'nope')
+    with pytest.raises(ValueError):
+        SharedTable.load(tmp_path / 'bad.bin')
+
+
+def test_minimax_entries_share_the_table(table):
+    board = Board()
+    board.mark_square(1, 1, 1)
+    expected = AI(table=TranspositionTable()).minimax(board.copy(), False)
+    assert AI(table=MinimaxTable(table)).minimax(board.copy(), False) == expected
+    second = AI(table=MinimaxTable(table))
+    hits = table.hits
+    assert second.minimax(board.copy(), False) == expected and table.hits == hits + 1
+
+
+def test_parallel_workers_search_with_the_shared_table(table):
+    cells = [0] * 16
+    with ParallelSearch(4, workers=2, table=table) as engine:
+        move = engine.best_move(cells, 1)
+        assert engine.split_seconds > 0
+    assert move == AlphaBetaSearch(4).best_move(cells, 1)
+    # The workers' entries for the deepest iteration are in the table too
+    warm = AlphaBetaSearch(4, table=table)
+    assert warm.best_move(cells, 1) == move and warm.nodes < engine.nodes / 10
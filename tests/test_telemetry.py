@@ -0,0 +1,61 @@
+import io
+import json
+
+from core.ai import AI, TranspositionTable
+from core.board import Board
+from core.telemetry import NULL_SINK, Decision, JsonLinesSink, RingBufferSink, open_sink
+from core.tictactoe import TicTacToeGame
+
+
+def test_evaluate_records_one_decision_and_prints_nothing(capsys):
+    sink = RingBufferSink()
+    ai = AI(table=TranspositionTable(), telemetry=sink)
+    board = Board()
+    board.mark_square(0, 0, 1)
+    move = ai.evaluate(board)
+    assert capsys.readouterr().out == ''
+    (decision,) = sink
+    assert decision.engine == 'minimax' and decision.move == move and decision.evaluation == 0
+    assert decision.nodes == ai.nodes > 0
+    assert decision.depth == 8  # searched down to a full board
+    assert decision.cache_misses > 0 and decision.seconds > 0
+
+
+def test_get_best_move_reports_alphabeta_counters():
+    sink = RingBufferSink()
+    game = TicTacToeGame(board_size=4, telemetry=sink)
+    game.get_best_move(game.current_player)
+    (decision,) = sink
+    assert decision.engine == 'alphabeta' and decision.player == 'X'
+    assert decision.nodes > 0 and decision.cutoffs > 0 and decision.depth > 0
+    assert 0 < decision.cache_hit_rate < 1
+
+
+def test_ring_buffer_keeps_the_latest_and_finds_outliers():
+    sink = RingBufferSink(capacity=3)
+    for seconds in (5.0, 1.0, 4.0, 2.0):
+        sink.record(Decision('minimax', 2, (0, 0), 0, seconds=seconds))
+    assert len(sink) == 3
+    assert [decision.seconds for decision in sink.slowest(2)] == [4.0, 2.0]
+
+
+def test_json_lines_sink_buffers_until_flushed():
+    stream = io.StringIO()
+    sink = JsonLinesSink(stream, buffer_size=2)
+    sink.record(Decision('random', 2, (1, 1), None))
+    assert stream.getvalue() == ''
+    sink.record(Decision('random', 2, (2, 2), None))
+    sink.record(Decision('random', 2, (0, 2), None))
+    sink.close()
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [record['move'] for record in records] == [[1, 1], [2, 2], [0, 2]]
+    assert not stream.closed
+
+
+def test_open_sink_specs(tmp_path):
+    assert open_sink('') is NULL_SINK and not NULL_SINK.enabled
+    assert isinstance(open_sink('ring'), RingBufferSink)
+    path = tmp_path / 'decisions.jsonl'
+    with open_sink(str(path)) as sink:
+        sink.record(Decision('table', 2, (0, 1), 1))
+    assert json.loads(path.read_text())['engine'] == 'table'
@@ -0,0 +1,55 @@
+import random
+import tracemalloc
+
+from core.tictactoe import DEFAULT_PLAYERS, Move, TicTacToeGame
+from solver import make_solver, random_positions
+
+
+def play(game, moves):
+    for row, col in moves:
+        game.process_move(Move(row, col, game.current_player.label))
+        game.toggle_player()
+
+
+def test_get_best_move_blocks_the_open_line():
+    game = TicTacToeGame()
+    play(game, [(0, 0), (1, 1), (0, 1)])
+    assert game.get_best_move(game.current_player) == (0, 2)
+
+
+def test_win_length_is_shared_by_rules_and_engine():
+    game = TicTacToeGame(board_size=4, win_length=3)
+    assert all(len(combo) == 3 for combo in game._winning_combos)
+    play(game, [(0, 0), (3, 3), (0, 1)])
+    # O must block X from completing three in a row on the top edge
+    assert game.get_best_move(game.current_player) == (0, 2)
+
+
+def test_get_best_move_returns_none_on_a_full_board():
+    game = TicTacToeGame(players=DEFAULT_PLAYERS)
+    play(game, [(0, 0), (0, 1), (0, 2), (1, 1), (1, 0), (1, 2), (2, 1), (2, 0), (2, 2)])
+    assert game.get_best_move(game.current_player) is None
+
+
+def test_minimax_matches_exhaustive_solver_and_leaves_the_game_untouched():
+    _, solve, _ = make_solver(3, 3, 3)
+    for cells, player in random_positions(random.Random(3), 3, 3, 3, 100):
+        crosses = [cell for cell, value in enumerate(cells) if value == 1]
+        noughts = [cell for cell, value in enumerate(cells) if value == 2]
+        game = TicTacToeGame()
+        play(game, [divmod(cell, 3) for pair in zip(crosses, noughts + [None]) for cell in pair if cell is not None])
+        grid = [list(row) for row in game._current_moves]
+        assert game.minimax(0, True, game.current_player) == solve(cells, player)
+        assert game._current_moves == grid and game.history == game._position.stack[:game._position.moves]
+
+
+def test_minimax_does_not_allocate_per_node():
+    game = TicTacToeGame()
+    play(game, [(1, 1)])
+    tracemalloc.start()
+    try:
+        assert game.minimax(0, True, game.current_player) == 0
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 1024  # thousands of nodes, a handful of bytes
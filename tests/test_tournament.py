@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from core.tournament import MatchupResult, play_chunk, run_tournament
+
+
+def test_perfect_engines_only_draw_each_other():
+    results = run_tournament(['minimax', 'alphabeta'], games=20, chunk_size=10, workers=2)
+    assert all(result == MatchupResult(20, 0, 20, 0) for result in results.values())
+
+
+def test_deadline_and_policy_levels_play_perfectly_on_a_small_board():
+    for engine in ['deadline3', 'deadline4', 'deadline5', 'policy']:
+        assert play_chunk(engine, 'minimax', 0, 2, seed=1) == MatchupResult(2, 0, 2, 0)
+        assert play_chunk('minimax', engine, 0, 2, seed=1) == MatchupResult(2, 0, 2, 0)
+        assert play_chunk(engine, 'random', 0, 10, seed=1).losses == 0
+
+
+def test_chunks_are_deterministic_per_seed():
+    assert play_chunk('random', 'random', 3, 50, seed=9) == play_chunk('random', 'random', 3, 50, seed=9)
+
+
+def test_resumes_from_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / 'run.json')
+    full = run_tournament(['random', 'minimax'], games=40, chunk_size=10, workers=1, seed=5, checkpoint=checkpoint)
+
+    # Pretend the run was interrupted after half of its chunks
+    with open(checkpoint) as f:
+        state = json.load(f)
+    state['done'] = dict(sorted(state['done'].items())[::2])
+    with open(checkpoint, 'w') as f:
+        json.dump(state, f)
+
+    resumed = run_tournament(['random', 'minimax'], games=40, chunk_size=10, workers=1, seed=5,
+                             checkpoint=checkpoint)
+    assert resumed == full
+
+    with pytest.raises(ValueError):
+        run_tournament(['random', 'minimax'], games=80, chunk_size=10, checkpoint=checkpoint)
+
+
+def test_wilson_interval_brackets_the_rate():
+    low, high = MatchupResult(100, 60, 10, 30).interval()
+    assert low < 0.6 < high
+    assert MatchupResult(100, 0, 100, 0).interval()[0] == 0.0
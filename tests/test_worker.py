@@ -0,0 +1,61 @@
+import threading
+import time
+
+import pytest
+
+from core.ai import AI, TranspositionTable
+from core.alphabeta import AlphaBetaSearch
+from core.board import Board
+from core.worker import AIWorker, SearchCancelled
+
+
+def wait_until_done(worker, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not worker.done():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_worker_delivers_the_search_result():
+    worker = AIWorker()
+    board = Board()
+    board.mark_square(0, 0, 1)
+    worker.start(AI(table=TranspositionTable()).evaluate, board.copy())
+    assert worker.busy
+    wait_until_done(worker)
+    assert worker.result() == (1, 1)
+    assert not worker.busy
+    worker.shutdown()
+
+
+def test_cancel_stops_a_long_search_quickly():
+    stop = threading.Event()
+    engine = AlphaBetaSearch(5, k=4, max_depth=12)
+    timer = threading.Timer(0.1, stop.set)
+    timer.start()
+    start = time.perf_counter()
+    with pytest.raises(SearchCancelled):
+        engine.best_move([0] * 25, 1, stop.is_set)
+    assert time.perf_counter() - start < 1
+
+
+def test_cancelled_minimax_leaves_the_board_untouched():
+    board = Board()
+    with pytest.raises(SearchCancelled):
+        AI(table=TranspositionTable()).evaluate(board, should_stop=lambda: True)
+    assert board.is_empty() and board.keys == [0] * len(board.keys)
+
+
+def test_cancelled_result_is_never_delivered():
+    worker = AIWorker()
+    worker.start(lambda should_stop: "stale")
+    worker.cancel()
+    assert not worker.busy and not worker.done()
+    worker.shutdown()
+
+
+def test_board_copy_is_independent():
+    board = Board()
+    copy = board.copy()
+    copy.mark_square(1, 1, 2)
+    assert board.is_empty() and board.empty_square(1, 1)
@@ -1,155 +1,70 @@
 import pygame
-from itertools import cycle
-from typing import NamedTuple
 
+from core import gamerecords
+from core.tictactoe import BOARD_SIZE, DEFAULT_PLAYERS, Move, Player, TicTacToeGame  # noqa: F401
+from rendering import GridRenderer
 
-class Player(NamedTuple):
-    label: str
-    color: tuple
-
-
-class Move(NamedTuple):
-    row: int
-    col: int
-    label: str = ""
-    color: tuple = (0, 0, 0)  # Default color is black
-
-
-BOARD_SIZE = 3
-DEFAULT_PLAYERS = (
-    Player(label="X", color=(0, 0, 255)),  # Blue
-    Player(label="O", color=(0, 255, 0)),  # Green
-)
-
-
-class TicTacToeGame:
-    def __init__(self, players=DEFAULT_PLAYERS, board_size=BOARD_SIZE):
-        self._players = cycle(players)
-        self.board_size = board_size
-        self.current_player = next(self._players)
-        self.winner_combo = []
-        self._current_moves = []
-        self._has_winner = False
-        self._winning_combos = []
-        self._setup_board()
-
-    def _setup_board(self):
-        self._current_moves = [
-            [Move(row, col) for col in range(self.board_size)]
-            for row in range(self.board_size)
-        ]
-        self._winning_combos = self._get_winning_combos()
-
-    def _get_winning_combos(self):
-        rows = [
-            [(move.row, move.col) for move in row]
-            for row in self._current_moves
-        ]
-        columns = [list(col) for col in zip(*rows)]
-        first_diagonal = [row[i] for i, row in enumerate(rows)]
-        second_diagonal = [col[j] for j, col in enumerate(reversed(columns))]
-        return rows + columns + [first_diagonal, second_diagonal]
-
-    def toggle_player(self):
-        """Return a toggled player."""
-        self.current_player = next(self._players)
-
-    def is_valid_move(self, move):
-        """Return True if move is valid, and False otherwise."""
-        row, col = move.row, move.col
-        move_was_not_played = self._current_moves[row][col].label == ""
-        no_winner = not self._has_winner
-        return no_winner and move_was_not_played
-
-    def process_move(self, move):
-        """Process the current move and check if it's a win."""
-        row, col = move.row, move.col
-        self._current_moves[row][col] = move
-        for combo in self._winning_combos:
-            results = set(self._current_moves[n][m].label for n, m in combo)
-            is_win = (len(results) == 1) and ("" not in results)
-            if is_win:
-                self._has_winner = True
-                self.winner_combo = combo
-                break
-
-    def has_winner(self):
-        """Return True if the game has a winner, and False otherwise."""
-        return self._has_winner
-
-    def is_tied(self):
-        """Return True if the game is tied, and False otherwise."""
-        no_winner = not self._has_winner
-        played_moves = (
-            move.label for row in self._current_moves for move in row
-        )
-        return no_winner and all(played_moves)
-
-    def reset_game(self):
-        """Reset the game state to play again."""
-        for row, row_content in enumerate(self._current_moves):
-            for col, _ in enumerate(row_content):
-                row_content[col] = Move(row, col)
-        self._has_winner = False
-        self.winner_combo = []
+CAPTION = "Tic-Tac-Toe Game"
+POLL_MS = 16
+RESET_DELAY_MS = 3000
 
 
 class TicTacToeBoard:
     def __init__(self, game):
         pygame.init()
         self.screen = pygame.display.set_mode((800, 600))
-        pygame.display.set_caption("Tic-Tac-Toe Game")
-        self.clock = pygame.time.Clock()
+        pygame.display.set_caption(CAPTION)
         self.game = game
         self.font = pygame.font.Font(None, 48)
-        self._create_board()
-
-    def _create_board(self):
-        self.cells = []
-        cell_width = self.screen.get_width() // self.game.board_size
-        cell_height = self.screen.get_height() // self.game.board_size
-        for row in range(self.game.board_size):
-            for col in range(self.game.board_size):
-                rect = pygame.Rect(col * cell_width, row * cell_height, cell_width, cell_height)
-                self.cells.append(rect)
+        self.renderer = GridRenderer(self.screen, self.game.board_size, self.font)
+        # core.gamerecords.GameRecordWriter when GAME_RECORDS names a file
+        self.records = gamerecords.from_env(game.board_size ** 2)
 
     def draw_board(self):
-        self.screen.fill((255, 255, 255))
-        for i, row in enumerate(self.game._current_moves):
-            for j, move in enumerate(row):
-                rect = self.cells[i * self.game.board_size + j]
-                pygame.draw.rect(self.screen, (0, 0, 0), rect, 2)
-                label_surface = self.font.render(move.label, True, move.color)
-                label_rect = label_surface.get_rect(center=rect.center)
-                self.screen.blit(label_surface, label_rect)
-        pygame.display.flip()
+        pygame.display.update(self.renderer.draw_all(self.game._current_moves))
+
+    def _reset_time(self):
+        """Announce a finished game; return when to clear it (pygame ticks), or None."""
+        if self.game.has_winner():
+            print(f'Player "{self.game.current_player.label}" won!')
+        elif self.game.is_tied():
+            print("Tied game!")
+        else:
+            return None
+        if self.records is not None:
+            self.records.append(self.game.history, self.game.outcome(), gamerecords.config_id(
+                self.game.board_size, self.game.board_size, self.game.win_length), gamerecords.NO_AI)
+        return pygame.time.get_ticks() + RESET_DELAY_MS
 
     def play(self):
+        self.draw_board()
+        reset_at = None  # a finished game stays on screen until then, without blocking input
         while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    return
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if not self.game.has_winner() and not self.game.is_tied():
-                        mouse_pos = pygame.mouse.get_pos()
-                        for i, cell in enumerate(self.cells):
-                            if cell.collidepoint(mouse_pos):
-                                row, col = i // self.game.board_size, i % self.game.board_size
-                                move = Move(row, col, self.game.current_player.label, self.game.current_player.color)
-                                if self.game.is_valid_move(move):
-                                    self.game.process_move(move)
-                                    self.game.toggle_player()
-            self.draw_board()
-            if self.game.has_winner():
-                print(f'Player "{self.game.current_player.label}" won!')
-                pygame.time.wait(3000)
-                self.game.reset_game()
-            elif self.game.is_tied():
-                print("Tied game!")
-                pygame.time.wait(3000)
+            if reset_at is not None and pygame.time.get_ticks() >= reset_at:
                 self.game.reset_game()
-            self.clock.tick(60)
+                self.draw_board()
+                reset_at = None
+
+            # Sleep until there is input, waking up regularly only while something is pending
+            event = pygame.event.wait(POLL_MS if reset_at is not None else 0)
+            if event.type == pygame.QUIT:
+                if self.records is not None:
+                    self.records.close()
+                pygame.quit()
+                return
+            if event.type != pygame.MOUSEBUTTONDOWN or reset_at is not None:
+                continue
+            cell = self.renderer.cell_at(event.pos)
+            if cell is None:
+                continue
+            row, col = cell
+            move = Move(row, col, self.game.current_player.label, self.game.current_player.color)
+            if not self.game.is_valid_move(move):
+                continue
+            self.game.process_move(move)
+            self.game.toggle_player()
+            pygame.display.update([self.renderer.draw_cell(move)])
+            reset_at = self._reset_time()
 
 
 def main():